@@ -0,0 +1,70 @@
+"""
+AsyncAdbClient를 가짜 adb 서버(util.fake_adb_server)에 붙여 확인하는 테스트
+에뮬레이터/adb 없이 실행된다.
+
+    python -m pytest -q test_adb_async.py
+"""
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+
+from util.adb_async import AsyncAdbClient, capture_screen_async
+from util.fake_adb_server import FakeAdbServer, FakeDevice
+
+SERIAL = "localhost:6520"
+PACKAGE = "com.Krafton.gpp.sdk.ue.sample"
+
+
+@pytest.fixture
+def server():
+    # port=0: 빈 포트 사용 (시작 후 server.port에 실제 포트)
+    device = FakeDevice(SERIAL, size=(320, 640), packages=[PACKAGE])
+    fake = FakeAdbServer([device], port=0, verbose=False).start_in_thread()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def client(server):
+    return AsyncAdbClient(port=server.port)
+
+
+def test_devices(client):
+    assert asyncio.run(client.devices()) == [{'serial': SERIAL, 'status': "device"}]
+
+
+def test_shell(client, server):
+    returncode, output = asyncio.run(client.shell(["wm", "size"], SERIAL))
+    assert returncode == 0
+    assert output.strip() == "Physical size: 320x640"
+
+    returncode, _ = asyncio.run(client.shell("false", SERIAL))
+    assert returncode == 1
+
+    # 입력 명령은 디바이스까지 전달되어 기록됨
+    asyncio.run(client.shell(["input", "tap", 10, 20], SERIAL))
+    assert any(entry['command'].startswith("input tap 10 20") for entry in server.command_log)
+
+
+def test_exec_out_screencap(client):
+    data = asyncio.run(client.exec_out("screencap -p", SERIAL))
+    assert data.startswith(b"\x89PNG")
+    assert Image.open(io.BytesIO(data)).size == (320, 640)
+
+    frame = asyncio.run(capture_screen_async(serial=SERIAL, raw=True, client=client))
+    assert frame.image.shape[:2] == (640, 320)
+
+
+def test_pull(client, server):
+    server.devices[0].files["/sdcard/record.mp4"] = b"\x00" * 100000
+    assert asyncio.run(client.pull("/sdcard/record.mp4", SERIAL)) == b"\x00" * 100000
+
+    with pytest.raises(Exception, match="does not exist"):
+        asyncio.run(client.pull("/sdcard/missing.mp4", SERIAL))
+
+
+def test_unknown_device(client):
+    with pytest.raises(Exception, match="not found"):
+        asyncio.run(client.shell("true", "emulator-9999"))
@@ -0,0 +1,122 @@
+"""
+증분 OCR(util.incremental_ocr)의 스크롤 추정과 띠 영역 계산을 합성 목록 화면으로 확인하는 테스트
+고정 헤더 + 비슷한 줄이 반복되는 다크 테마 목록을 그려 두고 보이는 위치만 바꿔 스크롤을 흉내 낸다.
+디바이스/tesseract 없이 실행된다.
+
+    python -m pytest -q test_incremental_ocr.py
+"""
+import cv2
+import numpy
+import pytest
+
+import util.incremental_ocr as incremental_ocr
+from util.incremental_ocr import _bands, _changed_rows, _extend_bands, estimate_scroll, incremental_results
+from util.ocr_search import DEFAULT_PREPROCESS_STEPS
+
+WIDTH, HEIGHT = 360, 800
+HEADER = 120
+ROW = 90
+
+
+def _list_canvas(rows: int = 40) -> numpy.ndarray:
+    # 스크롤되는 목록 전체 (다크 테마, 비슷한 줄 반복)
+    canvas = numpy.full((rows * ROW, WIDTH), 30, dtype=numpy.uint8)
+    for i in range(rows):
+        top = i * ROW
+        cv2.line(canvas, (0, top + ROW - 1), (WIDTH, top + ROW - 1), 60, 1)
+        cv2.putText(canvas, f"Item {i:02d} reward", (16, top + 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 230, 2)
+        cv2.putText(canvas, "Lv. 10", (16, top + 72), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 180, 1)
+    return canvas
+
+
+CANVAS = _list_canvas()
+
+
+def _screen(offset: int, noise: int = 0, seed: int = 0) -> numpy.ndarray:
+    """목록을 offset px 내린 위치의 화면 (위쪽 HEADER px는 고정 헤더)"""
+    screen = numpy.empty((HEIGHT, WIDTH), dtype=numpy.uint8)
+    screen[:HEADER] = 50
+    cv2.putText(screen, "Mailbox", (16, 70), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 240, 2)
+    screen[HEADER:] = CANVAS[offset:offset + HEIGHT - HEADER]
+    if noise:
+        jitter = numpy.random.default_rng(seed).integers(-noise, noise + 1, screen.shape)
+        screen = numpy.clip(screen.astype(numpy.int16) + jitter, 0, 255).astype(numpy.uint8)
+    return screen
+
+
+@pytest.mark.parametrize("dy", [200, 37, 4, -150, -41])
+def test_estimate_scroll(dy):
+    # 위로 스와이프하면 목록이 올라가므로 cur[y] == prev[y + dy] (dy > 0)
+    start = 600
+    assert estimate_scroll(_screen(start), _screen(start + dy)) == dy
+
+
+def test_estimate_scroll_with_noise():
+    # 스트림 압축 노이즈 수준의 차이는 무시
+    assert estimate_scroll(_screen(600, noise=5, seed=1), _screen(733, noise=5, seed=2)) == 133
+
+
+def test_unchanged_screen():
+    prev, cur = _screen(600), _screen(600)
+    assert not _changed_rows(prev, cur).any()
+    prev_results = {0: {'step': 0, 'shape': prev.shape, 'data': {'text': []}, 'windows': [], 'elapsed': 0.5}}
+    results, info = incremental_results(prev, prev_results, cur, DEFAULT_PREPROCESS_STEPS[:1])
+    assert info['changed'] is False and info['scroll'] == 0
+    assert results[0]['elapsed'] == 0.0
+
+
+def test_bands():
+    dirty = numpy.zeros(100, dtype=bool)
+    dirty[[10, 11, 12, 15, 16, 40]] = True
+    # gap 이내의 줄은 하나의 띠로
+    assert _bands(dirty, 8) == [(10, 17), (40, 41)]
+    assert _bands(dirty, 1) == [(10, 13), (15, 17), (40, 41)]
+
+
+def test_extend_bands():
+    ink = numpy.zeros(200, dtype=bool)
+    ink[20:50] = True
+    # 글자 줄(20~50) 중간에서 끝나는 띠는 글자 줄 끝까지 늘어나고 여백이 붙음
+    assert _extend_bands([(30, 35)], ink, 200) == [(12, 58)]
+    # 늘린 띠끼리 겹치면 하나로 합침
+    assert _extend_bands([(25, 27), (45, 47), (100, 101)], ink, 200) == [(12, 58), (92, 109)]
+    # 화면 경계를 넘지 않음
+    assert _extend_bands([(0, 3)], ink, 200) == [(0, 11)]
+
+
+def _word(text: str, left: int, top: int, block: int) -> dict:
+    return {'level': 5, 'page_num': 1, 'block_num': block, 'par_num': 1, 'line_num': 1, 'word_num': 1,
+            'left': left, 'top': top, 'width': 100, 'height': 24, 'conf': 95, 'text': text}
+
+
+def _data(words) -> dict:
+    return {column: [word[column] for word in words] for column in words[0]}
+
+
+def test_incremental_results_scroll(monkeypatch):
+    # 목록을 180px 올리면 아래쪽에 새로 나타난 줄만 다시 OCR하고, 헤더 단어는 그대로, 목록 단어는 위로 옮겨 재사용
+    dy = 180
+    prev, cur = _screen(600), _screen(600 + dy)
+    words = [_word("Mailbox", 16, 50, 1), _word("Item", 16, 440, 2), _word("Item", 16, 710, 3)]
+    prev_results = {0: {'step': 0, 'shape': prev.shape, 'data': _data(words), 'windows': [], 'elapsed': 1.0}}
+
+    calls = []
+
+    def fake_ocr_regions(img, boxes, lang="kor+eng", params=None):
+        calls.append(boxes)
+        return _data([_word("New", 16, boxes[-1][1] + 10, 1)])
+
+    monkeypatch.setattr(incremental_ocr, "ocr_regions", fake_ocr_regions)
+    results, info = incremental_results(prev, prev_results, cur, DEFAULT_PREPROCESS_STEPS[:1])
+
+    assert info['changed'] is True and info['scroll'] == dy
+    # 다시 읽은 띠는 새로 나타난 아래쪽(마지막 dy px 부근)만
+    assert info['bands'] and all(y1 >= HEIGHT - dy - 64 - 8 for y1, _ in info['bands'])
+    assert len(calls) == 1
+    data = results[0]['data']
+    tops = dict(zip(data['top'], data['text']))
+    assert tops[50] == "Mailbox"
+    assert tops[440 - dy] == "Item" and tops[710 - dy] == "Item"
+    assert "New" in data['text']
+    # 새로 읽은 단어의 블록 번호는 유지 단어와 겹치지 않음
+    assert data['block_num'][data['text'].index("New")] >= 1000
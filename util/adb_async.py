@@ -0,0 +1,261 @@
+import asyncio
+import datetime
+import os
+import struct
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from util.dynamic_data import load_data
+from util.frame import Frame, bump_input_generation, decode_png, decode_raw_screencap
+from util.input_batch import swipe_coordinates
+from util.adb_session import build_shell_command
+
+DEFAULT_ADB_HOST = "127.0.0.1"
+DEFAULT_ADB_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", "5037"))
+
+
+async def _close(writer: asyncio.StreamWriter):
+    """연결을 닫고 소켓이 완전히 닫힐 때까지 대기 (상대가 먼저 끊은 경우의 오류는 무시)"""
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (ConnectionError, OSError):
+        pass
+
+
+class AsyncAdbClient:
+    """
+    로컬 adb 서버(TCP 5037)와 smart socket 프로토콜로 직접 통신하는 asyncio 클라이언트
+    adb 프로세스를 띄우지 않으므로 여러 디바이스의 캡처/입력/로그 읽기를 동시에 진행할 수 있다.
+    """
+
+    def __init__(self, host: str = DEFAULT_ADB_HOST, port: int = DEFAULT_ADB_PORT):
+        self.host = host
+        self.port = port
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_connection(self.host, self.port)
+
+    @staticmethod
+    async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, service: str):
+        payload = service.encode("utf-8")
+        writer.write(b"%04x" % len(payload) + payload)
+        await writer.drain()
+        status = await reader.readexactly(4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            length = int(await reader.readexactly(4), 16)
+            message = (await reader.readexactly(length)).decode("utf-8", errors="replace")
+            raise Exception(f"adb 서버 요청 실패 ({service}): {message}")
+        raise Exception(f"adb 서버 응답을 해석할 수 없습니다 ({service}): {status!r}")
+
+    async def host_command(self, service: str) -> str:
+        """
+        host:* 서비스 요청 후 길이 접두어가 붙은 응답 문자열 반환 (예: host:devices, host:version)
+        """
+        reader, writer = await self._connect()
+        try:
+            await self._request(reader, writer, service)
+            length = int(await reader.readexactly(4), 16)
+            return (await reader.readexactly(length)).decode("utf-8", errors="replace")
+        finally:
+            await _close(writer)
+
+    async def devices(self) -> List[Dict[str, str]]:
+        """연결된 디바이스 목록 [{'serial': ..., 'status': ...}]"""
+        text = await self.host_command("host:devices")
+        devices = []
+        for line in text.splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                devices.append({'serial': parts[0], 'status': parts[1]})
+        return devices
+
+    async def open_service(
+        self,
+        service: str,
+        serial: Optional[str] = None,
+    ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """
+        디바이스로 transport를 연결한 뒤 서비스(shell:, exec:, sync: 등)를 열어 스트림 반환
+        :param service: 디바이스 서비스 이름
+        :param serial: 디바이스 시리얼 (None이면 dynamic_data의 device_info, 그것도 없으면 아무 디바이스)
+        """
+        if serial is None:
+            serial = load_data('device_info')
+        reader, writer = await self._connect()
+        try:
+            await self._request(reader, writer, f"host:transport:{serial}" if serial else "host:transport-any")
+            await self._request(reader, writer, service)
+        except Exception:
+            await _close(writer)
+            raise
+        return reader, writer
+
+    async def exec_out(self, command, serial: Optional[str] = None) -> bytes:
+        """exec: 서비스로 명령을 실행하고 가공되지 않은 stdout 바이트 반환"""
+        reader, writer = await self.open_service(f"exec:{build_shell_command(command)}", serial)
+        try:
+            return await reader.read()
+        finally:
+            await _close(writer)
+
+    async def shell(self, command, serial: Optional[str] = None) -> Tuple[int, str]:
+        """
+        shell: 서비스로 명령 실행
+        :return: (returncode, 출력 문자열)
+        """
+        marker = f"__ADB_END_{uuid.uuid4().hex}__"
+        service = f"shell:{build_shell_command(command)}; echo \"{marker}$?\""
+        reader, writer = await self.open_service(service, serial)
+        try:
+            output = (await reader.read()).decode("utf-8", errors="replace").replace("\r", "")
+        finally:
+            await _close(writer)
+        idx = output.rfind(marker)
+        if idx < 0:
+            return -1, output
+        rc_text = output[idx + len(marker):].strip()
+        returncode = int(rc_text) if rc_text.lstrip("-").isdigit() else -1
+        return returncode, output[:idx]
+
+    async def pull(self, remote_path: str, serial: Optional[str] = None) -> bytes:
+        """sync: 서비스(RECV)로 디바이스 파일 내용을 메모리로 가져오기"""
+        reader, writer = await self.open_service("sync:", serial)
+        try:
+            path = remote_path.encode("utf-8")
+            writer.write(b"RECV" + struct.pack("<I", len(path)) + path)
+            await writer.drain()
+            chunks = []
+            while True:
+                header = await reader.readexactly(8)
+                kind, length = header[:4], struct.unpack("<I", header[4:])[0]
+                if kind == b"DATA":
+                    chunks.append(await reader.readexactly(length))
+                elif kind == b"DONE":
+                    break
+                elif kind == b"FAIL":
+                    message = (await reader.readexactly(length)).decode("utf-8", errors="replace")
+                    raise Exception(f"adb pull 실패 ({remote_path}): {message}")
+                else:
+                    raise Exception(f"알 수 없는 sync 응답: {kind!r}")
+            writer.write(b"QUIT" + struct.pack("<I", 0))
+            await writer.drain()
+            return b"".join(chunks)
+        finally:
+            await _close(writer)
+
+
+_default_client: Optional[AsyncAdbClient] = None
+
+
+def get_async_client() -> AsyncAdbClient:
+    """기본 AsyncAdbClient (ANDROID_ADB_SERVER_PORT 또는 5037)"""
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncAdbClient()
+    return _default_client
+
+
+async def capture_screen_async(
+    path: Optional[str] = None,
+    serial: Optional[str] = None,
+    raw: bool = False,
+    client: Optional[AsyncAdbClient] = None,
+) -> Frame:
+    """
+    capture_screen의 async 버전: exec:screencap 결과를 Frame으로 반환
+    :param path: 지정하면 파일로도 저장
+    :param serial: 디바이스 시리얼
+    :param raw: True면 PNG 대신 raw framebuffer (screencap, -p 없음)
+    :param client: 사용할 AsyncAdbClient
+    """
+    client = client or get_async_client()
+    if serial is None:
+        serial = load_data('device_info')
+    data = await client.exec_out("screencap" if raw else "screencap -p", serial)
+    image = decode_raw_screencap(data) if raw else decode_png(data)
+    frame = Frame(image, serial=serial, source="async-raw" if raw else "async-exec-out")
+    if path:
+        frame.save(path)
+    return frame
+
+
+async def tap_on_device_async(x, y, serial: Optional[str] = None, client: Optional[AsyncAdbClient] = None):
+    """tap_on_device의 async 버전"""
+    client = client or get_async_client()
+    await client.shell(["input", "tap", x, y], serial)
+    bump_input_generation()
+    print(f"[✔] ADB 클릭 수행: ({x}, {y})")
+
+
+async def swipe_direction_async(
+    direction: str,
+    x: int = 540,
+    y_center: int = 1000,
+    distance: int = 600,
+    duration: int = 800,
+    serial: Optional[str] = None,
+    client: Optional[AsyncAdbClient] = None,
+):
+    """swipe_direction의 async 버전"""
+    client = client or get_async_client()
+    x1, y1, x2, y2 = swipe_coordinates(direction, x, y_center, distance)
+    await client.shell(["input", "swipe", x1, y1, x2, y2, duration], serial)
+    bump_input_generation()
+
+
+class AsyncScreenRecord:
+    """start_screen_record_async가 반환하는 녹화 핸들"""
+
+    def __init__(self, client: AsyncAdbClient, serial: Optional[str], writer: asyncio.StreamWriter,
+                 reader: asyncio.StreamReader, record_filename: str, device_path: str):
+        self.client = client
+        self.serial = serial
+        self.record_filename = record_filename
+        self.device_path = device_path
+        self._reader = reader
+        self._writer = writer
+
+    async def stop_and_pull(self, local_dir: Optional[str] = None) -> str:
+        """
+        녹화를 종료하고 sync 서비스로 영상을 가져와 저장
+        :param local_dir: 저장할 폴더 (None이면 디바이스별 산출물 폴더, 없으면 현재 폴더)
+        :return: 로컬에 저장된 영상 파일 경로
+        """
+        # shell 연결을 닫으면 디바이스의 screenrecord가 종료되고 mp4가 마무리된다
+        await _close(self._writer)
+        await asyncio.sleep(1)
+        data = await self.client.pull(self.device_path, self.serial)
+        if local_dir is None:
+            local_dir = load_data('artifact_dir') or "."
+        local_path = os.path.join(local_dir, self.record_filename)
+        with open(local_path, "wb") as f:
+            f.write(data)
+        return local_path
+
+
+async def start_screen_record_async(
+    filename_prefix: str = "record",
+    device_serial: Optional[str] = None,
+    bit_rate: int = 8000000,
+    size: Optional[str] = None,
+    client: Optional[AsyncAdbClient] = None,
+) -> AsyncScreenRecord:
+    """
+    start_screen_record의 async 버전: shell 서비스 연결 하나로 screenrecord를 실행
+    :return: AsyncScreenRecord (stop_and_pull()로 종료 및 가져오기)
+    """
+    client = client or get_async_client()
+    if device_serial is None:
+        device_serial = load_data('device_info')
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    record_filename = f"{filename_prefix}_{timestamp}.mp4"
+    device_path = f"/sdcard/{record_filename}"
+    command = ["screenrecord", f"--bit-rate={bit_rate}"]
+    if size:
+        command += [f"--size={size}"]
+    command += [device_path]
+    reader, writer = await client.open_service(f"shell:{build_shell_command(command)}", device_serial)
+    return AsyncScreenRecord(client, device_serial, writer, reader, record_filename, device_path)
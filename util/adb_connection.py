@@ -0,0 +1,137 @@
+import atexit
+import subprocess
+import threading
+import time
+from typing import Dict, Optional
+
+from util.dynamic_data import load_data
+
+# 마지막으로 연결이 확인된 시각 (시리얼별)
+_healthy_at: Dict[Optional[str], float] = {}
+# adb track-devices로 받은 최신 디바이스 상태 {serial: state}
+_device_states: Dict[str, str] = {}
+_lock = threading.Lock()
+_watcher: Optional[threading.Thread] = None
+_watcher_proc: Optional[subprocess.Popen] = None
+_watcher_stop = threading.Event()
+
+
+def _parse_device_list(text: str) -> Dict[str, str]:
+    states = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 2:
+            states[parts[0]] = parts[1]
+    return states
+
+
+def _on_device_list(states: Dict[str, str]):
+    with _lock:
+        lost = [serial for serial, state in _device_states.items() if states.get(serial) != "device" and state == "device"]
+        _device_states.clear()
+        _device_states.update(states)
+        for serial in lost:
+            print(f"[WARN] ADB 디바이스 연결 끊김 감지: {serial}")
+            _healthy_at.pop(serial, None)
+            _healthy_at.pop(None, None)
+
+
+def _watch_loop(adb_path: str):
+    global _watcher_proc
+    while not _watcher_stop.is_set():
+        with _lock:
+            if _watcher_stop.is_set():
+                break
+            _watcher_proc = subprocess.Popen([adb_path, "track-devices"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            stream = _watcher_proc.stdout
+        while True:
+            # 각 메시지는 4자리 hex 길이 + 디바이스 목록
+            header = stream.read(4)
+            if len(header) < 4:
+                break
+            try:
+                length = int(header, 16)
+            except ValueError:
+                # 길이 접두어 없이 출력하는 adb 버전: 줄 단위로 처리
+                line = header + stream.readline()
+                _on_device_list(_parse_device_list(line.decode("utf-8", errors="replace")))
+                continue
+            payload = stream.read(length) if length else b""
+            _on_device_list(_parse_device_list(payload.decode("utf-8", errors="replace")))
+        # adb 서버 재시작 등으로 스트림이 끊기면 모든 상태를 무효화하고 다시 연결
+        with _lock:
+            _device_states.clear()
+            _healthy_at.clear()
+        _watcher_stop.wait(1)
+
+
+def start_device_watcher(adb_path: str = "adb"):
+    """`adb track-devices`로 디바이스 연결/해제를 감시하는 백그라운드 스레드 시작"""
+    global _watcher
+    if _watcher is not None and _watcher.is_alive():
+        return
+    _watcher_stop.clear()
+    _watcher = threading.Thread(target=_watch_loop, args=(adb_path,), name="adb-track-devices", daemon=True)
+    _watcher.start()
+
+
+def stop_device_watcher():
+    """디바이스 감시 스레드와 `adb track-devices` 프로세스 종료"""
+    global _watcher, _watcher_proc
+    _watcher_stop.set()
+    with _lock:
+        proc, _watcher_proc = _watcher_proc, None
+    if proc is not None and proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    if _watcher is not None:
+        _watcher.join(timeout=2)
+    _watcher = None
+
+
+atexit.register(stop_device_watcher)
+
+
+def invalidate_connection(serial: Optional[str] = None):
+    """연결 상태 캐시 무효화 (serial이 None이면 전체)"""
+    with _lock:
+        if serial is None:
+            _healthy_at.clear()
+        else:
+            _healthy_at.pop(serial, None)
+
+
+def get_connection_status(serial: Optional[str] = None) -> Optional[str]:
+    """track-devices로 받은 디바이스 상태 반환 (device, offline 등, 모르면 None)"""
+    if serial is None:
+        serial = load_data('device_info')
+    return _device_states.get(serial)
+
+
+def ensure_connected(port: int = 6520, ttl: Optional[float] = None) -> bool:
+    """
+    TTL 동안 캐시된 연결 상태를 사용하고, 만료되었거나 연결 끊김이 감지된 경우에만 ensure_adb_connection 실행
+    :param port: 에뮬레이터 포트 (기본 6520)
+    :param ttl: 연결 상태를 신뢰할 시간(초) (None이면 dynamic_data의 adb_health_ttl)
+    :return: 연결 성공 여부
+    """
+    from util.adb_util import ensure_adb_connection
+    serial = load_data('device_info')
+    if ttl is None:
+        ttl = load_data('adb_health_ttl') or 0
+    start_device_watcher()
+
+    with _lock:
+        checked_at = _healthy_at.get(serial)
+        state = _device_states.get(serial) if serial else None
+    if checked_at is not None and time.time() - checked_at < ttl and state in (None, "device"):
+        return True
+
+    if ensure_adb_connection(port):
+        with _lock:
+            _healthy_at[serial] = time.time()
+        return True
+    return False
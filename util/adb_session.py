@@ -0,0 +1,215 @@
+import atexit
+import queue
+import shlex
+import subprocess
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
+
+from util.dynamic_data import load_data
+
+# 디바이스 시리얼별로 유지되는 adb shell 세션 풀
+_sessions: Dict[Optional[str], "AdbShellSession"] = {}
+_sessions_lock = threading.Lock()
+
+
+class CommandNotSentError(ConnectionError):
+    """명령을 디바이스로 보내기 전에 실패 (다시 보내도 두 번 실행되지 않음)"""
+
+
+def build_shell_command(command: Union[str, List]) -> str:
+    """
+    리스트 형태의 명령을 디바이스 셸에서 실행할 문자열로 변환
+    :param command: 문자열 명령 또는 인자 리스트
+    :return: 셸 명령 문자열
+    """
+    if isinstance(command, str):
+        return command
+    return " ".join(shlex.quote(str(arg)) for arg in command)
+
+
+class AdbShellSession:
+    """
+    디바이스 하나에 대해 계속 열어두는 `adb shell` 세션
+    명령마다 adb 프로세스를 새로 띄우지 않고, 열린 셸의 stdin으로 명령을 보내고
+    종료 마커가 나올 때까지 stdout을 읽어 (returncode, output)을 돌려준다.
+    """
+
+    def __init__(self, serial: Optional[str] = None, adb_path: str = "adb"):
+        self.serial = serial
+        self.adb_path = adb_path
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _adb_base(self) -> List[str]:
+        cmd = [self.adb_path]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        return cmd
+
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self):
+        """adb shell 프로세스를 띄우고 stdout 리더 스레드를 시작"""
+        self.close()
+        self._lines = queue.Queue()
+        self._proc = subprocess.Popen(
+            self._adb_base() + ["shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+        )
+        reader = threading.Thread(
+            target=self._read_loop,
+            args=(self._proc, self._lines),
+            name=f"adb-shell-{self.serial or 'default'}",
+            daemon=True,
+        )
+        reader.start()
+        print(f"[DEBUG] adb shell 세션 시작: {self.serial or 'default'} (PID: {self._proc.pid})")
+
+    @staticmethod
+    def _read_loop(proc: subprocess.Popen, lines: "queue.Queue[Optional[bytes]]"):
+        for line in iter(proc.stdout.readline, b""):
+            lines.put(line)
+        # EOF: 세션이 끊어졌음을 알림
+        lines.put(None)
+
+    def close(self):
+        """세션 종료"""
+        proc = self._proc
+        self._proc = None
+        if proc is None:
+            return
+        try:
+            if proc.poll() is None:
+                proc.stdin.write(b"exit\n")
+                proc.stdin.flush()
+                proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+    def run(self, command: Union[str, List], timeout: float = 10.0) -> Tuple[int, str]:
+        """
+        세션에서 명령 하나를 실행
+        :param command: 실행할 셸 명령 (문자열 또는 인자 리스트)
+        :param timeout: 종료 마커를 기다릴 최대 시간(초)
+        :return: (returncode, stdout+stderr 출력)
+        :raises CommandNotSentError: 명령을 보내기 전에 실패
+        :raises TimeoutError, ConnectionError: 명령을 보낸 뒤 실패 (디바이스에서 이미 실행되었을 수 있음)
+        """
+        shell_command = build_shell_command(command)
+        marker = f"__ADB_END_{uuid.uuid4().hex}__"
+        with self._lock:
+            payload = f"{shell_command}\necho \"{marker}$?\"\n".encode("utf-8")
+            try:
+                if not self.is_alive():
+                    self.start()
+                self._proc.stdin.write(payload)
+                self._proc.stdin.flush()
+            except OSError as e:
+                self.close()
+                raise CommandNotSentError(f"adb shell 세션에 명령을 보내지 못했습니다: {e}")
+
+            output = []
+            while True:
+                try:
+                    raw = self._lines.get(timeout=timeout)
+                except queue.Empty:
+                    self.close()
+                    raise TimeoutError(f"adb shell 응답 대기 시간 초과: {shell_command}")
+                if raw is None:
+                    self.close()
+                    raise ConnectionError("adb shell 세션이 끊어졌습니다.")
+                line = raw.decode("utf-8", errors="replace").replace("\r", "")
+                idx = line.find(marker)
+                if idx < 0:
+                    output.append(line)
+                    continue
+                output.append(line[:idx])
+                rc_text = line[idx + len(marker):].strip()
+                returncode = int(rc_text) if rc_text.lstrip("-").isdigit() else -1
+                return returncode, "".join(output)
+
+
+def get_session(serial: Optional[str] = None, adb_path: str = "adb") -> AdbShellSession:
+    """
+    시리얼에 해당하는 세션을 풀에서 가져오거나 새로 생성
+    :param serial: 디바이스 시리얼 (None이면 기본 디바이스)
+    :param adb_path: adb 실행 파일 경로
+    :return: AdbShellSession
+    """
+    with _sessions_lock:
+        session = _sessions.get(serial)
+        if session is None:
+            session = AdbShellSession(serial, adb_path)
+            _sessions[serial] = session
+        return session
+
+
+def close_all_sessions():
+    """풀에 있는 모든 세션 종료"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_all_sessions)
+
+
+def _run_one_shot(
+    shell_command: str,
+    serial: Optional[str],
+    adb_path: str,
+    timeout: float,
+) -> Tuple[int, str]:
+    cmd = [adb_path]
+    if serial:
+        cmd += ["-s", serial]
+    cmd += ["shell", shell_command]
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace", timeout=timeout)
+    return result.returncode, (result.stdout or "") + (result.stderr or "")
+
+
+def run_shell(
+    command: Union[str, List],
+    serial: Optional[str] = None,
+    adb_path: str = "adb",
+    timeout: float = 10.0,
+    idempotent: bool = False,
+) -> Tuple[int, str]:
+    """
+    디바이스 셸 명령 실행 (세션 풀 사용, 실패 시 재연결 후 one-shot adb로 대체)
+    명령을 보낸 뒤의 실패(응답 시간 초과, 세션 끊김)는 디바이스에서 이미 실행되었을 수 있으므로
+    idempotent가 아니면 다시 보내지 않고 실패(returncode -1)를 돌려준다.
+    :param command: 실행할 셸 명령 (문자열 또는 인자 리스트)
+    :param serial: 디바이스 시리얼 (None이면 dynamic_data의 device_info)
+    :param adb_path: adb 실행 파일 경로
+    :param timeout: 명령 응답 대기 시간(초)
+    :param idempotent: 여러 번 실행되어도 되는 명령(조회 등)이면 True
+    :return: (returncode, 출력 문자열)
+    """
+    if serial is None:
+        serial = load_data('device_info')
+    shell_command = build_shell_command(command)
+
+    if load_data('adb_session_enabled') is not False:
+        session = get_session(serial, adb_path)
+        for attempt in range(2):
+            try:
+                return session.run(shell_command, timeout=timeout)
+            except CommandNotSentError as e:
+                print(f"[WARN] adb shell 세션 오류 ({attempt + 1}/2): {e}")
+            except (ConnectionError, TimeoutError, OSError) as e:
+                if not idempotent:
+                    print(f"[WARN] 명령을 보낸 뒤 adb shell 세션 오류. 중복 실행을 막기 위해 다시 보내지 않습니다: {e}")
+                    return -1, str(e)
+                print(f"[WARN] adb shell 세션 오류 ({attempt + 1}/2): {e}")
+        print("[WARN] adb shell 세션 재연결 실패. one-shot adb 명령으로 대체합니다.")
+
+    return _run_one_shot(shell_command, serial, adb_path, timeout)
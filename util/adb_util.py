@@ -1,54 +1,126 @@
 import os
 import subprocess
+import tempfile
 import time
-from PIL import Image
+from typing import Optional
 from util.dynamic_data import load_data, save_data
+from util.frame import (
+    Frame, decode_png, decode_raw_screencap,
+    bump_input_generation, get_input_generation, get_last_input_time, cache_frame, get_cached_frame,
+)
+from util.frame_stream import get_frame_stream
+from util.adb_session import run_shell
 
-def capture_screen(
-    path: str = "screen.png",
+# 캡처 방식
+# - auto: 모바일 기기는 pull, 에뮬레이터는 exec-out
+# - exec-out: exec-out screencap -p (PNG)
+# - pull: 기기에 PNG 저장 후 adb pull
+# - raw: exec-out screencap (압축 없는 RGBA 헤더 + 픽셀)
+CAPTURE_MODES = ("auto", "exec-out", "pull", "raw")
+
+def capture_frame(
     adb_path: str = "adb",
-) -> bool:
+    save_path: Optional[str] = None,
+    mode: Optional[str] = None,
+    max_age: Optional[float] = None,
+) -> Frame:
     """
-    에뮬레이터 또는 모바일 기기 화면을 캡처하여 저장
-    :param path: 저장할 파일 경로
+    에뮬레이터 또는 모바일 기기 화면을 캡처하여 메모리에 디코딩된 Frame으로 반환
     :param adb_path: adb 실행 파일 경로 또는 명령어
-    :return: 성공 여부(bool)
+    :param save_path: 리포트 등에 쓸 스크린샷 파일 경로 (지정한 경우에만 디스크에 저장)
+    :param mode: 캡처 방식 (CAPTURE_MODES, None이면 dynamic_data의 capture_mode)
+    :param max_age: 입력 이후 새로 캡처하지 않고 재사용할 프레임의 최대 나이(초)
+                    (None이면 dynamic_data의 frame_cache_max_age, 0이면 항상 새로 캡처)
+    :return: Frame (RGB numpy 배열 + 캡처 메타데이터)
     """
-    from util.adb_util import ensure_adb_connection
-    if not ensure_adb_connection():
+    # 백그라운드 스트림이 켜져 있으면 마지막 입력 이후의 최신 프레임을 바로 사용
+    # (기다리는 동안 입력 이후 프레임이 오지 않으면 아래 캐시/screencap 경로로 캡처)
+    streamer = get_frame_stream(load_data('device_info'))
+    if streamer is not None:
+        frame = streamer.latest(newer_than=get_last_input_time(), timeout=load_data('frame_stream_wait') or 0)
+        if frame is not None:
+            print(f"[DEBUG] 스트림 최신 프레임 사용 (나이 {frame.age:.2f}초)")
+            if save_path:
+                frame.save(save_path)
+            return frame
+
+    if max_age is None:
+        max_age = load_data('frame_cache_max_age') or 0
+    cached = get_cached_frame(load_data('device_info'), max_age)
+    if cached is not None:
+        print(f"[DEBUG] 입력 이후 변화 없음. 캐시된 프레임 재사용 (나이 {cached.age:.2f}초)")
+        if save_path:
+            cached.save(save_path)
+        return cached
+
+    from util.adb_connection import ensure_connected
+    if not ensure_connected():
         print("[ERROR] ADB 디바이스 연결 실패. 스크린샷 캡처를 건너뜁니다.")
         raise Exception("ADB 연결에 실패했습니다.")
 
-    if os.path.exists(path):
-        os.remove(path)
-
     device_type = load_data('device_type')
     device_info = load_data('device_info')
+    if mode is None:
+        mode = load_data('capture_mode') or "auto"
+    if mode == "auto":
+        mode = "pull" if device_type == "device" and device_info else "exec-out"
+    if mode not in CAPTURE_MODES:
+        raise ValueError(f"capture mode must be one of: {', '.join(CAPTURE_MODES)}")
 
+    generation = get_input_generation()
     adb_base = [adb_path]
     if device_type == "device" and device_info:
         adb_base += ["-s", device_info]
+    if mode == "pull":
         temp_remote_path = "/sdcard/__temp_screen__.png"
         print("[INFO] 모바일 기기 감지됨. 안전한 screencap 방식으로 처리합니다.")
         subprocess.run(adb_base + ["shell", "screencap", "-p", temp_remote_path])
-        subprocess.run(adb_base + ["pull", temp_remote_path, path])
+        fd, temp_local_path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        try:
+            subprocess.run(adb_base + ["pull", temp_remote_path, temp_local_path])
+            with open(temp_local_path, "rb") as f:
+                data = f.read()
+        finally:
+            os.remove(temp_local_path)
         subprocess.run(adb_base + ["shell", "rm", temp_remote_path])
+        image = decode_png(data)
+    elif mode == "raw":
+        print("[INFO] raw framebuffer 방식으로 처리합니다. (PNG 인코딩/디코딩 생략)")
+        proc = subprocess.run(adb_base + ["exec-out", "screencap"], stdout=subprocess.PIPE)
+        print(f"[DEBUG] adb 실행 결과: {proc.returncode}")
+        image = decode_raw_screencap(proc.stdout)
     else:
         print("[INFO] 에뮬레이터 감지됨. exec-out 방식으로 처리합니다.")
         adb_cmd = adb_base + ["exec-out", "screencap", "-p"]
-        with open(path, "wb") as f:
-            proc = subprocess.run(adb_cmd, stdout=f)
+        proc = subprocess.run(adb_cmd, stdout=subprocess.PIPE)
         print(f"[DEBUG] adb 실행 결과: {proc.returncode}")
+        image = decode_png(proc.stdout)
 
-    try:
-        with Image.open(path) as img:
-            img.verify()
-        return True
-    except Exception:
-        raise Exception("스크린샷이 저장되었지만 손상되었거나 열 수 없습니다.")
+    frame = Frame(image, serial=device_info, source=mode, generation=generation)
+    cache_frame(frame)
+    if save_path:
+        frame.save(save_path)
+    return frame
+
+def capture_screen(
+    path: str = "screen.png",
+    adb_path: str = "adb",
+) -> bool:
+    """
+    에뮬레이터 또는 모바일 기기 화면을 캡처하여 저장
+    :param path: 저장할 파일 경로
+    :param adb_path: adb 실행 파일 경로 또는 명령어
+    :return: 성공 여부(bool)
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    capture_frame(adb_path, save_path=path)
+    return True
 
 def tap_on_device(x, y):
-    subprocess.run(f"adb shell input tap {x} {y}", shell=True)
+    run_shell(["input", "tap", x, y])
+    bump_input_generation()
     print(f"[✔] ADB 클릭 수행: ({x}, {y})")
 
 def ensure_adb_connection(port: int = 6520):
@@ -0,0 +1,89 @@
+import time
+from typing import Dict, Optional, Tuple
+
+from util.adb_session import run_shell
+from util.dynamic_data import load_data
+from util.frame import get_input_generation
+
+APP_FOREGROUND = "foreground"
+APP_BACKGROUND = "background"
+APP_STOPPED = "stopped"
+
+_PID_MARKER = "__APP_STATE_PID__"
+
+# (serial, package) → (상태, 입력 세대 번호, 확인 시각)
+_state_cache: Dict[Tuple[Optional[str], str], Tuple[str, int, float]] = {}
+_metrics = {
+    'count': 0,
+    'cache_hits': 0,
+    'total_time': 0.0,
+    'last_time': 0.0,
+    'max_time': 0.0,
+}
+
+
+def _parse_probe_output(package: str, output: str) -> str:
+    focus_part, _, pid_part = output.partition(_PID_MARKER)
+    # mCurrentFocus=Window{... u0 com.pkg/com.pkg.Activity}, mFocusedApp=ActivityRecord{... com.pkg/...}
+    for line in focus_part.splitlines():
+        if f"{package}/" in line:
+            return APP_FOREGROUND
+    if pid_part.strip():
+        return APP_BACKGROUND
+    return APP_STOPPED
+
+
+def probe_app_state(package: str, use_cache: bool = True, serial: Optional[str] = None) -> str:
+    """
+    포커스된 윈도우/액티비티와 패키지 PID만 조회하여 앱 상태 확인 (셸 호출 1회)
+    결과는 입력이 없고 app_probe_ttl초 안이면 캐시를 사용
+    :param package: 앱 패키지명
+    :param use_cache: 캐시 사용 여부
+    :param serial: 디바이스 시리얼 (None이면 dynamic_data의 device_info)
+    :return: APP_FOREGROUND / APP_BACKGROUND / APP_STOPPED
+    """
+    if serial is None:
+        serial = load_data('device_info')
+    key = (serial, package)
+    ttl = load_data('app_probe_ttl') or 0
+    cached = _state_cache.get(key)
+    if use_cache and cached is not None:
+        state, generation, checked_at = cached
+        if generation == get_input_generation() and time.time() - checked_at < ttl:
+            _metrics['cache_hits'] += 1
+            print(f"[DEBUG] 앱 상태 캐시 사용: {package} → {state}")
+            return state
+
+    start = time.perf_counter()
+    # grep은 디바이스에서 실행되므로 전체 덤프 대신 포커스 줄만 전송된다
+    script = (
+        "dumpsys window | grep -E 'mCurrentFocus|mFocusedApp'; "
+        f"echo {_PID_MARKER}; pidof {package}"
+    )
+    _, output = run_shell(script, serial=serial, idempotent=True)
+    state = _parse_probe_output(package, output)
+    elapsed = time.perf_counter() - start
+
+    _metrics['count'] += 1
+    _metrics['total_time'] += elapsed
+    _metrics['last_time'] = elapsed
+    _metrics['max_time'] = max(_metrics['max_time'], elapsed)
+    _state_cache[key] = (state, get_input_generation(), time.time())
+    print(f"[DEBUG] 앱 상태 확인: {package} → {state} ({elapsed * 1000:.1f}ms)")
+    return state
+
+
+def invalidate_app_state(package: Optional[str] = None):
+    """앱 상태 캐시 무효화 (package가 None이면 전체)"""
+    if package is None:
+        _state_cache.clear()
+        return
+    for key in [k for k in _state_cache if k[1] == package]:
+        del _state_cache[key]
+
+
+def get_probe_metrics() -> Dict[str, float]:
+    """앱 상태 확인 시간 통계 (횟수, 캐시 적중, 총/마지막/최대/평균 시간(초))"""
+    metrics = dict(_metrics)
+    metrics['avg_time'] = metrics['total_time'] / metrics['count'] if metrics['count'] else 0.0
+    return metrics
@@ -2,11 +2,15 @@ import os
 import cv2
 import numpy as np
 import glob
-import time
 from PIL import Image, ImageDraw, ImageFont
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 
-from util.adb_util import tap_on_device, ensure_adb_connection, capture_screen
+from util.adb_util import tap_on_device, ensure_adb_connection, capture_frame
+from util.frame import Frame, to_rgb_array
+from util.device_pool import artifact_path
+from util.screen_wait import settle
+from util.device_geometry import get_image_transform
+from util.dynamic_data import load_data
 
 FONT_PATH = "./NotoSansKR-Bold.ttf"
 FONT_SIZE = 36
@@ -39,7 +43,7 @@ def imwrite_unicode(path: str, img_np: np.ndarray) -> None:
 def create_button_template(
     text: str,
     button_image_dir: str,
-    screen_path: str = "screen.png",
+    screen_path: Union[str, Frame] = "screen.png",
     font_path: str = "NotoSansKR-Bold.ttf",
     font_size: int = 36,
     padding: int = 10
@@ -48,7 +52,7 @@ def create_button_template(
     버튼 텍스트로 여러 스케일의 템플릿을 생성하고, 화면과 가장 유사한 템플릿을 반환
     :param text: 버튼 텍스트
     :param button_image_dir: 템플릿 저장 폴더
-    :param screen_path: 유사도 비교용 스크린샷 경로
+    :param screen_path: 유사도 비교용 스크린샷 경로 또는 Frame
     :param font_path: 폰트 경로
     :param font_size: 폰트 크기
     :param padding: 여백
@@ -76,6 +80,7 @@ def create_button_template(
     blurred = cv2.GaussianBlur(img_np, (5, 5), 0)
 
     name_text = text.replace(' ', '_')
+    screen = to_rgb_array(screen_path)
     best_similarity = 0
     best_template_path = None
     scales = [i/100 for i in range(50, 151, 5)]
@@ -86,7 +91,7 @@ def create_button_template(
         new_height = int(blurred.shape[0] * scale)
         resized = cv2.resize(blurred, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
         imwrite_unicode(temp_path, resized)
-        similarity = find_button_similarity(screen_path, temp_path)
+        similarity = find_button_similarity(screen, temp_path)
         print(f"  - 스케일 {scale:.2f}: 유사도 {similarity:.4f}")
         if similarity > best_similarity:
             best_similarity = similarity
@@ -120,15 +125,15 @@ def create_button_template(
         raise Exception("템플릿 생성에 실패했습니다.")
 
 # 템플릿 매칭 함수
-def find_button_position(screen_path: str, template_path: str) -> Optional[Tuple[int, int]]:
+def find_button_position(screen_path: Union[str, Frame, np.ndarray], template_path: str) -> Optional[Tuple[int, int]]:
     """
     화면에서 템플릿 이미지와 가장 유사한 위치의 중심 좌표 반환
-    :param screen_path: 스크린샷 이미지 경로
+    :param screen_path: 스크린샷 이미지 경로 또는 Frame / RGB numpy 배열
     :param template_path: 템플릿 이미지 경로
     :param match_threshold: 유사도 기준(0~1)
     :return: (x, y) 중심 좌표 또는 None
     """
-    screen = imread_unicode(screen_path)
+    screen = to_rgb_array(screen_path)
     template = imread_unicode(template_path)
     result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
     _, max_val, _, max_loc = cv2.minMaxLoc(result)
@@ -137,6 +142,9 @@ def find_button_position(screen_path: str, template_path: str) -> Optional[Tuple
         h, w = template.shape[:2]
         center_x = max_loc[0] + w // 2
         center_y = max_loc[1] + h // 2
+        # 캡처 해상도와 디바이스 해상도/회전이 다를 수 있으므로 OCR과 같은 좌표 변환 적용
+        transform = get_image_transform(screen.shape[1], screen.shape[0])
+        center_x, center_y = transform.to_device(center_x, center_y)
         print(f"✅ 버튼 위치: ({center_x}, {center_y})")
         return center_x, center_y
     else:
@@ -144,9 +152,9 @@ def find_button_position(screen_path: str, template_path: str) -> Optional[Tuple
         return None
 
 def find_button_similarity(screen_path, template_path):
-    """템플릿과 화면의 최대 유사도 반환"""
+    """템플릿과 화면의 최대 유사도 반환 (screen_path는 경로 또는 Frame / RGB numpy 배열)"""
     try:
-        screen = imread_unicode(screen_path)
+        screen = to_rgb_array(screen_path)
         template = imread_unicode(template_path)
         
         if screen is None or template is None:
@@ -160,15 +168,15 @@ def find_button_similarity(screen_path, template_path):
         return 0
 
 # 매칭된 영역 추출 함수
-def extract_matched_region(screen_path: str, template_path: str, save_path: str = "matched_crop.png") -> str:
+def extract_matched_region(screen_path: Union[str, Frame, np.ndarray], template_path: str, save_path: str = "matched_crop.png") -> str:
     """
     화면에서 템플릿과 매칭된 영역을 잘라 저장
-    :param screen_path: 스크린샷 이미지 경로
+    :param screen_path: 스크린샷 이미지 경로 또는 Frame / RGB numpy 배열
     :param template_path: 템플릿 이미지 경로
     :param save_path: 잘라 저장할 파일 경로
     :return: 저장된 파일 경로(str)
     """
-    screen = imread_unicode(screen_path)
+    screen = to_rgb_array(screen_path)
     template = imread_unicode(template_path)
     result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
     _, max_val, _, max_loc = cv2.minMaxLoc(result)
@@ -179,10 +187,23 @@ def extract_matched_region(screen_path: str, template_path: str, save_path: str
     print(f"[✔] 매칭된 영역을 '{save_path}'로 저장했습니다. (유사도: {max_val:.4f})")
     return save_path 
 
-def 버튼_찾기_클릭(text:str, 화면경로:str = "screen.png", delay:int = 1, must_exist: bool = True):
+def 버튼_찾기_클릭(text:str, 화면경로:Optional[str] = None, delay:Union[int, float, str] = 1, must_exist: bool = True, frame: Optional[Frame] = None):
+    """
+    템플릿 매칭으로 버튼을 찾아 클릭
+    :text: 버튼 텍스트
+    :화면경로: 캡처 화면을 파일로도 남길 경로 (None이면 메모리에서만 처리)
+    :delay: 버튼 클릭 후 대기(초), "stable"이면 화면이 안정될 때까지 대기
+    :must_exist: 버튼이 없을 때 Exception 발생 여부
+    :frame: 이미 캡처한 Frame (지정하면 새로 캡처하지 않음)
+    :return: 버튼 클릭 결과(bool)
+    """
+    if frame is None:
+        frame = capture_frame(save_path=화면경로)
+    elif 화면경로:
+        frame.save(화면경로)
     # 1. 파일명 처리 (공백→_ 및 유니코드 경로)
-    capture_screen(화면경로)
-    button_image_dir = "button_image"
+    # 디바이스 풀에서 실행 중이면 디바이스별 폴더에 템플릿을 따로 관리 (해상도별로 최적 스케일이 다름)
+    button_image_dir = artifact_path("button_image") if load_data('artifact_dir') else "button_image"
     os.makedirs(button_image_dir, exist_ok=True)
     name_text = text.replace(' ', '_')
     pattern = os.path.join(button_image_dir, f"{name_text}_*.png")
@@ -195,7 +216,7 @@ def 버튼_찾기_클릭(text:str, 화면경로:str = "screen.png", delay:int =
     if existing_images:
         print(f"📁 기존 이미지 {len(existing_images)}개 발견")
         for img_path in existing_images:
-            similarity = find_button_similarity(화면경로, img_path)
+            similarity = find_button_similarity(frame, img_path)
             if similarity > best_similarity:
                 best_similarity = similarity
                 best_template_path = img_path
@@ -205,10 +226,10 @@ def 버튼_찾기_클릭(text:str, 화면경로:str = "screen.png", delay:int =
     if best_similarity >= MATCH_THRESHOLD:
         print(f"✅ 최종 유사도: {best_similarity:.4f} (기준: {MATCH_THRESHOLD})")
         if best_template_path is not None:
-            coords = find_button_position(화면경로, best_template_path)
+            coords = find_button_position(frame, best_template_path)
             if coords:
                 tap_on_device(*coords)
-                time.sleep(delay)
+                settle(delay)
                 return True
         else:
             print("❌ 버튼 위치를 찾을 수 없음")
@@ -220,15 +241,15 @@ def 버튼_찾기_클릭(text:str, 화면경로:str = "screen.png", delay:int =
 
     # 4. 기존 이미지가 없거나 유사도 MATCH_THRESHOLD 미만이면 새 템플릿 생성
     print(f"⚠️ 기존 이미지가 없거나 유사도가 낮음 ({best_similarity:.4f}), 새 템플릿 생성")
-    best_template_path, best_similarity = create_button_template(text, button_image_dir, 화면경로)
+    best_template_path, best_similarity = create_button_template(text, button_image_dir, frame)
 
     # 5. 새 템플릿으로 MATCH_THRESHOLD 이상이면 클릭
     if best_similarity >= MATCH_THRESHOLD:
         print(f"✅ 새 템플릿 최종 유사도: {best_similarity:.4f} (기준: {MATCH_THRESHOLD})")
-        coords = find_button_position(화면경로, best_template_path)
+        coords = find_button_position(frame, best_template_path)
         if coords:
             tap_on_device(*coords)
-            time.sleep(delay)
+            settle(delay)
             return True
         else:
             print("❌ 버튼 위치를 찾을 수 없음")
@@ -1,6 +1,5 @@
 import os
 import subprocess
-import time
 import datetime
 import psutil
 from PIL import Image
@@ -24,7 +23,16 @@ save_data('env', ENV)
 BUILD = get_env_or_raise("build")
 save_data('build', BUILD)
 
-from util.adb_util import tap_on_device, ensure_adb_connection, capture_screen
+from util.adb_util import tap_on_device, ensure_adb_connection, capture_screen, capture_frame
+from util.adb_session import run_shell
+from util.adb_connection import ensure_connected
+from util.input_batch import InputBatch, key_command, swipe_coordinates
+from util.screen_wait import settle, wait_for_change, wait_for_transition
+from util.screen_record import StreamingScreenRecorder
+from util.device_geometry import refresh_device_geometry
+from util.emulator_boot import wait_for_device_ready
+from util.app_state import APP_BACKGROUND, APP_FOREGROUND, probe_app_state, invalidate_app_state
+from util.frame import bump_input_generation
 from util.button_util import 버튼_찾기_클릭
 # 텍스트_찾기_클릭, 텍스트_찾기, print_all_ocr_text를 사용하는 함수 내부에서만 import하도록 변경
 from util.dynamic_data import save_data, load_data
@@ -108,116 +116,55 @@ def start_emulator():
         raise Exception("Google Play 게임즈 개발자 에뮬레이터 실행에 실패했습니다.")
 
 # 4. 에뮬레이터 실행 대기
-def wait_for_emulator_startup(timeout_seconds: int = 60):
+def wait_for_emulator_startup(timeout_seconds: int = 120, port: int = 6520):
     """
-    에뮬레이터가 실행될 때까지 대기
+    에뮬레이터가 실제로 사용 가능할 때까지 대기
+    프로세스 → adb 연결 → sys.boot_completed → 패키지 매니저 → 런처 순서로 확인한다.
     :param timeout_seconds: 최대 대기 시간(초)
-    :return: 실행 성공 여부
+    :param port: 에뮬레이터 포트 (기본 6520)
+    :return: 단계별 소요 시간(초)
     """
     print("[DEBUG] 함수 이름: wait_for_emulator_startup")
-    print("[DEBUG] 에뮬레이터가 실행되는 것을 대기합니다. 최대 60초")
-    start_time = time.time()
-    while time.time() - start_time < timeout_seconds:
-        if is_emulator_running():
-            print("[INFO] Google Play 게임즈 개발자 에뮬레이터가 실행되었습니다.")
-            time.sleep(10)
-            return
-        time.sleep(2)  # 2초마다 확인
-    raise Exception(f"에뮬레이터가 {timeout_seconds}초 동안 실행되지 않았습니다.")
+    print(f"[DEBUG] 에뮬레이터가 준비되는 것을 대기합니다. 최대 {timeout_seconds}초")
+    timings = wait_for_device_ready(timeout_seconds, port=port, process_check=is_emulator_running)
+    print("[INFO] Google Play 게임즈 개발자 에뮬레이터가 준비되었습니다.")
+    return timings
 
 # 5. 앱 실행 여부 확인
 def check_app_running() -> bool:
     """
     앱이 현재 실행 중이거나 백그라운드에 존재하는지 확인
     앱이 백그라운드에서 실행 중이면 강제 종료하고 False를 반환
-    (모바일 디바이스에서는 pidof 사용, 에뮬레이터는 기존 로직 유지)
+    (포커스 윈도우 + pidof만 조회하는 probe_app_state 사용, 결과는 세션 동안 캐시)
     :param app_package: 앱 패키지명 (예: com.Krafton.gpp.sdk.ue.sample)
     :return: 실행 여부 (True: 포그라운드 실행 중, False: 완전히 종료됨)
     """
     print("[DEBUG] 함수 이름: check_app_running")
     print(f"[DEBUG] {app_package}가 실행 중인지 확인합니다.")
 
-    device_type = load_data('device_type')
-    device_info = load_data('device_info')
-    adb_base = ["adb"]
-    if device_type == "device" and device_info:
-        adb_base += ["-s", device_info]
+    try:
+        state = probe_app_state(app_package)
+    except Exception as e:
+        print(f"[ERROR] 앱 상태 확인 실패: {e}")
+        return False
 
-        # ✅ 모바일 기기: dumpsys + pidof 조합으로 포그라운드 + 백그라운드 확인
-        try:
-            result = subprocess.run(
-                adb_base + ["shell", "dumpsys", "activity", "activities"],
-                capture_output=True, text=True
-            )
-            if "topResumedActivity" in result.stdout or "mResumedActivity" in result.stdout:
-                resumed_lines = [
-                    line for line in result.stdout.splitlines()
-                    if "topResumedActivity" in line or "mResumedActivity" in line
-                ]
-                for line in resumed_lines:
-                    if app_package in line:
-                        print(f"[DEBUG] 현재 포커스 앱이 {app_package}입니다.")
-                        return True
-        except Exception as e:
-            print(f"[ERROR] dumpsys 실행 실패: {e}")
+    if state == APP_FOREGROUND:
+        print(f"[DEBUG] 현재 포커스 앱이 {app_package}입니다.")
+        return True
 
-        try:
-            pidof_result = subprocess.run(
-                adb_base + ["shell", "pidof", app_package],
-                capture_output=True, text=True
-            )
-            if pidof_result.returncode == 0 and pidof_result.stdout.strip():
-                print(f"[DEBUG] {app_package} 프로세스가 백그라운드에 존재합니다. 강제 종료합니다.")
-                # 앱 강제 종료
-                force_stop_result = subprocess.run(
-                    adb_base + ["shell", "am", "force-stop", app_package],
-                    capture_output=True, text=True
-                )
-                if force_stop_result.returncode == 0:
-                    print(f"[DEBUG] {app_package} 강제 종료 완료.")
-                else:
-                    print(f"[ERROR] {app_package} 강제 종료 실패: {force_stop_result.stderr}")
-                return False
-        except Exception as e:
-            print(f"[ERROR] pidof 실행 실패: {e}")
-
-        print(f"[DEBUG] {app_package}가 실행 중이지 않습니다.")
+    if state == APP_BACKGROUND:
+        print(f"[DEBUG] {app_package} 프로세스가 백그라운드에 존재합니다. 강제 종료합니다.")
+        # 앱 강제 종료
+        returncode, output = run_shell(["am", "force-stop", app_package], idempotent=True)
+        invalidate_app_state(app_package)
+        if returncode == 0:
+            print(f"[DEBUG] {app_package} 강제 종료 완료.")
+        else:
+            print(f"[ERROR] {app_package} 강제 종료 실패: {output}")
         return False
 
-    else:
-        # ✅ 에뮬레이터 또는 기타 환경: 기존 방식 유지 (dumpsys + ps)
-        try:
-            result = subprocess.run(
-                adb_base + ["shell", "dumpsys", "activity", "activities"],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
-                if app_package in result.stdout:
-                    print(f"[DEBUG] {app_package}가 실행 중입니다.")
-                    return True
-                else:
-                    # ps로 백업 확인
-                    ps_result = subprocess.run(
-                        adb_base + ["shell", "ps"],
-                        capture_output=True, text=True
-                    )
-                    if ps_result.returncode == 0 and app_package in ps_result.stdout:
-                        print(f"[DEBUG] {app_package} 프로세스가 백그라운드에 존재합니다. 강제 종료합니다.")
-                        # 앱 강제 종료
-                        force_stop_result = subprocess.run(
-                            adb_base + ["shell", "am", "force-stop", app_package],
-                            capture_output=True, text=True
-                        )
-                        if force_stop_result.returncode == 0:
-                            print(f"[DEBUG] {app_package} 강제 종료 완료.")
-                        else:
-                            print(f"[ERROR] {app_package} 강제 종료 실패: {force_stop_result.stderr}")
-                        return False
-        except Exception as e:
-            print(f"[ERROR] adb 명령 실행 실패: {e}")
-
-        print(f"[DEBUG] {app_package}가 실행 중이지 않습니다.")
-        return False
+    print(f"[DEBUG] {app_package}가 실행 중이지 않습니다.")
+    return False
 
 # 6. 앱 실행
 def start_app():
@@ -235,6 +182,8 @@ def start_app():
         adb_base += ["-s", device_info]
 
     try:
+        # 앱 실행 전 화면 (실행 후 화면이 바뀌는 것을 확인하는 기준)
+        reference = capture_frame(max_age=0)
         if device_type == "device":
             # ✅ 실제 디바이스: monkey 방식 (exported 제한 없음)
             print("[INFO] 실제 디바이스에서 monkey 방식으로 앱 실행 중...")
@@ -257,10 +206,14 @@ def start_app():
                 capture_output=True, text=True
             )
 
+        # 앱 실행으로 화면이 바뀌므로 캐시된 프레임/앱 상태 무효화
+        bump_input_generation()
+        invalidate_app_state(app_package)
         # 실행 결과 확인
         if result.returncode == 0:
             print("[INFO] 앱 실행 완료.")
-            time.sleep(5)
+            # 고정 5초 대기 대신 앱 화면으로 바뀌고 스플래시/로딩이 끝나 화면이 안정될 때까지 대기
+            wait_for_transition(reference, timeout=15, stable_for=1.0)
         else:
             print(f"[ERROR] 앱 실행 실패: {result.stderr}")
             raise Exception("앱 실행에 실패했습니다.")
@@ -313,7 +266,8 @@ def start_screen_record(
     filename_prefix: str = "record",
     device_serial: Optional[str] = None,
     bit_rate: int = 8000000,
-    size: Optional[str] = None
+    size: Optional[str] = None,
+    stream: Optional[bool] = None,
 ) -> Optional[Tuple[subprocess.Popen, str, str]]:
     """
     ADB를 통해 Android 기기 화면 녹화를 백그라운드에서 시작합니다.
@@ -322,7 +276,10 @@ def start_screen_record(
     :param device_serial: ADB 디바이스 시리얼 넘버 (옵션)
     :param bit_rate: 비디오 비트레이트 (기본: 8Mbps)
     :param size: 해상도 지정 문자열 예: "1080x2400" (옵션)
+    :param stream: True면 기기에 저장하지 않고 PC로 바로 스트리밍 저장 (170초마다 세그먼트 분할)
+                   (None이면 dynamic_data의 record_stream)
     :return: (subprocess.Popen 객체, 파일 이름, 디바이스 내 저장 경로)
+             스트리밍 모드는 (StreamingScreenRecorder, 파일 이름 접두어, None)
     """
     # 타임스탬프 기반 파일명 생성
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -330,6 +287,23 @@ def start_screen_record(
     device_path = f"/sdcard/{record_filename}"
 
     # ADB 명령어 구성
+    if device_serial is None:
+        device_serial = load_data('device_info')
+    if stream is None:
+        stream = bool(load_data('record_stream'))
+    if stream:
+        base_name = f"{filename_prefix}_{timestamp}"
+        recorder = StreamingScreenRecorder(
+            base_name,
+            local_dir=load_data('artifact_dir') or ".",
+            device_serial=device_serial,
+            bit_rate=bit_rate,
+            size=size,
+        ).start()
+        save_data('record_process', recorder)
+        save_data('record_filename', base_name)
+        save_data('record_device_path', None)
+        return (recorder, base_name, None)
     cmd = ["adb"]
     if device_serial:
         cmd += ["-s", device_serial]
@@ -351,20 +325,26 @@ def start_screen_record(
     return (record_process, record_filename, device_path)
 
 def stop_screen_record_and_pull(
-    local_dir: str = ".",
+    local_dir: Optional[str] = None,
 ) -> str:
     """
     실행 중인 화면 녹화를 종료하고, 기기에서 PC로 영상을 가져옵니다.
 
     :param process: start_screen_record()에서 반환된 subprocess.Popen 객체
     :param device_path: 기기 내 저장 경로 (예: /sdcard/record_20250708_175955.mp4)
-    :param local_dir: PC로 저장할 디렉토리 경로 (기본: 현재 폴더)
+    :param local_dir: PC로 저장할 디렉토리 경로 (기본: 디바이스별 산출물 폴더, 없으면 현재 폴더)
+                      (스트리밍 모드는 녹화 시작 시점의 폴더에 이미 저장되어 있으므로 사용하지 않음)
     :param device_serial: 디바이스 시리얼 넘버 (선택)
-    :return: 로컬에 저장된 영상 파일 경로
+    :return: 로컬에 저장된 영상 파일 경로 (스트리밍 모드는 세그먼트를 합친 파일, 인덱스는 같은 이름의 .json)
     """
     process = load_data('record_process')
     if process is None:
         raise Exception("녹화 프로세스 정보가 없습니다. start_screen_record()가 정상적으로 실행되었는지 확인하세요.")
+    if isinstance(process, StreamingScreenRecorder):
+        local_path = process.stop()
+        if not local_path:
+            raise Exception("스트리밍 녹화 결과 영상이 없습니다.")
+        return local_path
     device_path = load_data('record_device_path')
     if not device_path:
         raise Exception("녹화 파일 경로 정보가 없습니다. start_screen_record()가 정상적으로 실행되었는지 확인하세요.")
@@ -377,6 +357,8 @@ def stop_screen_record_and_pull(
         process.kill()
 
     # 2. 로컬 저장 경로 생성
+    if local_dir is None:
+        local_dir = load_data('artifact_dir') or "."
     filename = os.path.basename(device_path)
     local_path = os.path.join(local_dir, filename)
 
@@ -390,10 +372,11 @@ def stop_screen_record_and_pull(
 
     return local_path
 
-def test_setup(port: int = 6520):
+def test_setup(port: int = 6520, serial: Optional[str] = None):
     """
     테스트 준비 단계: 에뮬레이터 실행 확인, ADB 연결, Show taps(터치 이펙트) 활성화, 앱 실행
     :param port: 에뮬레이터 포트 (기본 6520)
+    :param serial: 사용할 디바이스 시리얼 (None이면 ANDROID_SERIAL 환경변수, 디바이스 풀에서 임대받은 경우 자동 설정)
     :param app_package: 앱 패키지명
     :param app_activity: 앱 메인 액티비티명
     :return: 연결 및 설정 성공 여부
@@ -404,6 +387,14 @@ def test_setup(port: int = 6520):
     if not devices:
         print("[ERROR] ADB 디바이스가 없습니다.")
         raise Exception("ADB 디바이스가 없습니다.")
+    if serial is None:
+        serial = os.environ.get("ANDROID_SERIAL")
+    if serial:
+        devices = [d for d in devices if d['serial'] == serial]
+        if not devices:
+            raise Exception(f"지정한 ADB 디바이스({serial})가 연결되어 있지 않습니다.")
+        save_data('device_type', devices[0]['status'])
+        save_data('device_info', serial)
     if len(devices) > 1:
         print(f"[ERROR] 여러 개의 ADB 디바이스가 연결되어 있습니다: {devices}")
         raise Exception("여러 개의 ADB 디바이스가 연결되어 있습니다. 하나만 연결해주세요.")
@@ -412,8 +403,9 @@ def test_setup(port: int = 6520):
     if device['type'] == 'emulator':
         if not is_emulator_running():
             start_emulator()
-            wait_for_emulator_startup()
-        ensure_adb_connection()
+            wait_for_emulator_startup(port=port)
+        # 세션 시작 시 한 번 연결을 확인하고, 이후 캡처는 캐시된 상태를 사용
+        ensure_connected(port, ttl=0)
 
     if not check_app_running():
         start_app()
@@ -421,35 +413,15 @@ def test_setup(port: int = 6520):
     save_real_screen_size()
 
 def send_keys(key_value:str):
-    KEYCODE_MAP = {
-    "Tab": 61,
-    "Enter": 66,
-    "Back": 4,
-    "Del": 67,
-    "Delete": 67,
-    "Home": 3,
-    "Menu": 82,
-    "Up": 19,
-    "Down": 20,
-    "Left": 21,
-    "Right": 22,
-    "Space": 62,
-    "Escape": 111,
-    "Search": 84,
-    "Camera": 27,
-    "VolumeUp": 24,
-    "VolumeDown": 25,
-    "Power": 26
-    }
-    if key_value in KEYCODE_MAP:
-        keycode = KEYCODE_MAP[key_value]
-        print(f"입력 키: {key_value} (KEYCODE {keycode})")
-        subprocess.run(["adb", "shell", "input", "keyevent", str(keycode)])
+    command = key_command(key_value)
+    if command[1] == "keyevent":
+        print(f"입력 키: {key_value} (KEYCODE {command[2]})")
     else:
         # 일반 문자열로 간주 → adb text
         #encoded = key_value.replace(" ", "%s").replace("&", "%26").replace(":", "%3A")
         print(f"입력 텍스트: {key_value}")
-        subprocess.run(["adb", "shell", "input", "text", key_value])
+    run_shell(command)
+    bump_input_generation()
 
 
 def swipe_direction(
@@ -459,31 +431,16 @@ def swipe_direction(
     distance: int = 600,  # 기본값 600으로 변경
     duration: int = 800,
 ):
-    direction = direction.lower()
-    device_serial = load_data('device_info')
-    if direction == "up":
-        x1, y1, x2, y2 = x, y_center, x, y_center - distance
-    elif direction == "down":
-        x1, y1, x2, y2 = x, y_center, x, y_center + distance
-    elif direction == "left":
-        x1, y1, x2, y2 = x, y_center, x - distance, y_center
-    elif direction == "right":
-        x1, y1, x2, y2 = x, y_center, x + distance, y_center
-    else:
-        raise ValueError("direction must be one of: up, down, left, right")
-
-    cmd = ["adb"]
-    if device_serial:
-        cmd += ["-s", device_serial]
-    cmd += ["shell", "input", "swipe", str(x1), str(y1), str(x2), str(y2), str(duration)]
-
-    subprocess.run(cmd)
+    x1, y1, x2, y2 = swipe_coordinates(direction, x, y_center, distance)
+    run_shell(["input", "swipe", x1, y1, x2, y2, duration])
+    bump_input_generation()
 
 def swipe_until_text_found(
     text: str,
     direction: str = "up",
     max_swipes: int = 5,
     delay: float = 0.5,
+    end_timeout: float = 2.0,
     **swipe_kwargs
 ) -> bool:
     """
@@ -491,20 +448,42 @@ def swipe_until_text_found(
     :param text: 찾을 텍스트
     :param direction: 스와이프 방향 (기본: up)
     :param max_swipes: 최대 스와이프 횟수
-    :param delay: 각 스와이프 후 대기 시간(초)
+    :param delay: 각 스와이프 후 대기 시간(초), "stable"이면 화면이 안정될 때까지 대기
+    :param end_timeout: 스와이프 후 화면이 그대로일 때 목록 끝으로 판단하기 전에 화면 변화를 기다릴 시간(초)
     :param swipe_kwargs: swipe_direction에 전달할 추가 인자
-    :return: 찾으면 True, 못 찾으면 False
+    :return: 찾으면 True, 못 찾으면 False (스와이프해도 화면이 그대로면 목록 끝으로 보고 바로 False)
     """
+    # 텍스트_찾기_클릭, 텍스트_찾기, print_all_ocr_text를 사용하는 함수 내부에서만 import하도록 변경
+    from util.text_util import 텍스트_찾기_클릭, 텍스트_찾기, print_all_ocr_text
+    from util.text_index import get_frame_text
+    frame = None
+    previous = previous_frame = None
     for attempt in range(max_swipes):
-        # 텍스트_찾기_클릭, 텍스트_찾기, print_all_ocr_text를 사용하는 함수 내부에서만 import하도록 변경
-        from util.text_util import 텍스트_찾기_클릭, 텍스트_찾기, print_all_ocr_text
-        found = 텍스트_찾기(text, must_exist=False)
+        frame = capture_frame()
+        if previous is not None:
+            # 직전 화면과 비교하여 밀려난 단어는 재사용하고 새로 나타난 부분만 OCR (ocr_incremental)
+            frame_text = get_frame_text(frame, previous=previous)
+            if not frame_text.changed:
+                # 스와이프 전 프레임(스트림)이거나 스크롤이 그려지기 전에 캡처했을 수 있으므로
+                # 스와이프 전 화면과 달라지는지 더 기다려 보고, 그래도 같을 때만 목록 끝으로 판단
+                if not wait_for_change(previous_frame, timeout=end_timeout):
+                    print(f"[✖] 스와이프해도 화면이 바뀌지 않습니다(목록 끝). '{text}' 텍스트를 찾지 못했습니다.")
+                    break
+                frame = capture_frame(max_age=0)
+                get_frame_text(frame, previous=previous)
+        found = 텍스트_찾기(text, must_exist=False, frame=frame)
         if found:
             print(f"[✔] '{text}' 텍스트를 {attempt+1}회 만에 찾았습니다.")
             return True
+        previous_frame = frame
+        previous = get_frame_text(frame)
         swipe_direction(direction, **swipe_kwargs)
-        time.sleep(delay)
-    print(f"[✖] 최대 {max_swipes}회 스와이프에도 '{text}' 텍스트를 찾지 못했습니다.")
+        settle(delay)
+    else:
+        print(f"[✖] 최대 {max_swipes}회 스와이프에도 '{text}' 텍스트를 찾지 못했습니다.")
+    if frame is not None:
+        # 마지막으로 확인한 화면의 텍스트 (이미 OCR한 색인을 출력하므로 OCR을 다시 하지 않음)
+        print_all_ocr_text(frame)
     return False
 
 def login(login_type="email", email=None, password=None):
@@ -516,30 +495,41 @@ def login(login_type="email", email=None, password=None):
     :param email: 이메일 주소
     :param password: 비밀번호
     """
-    from util.text_util import 텍스트_찾기_클릭, 텍스트_찾기, print_all_ocr_text
+    from util.text_util import 텍스트_찾기_클릭, 텍스트_찾기, 텍스트_여러개_찾기, print_all_ocr_text
     if login_type == "email":
-        if not 버튼_찾기_클릭("Krafton ID로 로그인", must_exist=False, delay=3):
-            텍스트_찾기_클릭("Krafton ID", 5)
+        # 입력 전에 캡처한 화면을 기준으로, 화면이 바뀐 뒤 안정될 때까지 대기
+        reference = capture_frame(max_age=0)
+        if not 버튼_찾기_클릭("Krafton ID로 로그인", must_exist=False, delay=0, frame=reference):
+            텍스트_찾기_클릭("Krafton ID", 0, frame=reference)
+        wait_for_transition(reference, timeout=5)
         if 텍스트_찾기("로그인했던", must_exist=False):
             swipe_until_text_found("다른 계정으로")
-            텍스트_찾기_클릭("다른 계정으로") #여기가 문제.. 좌표 문제?
+            reference = capture_frame(max_age=0)
+            텍스트_찾기_클릭("다른 계정으로", 0, frame=reference) #여기가 문제.. 좌표 문제?
             # 버튼_찾기_클릭("다른 계정으로 로그인")
-        time.sleep(5)
-        send_keys("Tab")
-        send_keys(EMAIL)
-        send_keys("Tab")
-        send_keys(PASSWORD)
-        send_keys("Enter")
-        time.sleep(10)
-        if 텍스트_찾기("*계정*선택*"):
-            텍스트_찾기_클릭("Lv.*")
-            swipe_direction('up')
+            wait_for_transition(reference, timeout=5)
+        InputBatch().key("Tab").key(EMAIL).key("Tab").key(PASSWORD).run(must_succeed=True)
+        # 입력한 글자가 화면 변화로 잡히지 않도록 Enter 직전 화면을 기준으로 로그인 후 화면 전환을 기다림
+        reference = capture_frame(max_age=0)
+        InputBatch().key("Enter").run(must_succeed=True)
+        wait_for_transition(reference, timeout=10, stable_for=1.0)
+        # 계정 선택 화면 확인과 Lv. 위치 찾기를 OCR 한 번으로 처리
+        # (계정 선택 화면이 아니면 아래 약관 동의/성공 확인으로 진행)
+        frame = capture_frame()
+        hits = 텍스트_여러개_찾기(["*계정*선택*", "Lv.*"], frame=frame)
+        if hits["*계정*선택*"]:
+            # 같은 화면의 색인을 다시 조회하므로 OCR을 다시 하지 않음
+            hits = 텍스트_여러개_찾기(["Lv.*"], must_exist=["Lv.*"], frame=frame)
+            tap_on_device(hits["Lv.*"]['x'], hits["Lv.*"]['y'])
+            settle(1)
+            InputBatch().swipe('up').swipe('up').run(must_succeed=True)
+            reference = capture_frame(max_age=0)
+            버튼_찾기_클릭('연결', delay=0, frame=reference)
+            wait_for_transition(reference, timeout=3)
             swipe_direction('up')
-            버튼_찾기_클릭('연결')
-            time.sleep(3)
-            swipe_direction('up')
-            버튼_찾기_클릭('선택')
-            time.sleep(3)
+            reference = capture_frame(max_age=0)
+            버튼_찾기_클릭('선택', delay=0, frame=reference)
+            wait_for_transition(reference, timeout=3)
             # swipe_until_text_found("연결")
         
         버튼_찾기_클릭("모두 동의하고 시작", delay=3, must_exist=False)
@@ -552,13 +542,14 @@ def login(login_type="email", email=None, password=None):
         텍스트_찾기_클릭("*으로 계속", 5)
         if 텍스트_찾기("*계정*선택*", must_exist=False):
             텍스트_찾기_클릭("Lv.*")
+            InputBatch().swipe('up').swipe('up').run(must_succeed=True)
+            reference = capture_frame(max_age=0)
+            버튼_찾기_클릭('연결', delay=0, frame=reference)
+            wait_for_transition(reference, timeout=3)
             swipe_direction('up')
-            swipe_direction('up')
-            버튼_찾기_클릭('연결')
-            time.sleep(3)
-            swipe_direction('up')
-            버튼_찾기_클릭('선택')
-            time.sleep(3)
+            reference = capture_frame(max_age=0)
+            버튼_찾기_클릭('선택', delay=0, frame=reference)
+            wait_for_transition(reference, timeout=3)
 
     elif login_type == "google" or login_type == "Google":
         if 텍스트_찾기(EMAIL, must_exist=False):
@@ -568,13 +559,14 @@ def login(login_type="email", email=None, password=None):
             텍스트_찾기_클릭(EMAIL)
             if 텍스트_찾기("*계정*선택*", must_exist=False):
                 텍스트_찾기_클릭("Lv.*")
+                InputBatch().swipe('up').swipe('up').run(must_succeed=True)
+                reference = capture_frame(max_age=0)
+                버튼_찾기_클릭('연결', delay=0, frame=reference)
+                wait_for_transition(reference, timeout=3)
                 swipe_direction('up')
-                swipe_direction('up')
-                버튼_찾기_클릭('연결')
-                time.sleep(3)
-                swipe_direction('up')
-                버튼_찾기_클릭('선택')
-                time.sleep(3)
+                reference = capture_frame(max_age=0)
+                버튼_찾기_클릭('선택', delay=0, frame=reference)
+                wait_for_transition(reference, timeout=3)
         버튼_찾기_클릭("모두 동의하고 시작", delay=3, must_exist=False)
         if 텍스트_찾기("GENERAL_SUCCESS"): #검증 포인트
             버튼_찾기_클릭("닫기")
@@ -582,29 +574,30 @@ def login(login_type="email", email=None, password=None):
             
     elif login_type == "Apple" or login_type == "apple":
         텍스트_찾기_클릭("Apple", 5)
-        send_keys(EMAIL)
-        send_keys("Enter")
-        send_keys(PASSWORD)
-        send_keys("Enter")
+        InputBatch().key(EMAIL).key("Enter").key(PASSWORD).key("Enter").run(must_succeed=True)
         
     elif login_type == "Discord" or login_type == "discord":
         텍스트_찾기_클릭("Discord*", 5)
 
+def run_login_scenario(login_type: str = "email"):
+    """
+    디바이스 풀 작업용 시나리오: 테스트 준비 후 로그인
+    예) run_on_device_pool([(run_login_scenario, {'login_type': t}) for t in ("email", "google")])
+    :param login_type: 로그인 방식
+    :return: login() 결과
+    """
+    test_setup()
+    return login(login_type=login_type)
+
 def save_real_screen_size():
     """
-    adb shell wm size 명령으로 실제 화면 해상도를 dynamic_data에 저장
+    디바이스 geometry(wm size / density / 회전)를 새로 읽어 실제 화면 해상도를 dynamic_data에 저장
     """
-    import re
-    import subprocess
-    from util.dynamic_data import save_data
-    result = subprocess.run(["adb", "shell", "wm", "size"], capture_output=True, text=True)
-    match = re.search(r'Physical size: (\d+)x(\d+)', result.stdout)
-    if match:
-        width, height = int(match.group(1)), int(match.group(2))
-        save_data('real_screen_width', width)
-        save_data('real_screen_height', height)
+    geometry = refresh_device_geometry()
+    width, height = geometry['width'], geometry['height']
+    if width is not None:
         print(f"[INFO] 실제 화면 해상도: {width}x{height} 저장 완료")
         return width, height
     else:
         print("[ERROR] adb shell wm size 결과에서 해상도를 찾지 못했습니다.")
-        return None, None
\ No newline at end of file
+        return None, None
@@ -0,0 +1,203 @@
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+from util.adb_session import run_shell
+from util.dynamic_data import load_data, save_data
+
+_ROTATION_PROBE = "dumpsys input | grep -m 1 SurfaceOrientation"
+
+# 시리얼별 geometry 캐시 {serial: {'width', 'height', 'density', 'rotation', 'checked_at'}}
+_geometry: Dict[Optional[str], Dict] = {}
+# (serial, 이미지 가로, 세로, resize) → ImageTransform
+_transforms: Dict[Tuple, "ImageTransform"] = {}
+# 시리얼별 마지막 캡처 이미지의 방향 (가로가 더 길면 True)
+_last_landscape: Dict[Optional[str], bool] = {}
+
+
+class ImageTransform:
+    """
+    OCR/템플릿 매칭 입력 이미지 좌표 → 디바이스(adb input) 좌표 변환
+    디바이스 회전(SurfaceOrientation)과 해상도로 회전 보정 여부/방향과 스케일을 한 번 계산해 두고 재사용한다.
+    """
+
+    def __init__(
+        self,
+        image_w: int,
+        image_h: int,
+        device_w: Optional[int],
+        device_h: Optional[int],
+        resize_factor: float = 1.0,
+        rotation: Optional[int] = None,
+    ):
+        """
+        :param device_w: 디바이스 물리 해상도 가로 (wm size, 회전 전 기준)
+        :param device_h: 디바이스 물리 해상도 세로
+        :param rotation: 현재 화면 회전 (0~3, 90도 단위), 모르면 None
+        """
+        self.image_w = image_w
+        self.image_h = image_h
+        self.device_w = device_w
+        self.device_h = device_h
+        self.rotation = rotation
+        self.need_rotation = False
+        if device_w is not None and device_h is not None:
+            if rotation is not None:
+                # 회전 상태를 알면 그대로 사용 (90/270도이고 캡처 이미지도 가로/세로가 바뀌어 있을 때만 보정)
+                self.need_rotation = rotation in (1, 3) and (image_w > image_h) != (device_w > device_h)
+            # 회전 상태를 모르면 이미지와 디바이스 해상도가 90도 회전된 상태인지 크기로 판단 (정밀 조건)
+            elif abs(image_w - device_h) < 50 and abs(image_h - device_w) < 50:
+                self.need_rotation = True
+            # 회전 보정하면 이미지 세로가 디바이스 가로 방향이 됨
+            rotated_w, rotated_h = (image_h, image_w) if self.need_rotation else (image_w, image_h)
+            self.scale_x = device_w / float(rotated_w)
+            self.scale_y = device_h / float(rotated_h)
+            if self.scale_x > 4.0 or self.scale_y > 4.0:
+                print(f"[WARN] OCR 입력 이미지와 실제 해상도 차이가 너무 큽니다. (scale_x={self.scale_x:.2f}, scale_y={self.scale_y:.2f}) 리사이즈 배율을 확인하세요.")
+        else:
+            # 해상도 정보가 없으면 캡처 해상도 = 디바이스 해상도로 보고 확대 배율만 되돌림
+            self.scale_x = self.scale_y = 1.0 / (resize_factor or 1.0)
+
+    def __repr__(self):
+        return (f"ImageTransform({self.image_w}x{self.image_h} → {self.device_w}x{self.device_h}, "
+                f"rotation={self.rotation}, need_rotation={self.need_rotation}, "
+                f"scale_x={self.scale_x:.3f}, scale_y={self.scale_y:.3f})")
+
+    def _rotate(self, image_x: float, image_y: float) -> Tuple[float, float]:
+        # 회전된 캡처 이미지 좌표 → 회전 전(물리) 방향 좌표
+        if self.rotation == 1:
+            # 90도: 물리 화면의 위쪽이 이미지 왼쪽
+            return self.image_h - image_y, image_x
+        # 270도 (회전 상태를 모를 때의 기본 보정)
+        return image_y, self.image_w - image_x
+
+    def to_device(self, image_x: float, image_y: float) -> Tuple[int, int]:
+        """
+        이미지 좌표를 디바이스 좌표로 변환 (회전 보정 + 스케일 + 클램핑)
+        :return: (x, y) 디바이스 좌표
+        """
+        if self.need_rotation:
+            image_x, image_y = self._rotate(image_x, image_y)
+        x = int(image_x * self.scale_x)
+        y = int(image_y * self.scale_y)
+
+        known = self.device_w is not None and self.device_h is not None
+        # 좌표가 해상도를 벗어나면 회전 보정 강제 적용
+        if known and (x > self.device_w or y > self.device_h):
+            print("[WARN] 좌표가 화면 해상도를 벗어납니다. 회전 보정 강제 적용합니다.")
+            image_x, image_y = self._rotate(image_x, image_y)
+            x = int(image_x * self.scale_x)
+            y = int(image_y * self.scale_y)
+
+        # ADB 좌표 클램핑
+        if known:
+            x = min(max(x, 0), self.device_w - 1)
+            y = min(max(y, 0), self.device_h - 1)
+        return x, y
+
+    def box_to_device(self, box: Tuple[float, float, float, float]) -> Tuple[int, int, int, int]:
+        """이미지 박스 (x1, y1, x2, y2)를 디바이스 좌표 박스로 변환"""
+        x1, y1 = self.to_device(box[0], box[1])
+        x2, y2 = self.to_device(box[2], box[3])
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+
+def _parse_rotation(output: str) -> Optional[int]:
+    match = re.search(r"SurfaceOrientation:\s*(\d)", output)
+    return int(match.group(1)) if match else None
+
+
+def refresh_device_geometry(serial: Optional[str] = None) -> Dict:
+    """
+    wm size / wm density / 현재 회전을 셸 호출 한 번으로 다시 읽어 캐시
+    :param serial: 디바이스 시리얼 (None이면 dynamic_data의 device_info)
+    :return: {'width', 'height', 'density', 'rotation', 'checked_at'}
+    """
+    if serial is None:
+        serial = load_data('device_info')
+    _, output = run_shell(f"wm size; wm density; {_ROTATION_PROBE}", serial=serial, idempotent=True)
+    size = re.search(r"Physical size: (\d+)x(\d+)", output)
+    density = re.search(r"Physical density: (\d+)", output)
+    geometry = {
+        'width': int(size.group(1)) if size else None,
+        'height': int(size.group(2)) if size else None,
+        'density': int(density.group(1)) if density else None,
+        'rotation': _parse_rotation(output),
+        'checked_at': time.time(),
+    }
+    _geometry[serial] = geometry
+    _clear_transforms(serial)
+    if size:
+        save_data('real_screen_width', geometry['width'])
+        save_data('real_screen_height', geometry['height'])
+    print(f"[INFO] 디바이스 geometry: {geometry['width']}x{geometry['height']}, density={geometry['density']}, rotation={geometry['rotation']}")
+    return geometry
+
+
+def _clear_transforms(serial: Optional[str]):
+    for key in [k for k in _transforms if k[0] == serial]:
+        del _transforms[key]
+
+
+def _probe_rotation(serial: Optional[str], geometry: Dict):
+    _, output = run_shell(_ROTATION_PROBE, serial=serial, idempotent=True)
+    rotation = _parse_rotation(output)
+    geometry['checked_at'] = time.time()
+    if rotation != geometry.get('rotation'):
+        print(f"[INFO] 화면 회전 변경 감지: {geometry.get('rotation')} → {rotation}")
+        refresh_device_geometry(serial)
+
+
+def get_device_geometry(serial: Optional[str] = None, refresh: bool = False) -> Dict:
+    """
+    캐시된 디바이스 geometry 반환 (없거나 refresh=True면 새로 읽음)
+    geometry_probe_ttl이 지나면 회전만 가볍게 다시 확인
+    """
+    if serial is None:
+        serial = load_data('device_info')
+    geometry = _geometry.get(serial)
+    if geometry is None or refresh:
+        return refresh_device_geometry(serial)
+    ttl = load_data('geometry_probe_ttl') or 0
+    if time.time() - geometry['checked_at'] >= ttl:
+        _probe_rotation(serial, geometry)
+        geometry = _geometry[serial]
+    return geometry
+
+
+def get_image_transform(
+    image_w: int,
+    image_h: int,
+    resize_factor: float = 1.0,
+    serial: Optional[str] = None,
+) -> ImageTransform:
+    """
+    이미지 크기에 맞는 이미지→디바이스 좌표 변환 반환 (geometry가 바뀌기 전까지 캐시)
+    캡처 이미지의 가로/세로 방향이 이전과 달라지면 회전 이벤트로 보고 geometry를 다시 확인한다.
+    :param image_w: 이미지 가로
+    :param image_h: 이미지 세로
+    :param resize_factor: 캡처 대비 이미지 확대 배율
+    :param serial: 디바이스 시리얼
+    """
+    if serial is None:
+        serial = load_data('device_info')
+    landscape = image_w > image_h
+    if serial in _last_landscape and _last_landscape[serial] != landscape and serial in _geometry:
+        print("[INFO] 캡처 이미지 방향이 바뀌었습니다. 회전 상태를 다시 확인합니다.")
+        _probe_rotation(serial, _geometry[serial])
+    _last_landscape[serial] = landscape
+
+    try:
+        geometry = get_device_geometry(serial)
+        device_w, device_h, rotation = geometry['width'], geometry['height'], geometry['rotation']
+    except Exception as e:
+        print(f"[WARN] 디바이스 geometry 확인 실패: {e}")
+        device_w, device_h, rotation = load_data('real_screen_width'), load_data('real_screen_height'), None
+
+    key = (serial, image_w, image_h, resize_factor)
+    transform = _transforms.get(key)
+    if transform is None or transform.rotation != rotation:
+        transform = ImageTransform(image_w, image_h, device_w, device_h, resize_factor, rotation)
+        _transforms[key] = transform
+        print(f"[DEBUG] 좌표 변환 계산: {transform}")
+    return transform
@@ -0,0 +1,183 @@
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import re
+import subprocess
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from util.dynamic_data import get_all_data, load_data, save_data
+
+# 디바이스별 산출물 기본 폴더
+ARTIFACT_ROOT = "artifacts"
+
+Job = Tuple[Callable, Dict[str, Any]]
+
+
+def list_online_devices(adb_path: str = "adb") -> List[Dict[str, str]]:
+    """
+    `adb devices`에서 사용 가능한(device 상태) 디바이스 목록 반환
+    :return: [{'serial': ..., 'type': 'emulator' | 'device', 'status': ...}]
+    """
+    result = subprocess.run([adb_path, "devices"], capture_output=True, text=True)
+    devices = []
+    for line in result.stdout.strip().splitlines()[1:]:
+        parts = line.split()
+        if len(parts) >= 2 and parts[1] == "device":
+            serial = parts[0]
+            device_type = "emulator" if serial.startswith("emulator-") else "device"
+            devices.append({'serial': serial, 'type': device_type, 'status': parts[1]})
+    return devices
+
+
+def artifact_path(*parts: str) -> str:
+    """
+    현재 디바이스의 산출물 폴더 기준 경로 반환 (풀에서 실행 중이 아니면 현재 폴더 기준)
+    :param parts: 하위 경로
+    :return: 경로 문자열 (상위 폴더는 생성됨)
+    """
+    base = load_data('artifact_dir') or "."
+    path = os.path.join(base, *parts)
+    parent = os.path.dirname(path) if parts else path
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    return path
+
+
+def _safe_name(serial: str) -> str:
+    # localhost:6520 같은 시리얼을 폴더 이름으로 쓸 수 있게 변환
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", serial)
+
+
+def _snapshot_data() -> Dict[str, Any]:
+    """워커 프로세스에 넘길 dynamic_data 복사본 (프로세스 간 전달할 수 없는 값은 제외)"""
+    snapshot = {}
+    for key, value in get_all_data().items():
+        try:
+            pickle.dumps(value)
+        except Exception as e:
+            print(f"[WARN] dynamic_data '{key}' 값은 워커 프로세스에 전달할 수 없어 제외합니다: {e}")
+            continue
+        snapshot[key] = value
+    return snapshot
+
+
+def _device_worker(device: Dict[str, str], artifact_root: str, jobs, results, data: Dict[str, Any]):
+    """
+    디바이스 하나를 임대받아 종료 신호(None)를 받을 때까지 작업 큐의 시나리오를 실행하는 워커 프로세스
+    프로세스마다 dynamic_data가 따로 있으므로 device_info 등 전역 상태가 디바이스별로 분리된다.
+    :param data: 부모 프로세스의 dynamic_data (spawn으로 시작한 워커는 기본값부터 시작하므로 먼저 복원)
+    """
+    for key, value in data.items():
+        save_data(key, value)
+    serial = device['serial']
+    # 시리얼을 지정하지 않은 adb 명령도 임대받은 디바이스로 가도록 설정
+    os.environ["ANDROID_SERIAL"] = serial
+    artifact_dir = os.path.join(artifact_root, _safe_name(serial))
+    os.makedirs(artifact_dir, exist_ok=True)
+    save_data('device_info', serial)
+    save_data('device_type', device['status'])
+    save_data('artifact_dir', artifact_dir)
+
+    device_results = []
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        index, func, kwargs = job
+        name = getattr(func, "__name__", str(func))
+        print(f"[INFO] [{serial}] 시나리오 시작: {name}({kwargs})")
+        start = time.time()
+        entry = {
+            'index': index,
+            'serial': serial,
+            'scenario': name,
+            'kwargs': kwargs,
+            'artifact_dir': artifact_dir,
+        }
+        try:
+            entry['result'] = func(**kwargs)
+            entry['status'] = "Fail" if entry['result'] is False else "Pass"
+        except Exception as e:
+            entry['result'] = None
+            entry['status'] = "N/A"
+            entry['error'] = f"{e}\n{traceback.format_exc()}"
+            print(f"[ERROR] [{serial}] 시나리오 예외 발생: {name} - {e}")
+        entry['duration'] = round(time.time() - start, 3)
+        print(f"[INFO] [{serial}] 시나리오 종료: {name} ({entry['status']}, {entry['duration']}초)")
+        device_results.append(entry)
+        results.put(entry)
+
+    with open(os.path.join(artifact_dir, "results.json"), "w", encoding="utf-8") as f:
+        json.dump(device_results, f, ensure_ascii=False, indent=2, default=str)
+    # 결과와 함께 OCR 전처리 통계도 저장 (spawn 워커는 sys.exit로 끝나 atexit로도 저장됨)
+    from util.ocr_variant_stats import flush_variant_stats
+    flush_variant_stats()
+
+
+def run_on_device_pool(
+    jobs: List[Job],
+    serials: Optional[List[str]] = None,
+    artifact_root: str = ARTIFACT_ROOT,
+    adb_path: str = "adb",
+) -> List[Dict[str, Any]]:
+    """
+    연결된 디바이스마다 워커 프로세스를 하나씩 띄우고, 작업 큐의 시나리오를 비어 있는 디바이스가 가져가 동시에 실행
+    예) run_on_device_pool([(run_login_scenario, {'login_type': t}) for t in ("email", "google", "facebook")])
+    :param jobs: (시나리오 함수, 키워드 인자) 목록. 함수는 모듈 최상위 함수여야 함 (프로세스 간 전달)
+    :param serials: 사용할 디바이스 시리얼 목록 (None이면 연결된 모든 디바이스)
+    :param artifact_root: 디바이스별 산출물 폴더의 상위 폴더
+    :param adb_path: adb 실행 파일 경로
+    :return: 작업 순서대로 정렬된 결과 목록 (serial, scenario, status, result, duration, artifact_dir 등)
+    """
+    devices = list_online_devices(adb_path)
+    if serials is not None:
+        devices = [d for d in devices if d['serial'] in serials]
+    if not devices:
+        raise Exception("사용 가능한 ADB 디바이스가 없습니다.")
+    print(f"[INFO] 디바이스 풀: {[d['serial'] for d in devices]} / 시나리오 {len(jobs)}개")
+
+    ctx = multiprocessing.get_context("spawn")
+    job_queue = ctx.Queue()
+    result_queue = ctx.Queue()
+    for index, (func, kwargs) in enumerate(jobs):
+        job_queue.put((index, func, kwargs))
+    devices = devices[:len(jobs)]
+    # 워커마다 종료 신호 하나씩
+    for _ in devices:
+        job_queue.put(None)
+
+    data = _snapshot_data()
+    workers = []
+    for device in devices:
+        proc = ctx.Process(
+            target=_device_worker,
+            args=(device, artifact_root, job_queue, result_queue, data),
+            name=f"device-{device['serial']}",
+        )
+        proc.start()
+        workers.append(proc)
+
+    results = []
+    while len(results) < len(jobs):
+        try:
+            results.append(result_queue.get(timeout=1))
+        except queue.Empty:
+            if not any(proc.is_alive() for proc in workers):
+                # 워커가 끝나기 직전에 넣은 결과는 큐에 남아 있을 수 있으므로 모두 꺼낸 뒤 종료
+                while len(results) < len(jobs):
+                    try:
+                        results.append(result_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                break
+    for proc in workers:
+        proc.join()
+
+    if len(results) < len(jobs):
+        print(f"[WARN] 결과를 받지 못한 시나리오가 있습니다. ({len(results)}/{len(jobs)})")
+    results.sort(key=lambda r: r['index'])
+    return results
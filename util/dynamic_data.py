@@ -5,20 +5,46 @@ _dynamic_data = {
     'record_process': None,
     'record_filename': None,
     'record_device_path': None,
+    'record_stream': False,
 
     'env': None,
     'id': None,
     'pw': None,
     'device_type': None,
     'device_info': None,
+    'artifact_dir': None,
+    'adb_session_enabled': True,
+    'adb_health_ttl': 60.0,
+    'capture_mode': "auto",
+    'frame_cache_max_age': 2.0,
+    'frame_stream_wait': 1.0,
+    'boot_timings': None,
     
     'build': None,
     'app_package': None,
     'app_activity': None,
+    'app_probe_ttl': 30.0,
 
     'resize_factor': 0.0,
+    'ocr_debug': False,
+    'ocr_cache_size': 32,
+    'ocr_engine': "auto",
+    'ocr_engine_pool_size': 3,
+    'ocr_roi': True,
+    'ocr_region_method': "gradient",
+    'ocr_region_workers': 4,
+    'ocr_parallel': True,
+    'ocr_last_variant': None,
+    'ocr_index_frames': 4,
+    'ocr_adaptive': True,
+    'ocr_stats_path': None,
+    'ocr_stats_save_every': 20,
+    'ocr_stats_max_screens': 20,
+    'ocr_prune_after': 5,
+    'ocr_incremental': True,
     'real_screen_width': None,
-    'real_screen_height': None
+    'real_screen_height': None,
+    'geometry_probe_ttl': 30.0
 }
 
 def save_data(key, value):
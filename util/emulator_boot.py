@@ -0,0 +1,103 @@
+import subprocess
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from util.dynamic_data import load_data, save_data
+
+# 준비 단계 순서
+BOOT_PHASES = ("process", "adb", "boot_completed", "package_manager", "launcher")
+
+
+def _adb(args: List[str], serial: Optional[str], timeout: float = 5.0) -> Tuple[int, str]:
+    # 부팅 중에는 세션이 자주 끊기므로 one-shot adb 명령으로 확인
+    cmd = ["adb"]
+    if serial:
+        cmd += ["-s", serial]
+    cmd += args
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return -1, ""
+    return result.returncode, (result.stdout or "").strip()
+
+
+def _check_adb(serial: Optional[str], port: int) -> bool:
+    returncode, output = _adb(["get-state"], serial)
+    if returncode == 0 and output == "device":
+        return True
+    subprocess.run(["adb", "connect", f"localhost:{port}"], capture_output=True, text=True)
+    returncode, output = _adb(["get-state"], serial)
+    return returncode == 0 and output == "device"
+
+
+def _check_boot_completed(serial: Optional[str], port: int) -> bool:
+    _, output = _adb(["shell", "getprop", "sys.boot_completed"], serial)
+    return output == "1"
+
+
+def _check_package_manager(serial: Optional[str], port: int) -> bool:
+    _, output = _adb(["shell", "pm", "path", "android"], serial)
+    return output.startswith("package:")
+
+
+def _check_launcher(serial: Optional[str], port: int) -> bool:
+    _, output = _adb(["shell", "dumpsys window | grep -m 1 mCurrentFocus"], serial)
+    return "mCurrentFocus=" in output and "null" not in output
+
+
+def wait_for_device_ready(
+    timeout_seconds: float = 120.0,
+    port: int = 6520,
+    serial: Optional[str] = None,
+    process_check: Optional[Callable[[], bool]] = None,
+    initial_interval: float = 0.25,
+    max_interval: float = 4.0,
+) -> Dict[str, float]:
+    """
+    에뮬레이터/디바이스가 실제로 사용 가능할 때까지 단계별로 확인
+    process → adb 연결 → sys.boot_completed → 패키지 매니저 → 런처(포커스 윈도우) 순서로,
+    각 단계는 지수 백오프(initial_interval부터 2배씩, 최대 max_interval)로 재확인한다.
+    :param timeout_seconds: 전체 최대 대기 시간(초)
+    :param port: adb connect에 사용할 에뮬레이터 포트
+    :param serial: 디바이스 시리얼 (None이면 dynamic_data의 device_info)
+    :param process_check: 에뮬레이터 프로세스 확인 함수 (None이면 process 단계 생략)
+    :return: 단계별 소요 시간(초) {'process': .., 'adb': .., ..., 'total': ..}
+    """
+    if serial is None:
+        serial = load_data('device_info')
+    checks = {
+        "process": (lambda s, p: process_check()) if process_check else None,
+        "adb": _check_adb,
+        "boot_completed": _check_boot_completed,
+        "package_manager": _check_package_manager,
+        "launcher": _check_launcher,
+    }
+    start = time.time()
+    deadline = start + timeout_seconds
+    timings: Dict[str, float] = {}
+
+    for phase in BOOT_PHASES:
+        check = checks[phase]
+        phase_start = time.time()
+        if check is None:
+            timings[phase] = 0.0
+            continue
+        interval = initial_interval
+        attempts = 0
+        while True:
+            attempts += 1
+            if check(serial, port):
+                break
+            if time.time() + interval > deadline:
+                timings[phase] = round(time.time() - phase_start, 3)
+                save_data('boot_timings', timings)
+                raise Exception(f"디바이스 준비 단계 '{phase}'가 {timeout_seconds}초 안에 완료되지 않았습니다. (단계별 시간: {timings})")
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+        timings[phase] = round(time.time() - phase_start, 3)
+        print(f"[INFO] 준비 단계 완료: {phase} ({timings[phase]:.2f}초, 확인 {attempts}회)")
+
+    timings['total'] = round(time.time() - start, 3)
+    save_data('boot_timings', timings)
+    print(f"[INFO] 디바이스 준비 완료 ({timings['total']:.2f}초): {timings}")
+    return timings
@@ -0,0 +1,891 @@
+"""
+테스트/벤치마크용 가짜 adb 서버
+
+실제 adb 서버(TCP 5037)와 같은 smart socket 프로토콜로 동작하므로
+`ANDROID_ADB_SERVER_PORT`를 이 서버 포트로 지정하면 adb CLI, AdbShellSession, AsyncAdbClient가
+에뮬레이터 없이 그대로 동작한다. 화면은 fixture 폴더의 PNG(순서대로) 또는 scenario.json 상태 머신으로 제공하고,
+모든 명령은 시각과 함께 기록한다.
+
+    python -m util.fake_adb_server --port 5038 --fixtures fixtures/login --serial localhost:6520 --package com.Krafton.gpp.sdk.ue.sample --log fake_adb.jsonl
+    ANDROID_ADB_SERVER_PORT=5038 python make_image.py
+
+scenario.json 형식:
+    {
+      "initial": "title",
+      "launch": {"com.example.app": "splash"},
+      "screens": {
+        "splash": {"image": "splash.png", "after": {"seconds": 2, "goto": "title"}},
+        "title": {"image": "title.png", "on": [
+          {"tap": [100, 200, 400, 300], "goto": "login"},
+          {"key": "BACK", "goto": "title"},
+          {"swipe": "up", "goto": "list"},
+          {"text": ".*@.*", "goto": "password"}
+        ]}
+      }
+    }
+"""
+import argparse
+import asyncio
+import glob
+import io
+import json
+import os
+import re
+import shlex
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+# adb 클라이언트가 host:version으로 확인하는 서버 버전 (platform-tools 기준 41)
+ADB_SERVER_VERSION = 41
+SCENARIO_FILE = "scenario.json"
+# fixture 폴더에 있으면 screenrecord 결과로 돌려줄 영상
+RECORD_FILE = "record.mp4"
+# 영상 fixture가 없을 때 screenrecord 결과로 남기는 최소 mp4 헤더 (ftyp 박스)
+PLACEHOLDER_MP4 = struct.pack(">I4s4sI4s4s", 24, b"ftyp", b"isom", 0x200, b"isom", b"mp41")
+LAUNCHER = ("com.android.launcher3", "com.android.launcher3.uioverrides.QuickstepLauncher")
+SYNC_CHUNK_SIZE = 64 * 1024
+
+_KEY_NAMES = {
+    3: "HOME", 4: "BACK", 19: "DPAD_UP", 20: "DPAD_DOWN", 21: "DPAD_LEFT", 22: "DPAD_RIGHT",
+    24: "VOLUME_UP", 25: "VOLUME_DOWN", 26: "POWER", 27: "CAMERA", 61: "TAB", 62: "SPACE",
+    66: "ENTER", 67: "DEL", 82: "MENU", 84: "SEARCH", 111: "ESCAPE",
+}
+_DEV_NULL_REDIRECTS = re.compile(r"\s*(?:\d?>&\d|\d?>\s*/dev/null)")
+
+
+def _normalize_key(key) -> str:
+    key = str(key).upper()
+    if key.isdigit():
+        key = _KEY_NAMES.get(int(key), key)
+    return key[len("KEYCODE_"):] if key.startswith("KEYCODE_") else key
+
+
+def _swipe_direction(x1: float, y1: float, x2: float, y2: float) -> str:
+    # 손가락이 움직인 방향 (input_batch.swipe_coordinates와 같은 기준)
+    dx, dy = x2 - x1, y2 - y1
+    if abs(dy) >= abs(dx):
+        return "up" if dy < 0 else "down"
+    return "left" if dx < 0 else "right"
+
+
+def _split_unquoted(text: str, separators: Tuple[str, ...]) -> List[Tuple[str, str]]:
+    """따옴표 밖의 구분자로 나누어 [(앞 구분자, 조각)] 반환"""
+    parts = []
+    buf = []
+    quote = None
+    op = ""
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if quote:
+            buf.append(c)
+            if c == quote:
+                quote = None
+        elif c in "'\"":
+            quote = c
+            buf.append(c)
+        else:
+            sep = next((s for s in separators if text.startswith(s, i)), None)
+            if sep is None:
+                buf.append(c)
+            else:
+                parts.append((op, "".join(buf).strip()))
+                buf = []
+                op = sep
+                i += len(sep)
+                continue
+        i += 1
+    parts.append((op, "".join(buf).strip()))
+    return [(op, part) for op, part in parts if part]
+
+
+class Screens:
+    """
+    가짜 디바이스 화면 소스
+    - fixture 폴더에 scenario.json이 있으면 상태 머신 (탭 영역/키/스와이프/텍스트/시간 경과로 화면 전환)
+    - 없으면 폴더의 PNG를 이름순으로 보여주고 입력이 들어올 때마다 다음 화면으로 넘어감
+    - fixture가 없으면 단색 화면
+    """
+
+    def __init__(self, fixture_dir: Optional[str], width: int, height: int):
+        self.width = width
+        self.height = height
+        self.scenario: Optional[Dict] = None
+        self.images: List[str] = []
+        self.index = 0
+        self.current: Optional[str] = None
+        self.entered_at = time.time()
+        self._png_cache: Dict[str, bytes] = {}
+        self._raw_cache: Dict[str, bytes] = {}
+        self.record = PLACEHOLDER_MP4
+        if fixture_dir and os.path.exists(os.path.join(fixture_dir, RECORD_FILE)):
+            with open(os.path.join(fixture_dir, RECORD_FILE), "rb") as f:
+                self.record = f.read()
+        if fixture_dir:
+            scenario_path = os.path.join(fixture_dir, SCENARIO_FILE)
+            if os.path.exists(scenario_path):
+                with open(scenario_path, "r", encoding="utf-8") as f:
+                    self.scenario = json.load(f)
+                for screen in self.scenario['screens'].values():
+                    screen['image'] = os.path.join(fixture_dir, screen['image'])
+                self.current = self.scenario.get('initial') or next(iter(self.scenario['screens']))
+            else:
+                self.images = sorted(glob.glob(os.path.join(fixture_dir, "*.png")))
+                if not self.images:
+                    raise Exception(f"fixture 폴더에 PNG 파일이 없습니다: {fixture_dir}")
+
+    def name(self) -> str:
+        """현재 화면 이름"""
+        self._advance_timers()
+        if self.scenario is not None:
+            return self.current
+        if self.images:
+            return os.path.basename(self.images[self.index])
+        return "blank"
+
+    def _goto(self, name: str):
+        if name not in self.scenario['screens']:
+            print(f"[WARN] scenario에 없는 화면입니다: {name}")
+            return
+        self.current = name
+        self.entered_at = time.time()
+
+    def _advance_timers(self):
+        if self.scenario is None:
+            return
+        # 시간 경과 전환은 여러 단계가 연달아 일어날 수 있음
+        for _ in range(len(self.scenario['screens'])):
+            after = self.scenario['screens'][self.current].get('after')
+            if not after or time.time() - self.entered_at < after['seconds']:
+                return
+            entered = self.entered_at + after['seconds']
+            self._goto(after['goto'])
+            self.entered_at = entered
+
+    def on_event(self, event: Dict):
+        """
+        입력/앱 실행 이벤트로 화면 전환
+        :param event: {'tap': (x, y)} / {'key': name} / {'swipe': direction} / {'text': str} / {'launch': package}
+        """
+        if self.scenario is None:
+            if self.images and 'launch' not in event:
+                self.index = min(self.index + 1, len(self.images) - 1)
+            return
+        self._advance_timers()
+        if 'launch' in event:
+            target = self.scenario.get('launch', {}).get(event['launch'])
+            if target:
+                self._goto(target)
+            return
+        for rule in self.scenario['screens'][self.current].get('on', []):
+            if 'tap' in rule and 'tap' in event:
+                x1, y1, x2, y2 = rule['tap']
+                x, y = event['tap']
+                matched = x1 <= x <= x2 and y1 <= y <= y2
+            elif 'key' in rule and 'key' in event:
+                matched = _normalize_key(rule['key']) == event['key']
+            elif 'swipe' in rule and 'swipe' in event:
+                matched = rule['swipe'] == event['swipe']
+            elif 'text' in rule and 'text' in event:
+                matched = re.fullmatch(rule['text'], event['text']) is not None
+            else:
+                matched = False
+            if matched:
+                self._goto(rule['goto'])
+                return
+
+    def _image_path(self) -> Optional[str]:
+        name = self.name()
+        if self.scenario is not None:
+            return self.scenario['screens'][name]['image']
+        return self.images[self.index] if self.images else None
+
+    def png(self) -> bytes:
+        """현재 화면 PNG 바이트"""
+        path = self._image_path()
+        key = path or "blank"
+        if key not in self._png_cache:
+            if path is None:
+                buffer = io.BytesIO()
+                Image.new("RGB", (self.width, self.height), (32, 32, 32)).save(buffer, format="PNG")
+                self._png_cache[key] = buffer.getvalue()
+            else:
+                with open(path, "rb") as f:
+                    self._png_cache[key] = f.read()
+        return self._png_cache[key]
+
+    def raw(self) -> bytes:
+        """현재 화면 raw screencap 바이트 (width, height, RGBA_8888, colorspace 헤더 + 픽셀)"""
+        path = self._image_path()
+        key = path or "blank"
+        if key not in self._raw_cache:
+            image = Image.open(io.BytesIO(self.png())).convert("RGBA")
+            header = struct.pack("<IIII", image.width, image.height, 1, 0)
+            self._raw_cache[key] = header + image.tobytes()
+        return self._raw_cache[key]
+
+
+class FakeDevice:
+    """가짜 디바이스 하나의 상태 (화면, 포그라운드 앱, 프로세스, settings, 파일) 와 셸 명령 처리"""
+
+    def __init__(
+        self,
+        serial: str = "emulator-5554",
+        fixture_dir: Optional[str] = None,
+        size: Tuple[int, int] = (1080, 2400),
+        density: int = 420,
+        packages: Optional[List[str]] = None,
+        logger: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.serial = serial
+        self.width, self.height = size
+        self.density = density
+        self.rotation = 0
+        self.screens = Screens(fixture_dir, self.width, self.height)
+        self.packages = set(packages or []) | {"android", LAUNCHER[0]}
+        self.foreground = LAUNCHER
+        self.running: Dict[str, int] = {LAUNCHER[0]: 1200}
+        self.settings: Dict[Tuple[str, str], str] = {}
+        self.files: Dict[str, bytes] = {}
+        self.props = {
+            'sys.boot_completed': "1",
+            'ro.product.model': "FakeDevice",
+            'ro.build.version.sdk': "33",
+            'ro.build.version.release': "13",
+            'ro.serialno': serial,
+        }
+        self._next_pid = 2000
+        self._logger = logger
+
+    def log(self, service: str, command: str):
+        if self._logger:
+            self._logger({
+                'time': time.time(),
+                'serial': self.serial,
+                'service': service,
+                'command': command,
+                'screen': self.screens.name(),
+            })
+
+    # --- 셸 ---
+
+    async def run_script(self, script: str) -> Tuple[int, bytes]:
+        """
+        셸 스크립트 실행 (;, &&, ||, |, $?, /dev/null 리다이렉트 지원)
+        :return: (마지막 명령 returncode, stdout 바이트)
+        """
+        output = []
+        returncode = 0
+        for op, pipeline in _split_unquoted(script, ("&&", "||", ";", "\n")):
+            if (op == "&&" and returncode != 0) or (op == "||" and returncode == 0):
+                continue
+            pipeline = _DEV_NULL_REDIRECTS.sub("", pipeline.replace("$?", str(returncode)))
+            data = b""
+            for _, command in _split_unquoted(pipeline, ("|",)):
+                try:
+                    argv = shlex.split(command)
+                except ValueError:
+                    returncode, data = 2, f"/system/bin/sh: syntax error: {command}\n".encode("utf-8")
+                    break
+                returncode, data = await self.run_command(argv, data)
+            output.append(data)
+        return returncode, b"".join(output)
+
+    async def run_command(self, argv: List[str], stdin: bytes = b"") -> Tuple[int, bytes]:
+        """단일 명령 실행"""
+        if not argv:
+            return 0, b""
+        handler = getattr(self, f"_cmd_{argv[0].replace('-', '_')}", None)
+        if handler is None:
+            return 127, f"/system/bin/sh: {argv[0]}: inaccessible or not found\n".encode("utf-8")
+        result = handler(argv[1:], stdin)
+        if asyncio.iscoroutine(result):
+            result = await result
+        returncode, text = result
+        return returncode, text if isinstance(text, bytes) else text.encode("utf-8")
+
+    def _cmd_echo(self, args, stdin):
+        if args and args[0] == "-n":
+            return 0, " ".join(args[1:])
+        return 0, " ".join(args) + "\n"
+
+    def _cmd_true(self, args, stdin):
+        return 0, ""
+
+    def _cmd_false(self, args, stdin):
+        return 1, ""
+
+    async def _cmd_sleep(self, args, stdin):
+        await asyncio.sleep(float(args[0]) if args else 0)
+        return 0, ""
+
+    def _cmd_grep(self, args, stdin):
+        flags, max_count, invert, count_only, quiet, fixed = 0, None, False, False, False, False
+        pattern = None
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg == "-m":
+                max_count = int(args[i + 1])
+                i += 1
+            elif arg.startswith("-m") and arg[2:].isdigit():
+                max_count = int(arg[2:])
+            elif arg == "-e":
+                pattern = args[i + 1]
+                i += 1
+            elif arg.startswith("-") and len(arg) > 1 and pattern is None:
+                for opt in arg[1:]:
+                    flags |= re.IGNORECASE if opt == "i" else 0
+                    invert = invert or opt == "v"
+                    count_only = count_only or opt == "c"
+                    quiet = quiet or opt == "q"
+                    fixed = fixed or opt == "F"
+            elif pattern is None:
+                pattern = arg
+            i += 1
+        regex = re.compile(re.escape(pattern) if fixed else pattern, flags)
+        matches = []
+        for line in stdin.decode("utf-8", errors="replace").splitlines():
+            if bool(regex.search(line)) != invert:
+                matches.append(line)
+                if max_count is not None and len(matches) >= max_count:
+                    break
+        returncode = 0 if matches else 1
+        if quiet:
+            return returncode, ""
+        if count_only:
+            return returncode, f"{len(matches)}\n"
+        return returncode, "".join(line + "\n" for line in matches)
+
+    def _cmd_input(self, args, stdin):
+        if args and args[0] in ("touchscreen", "keyboard", "mouse", "touchpad", "dpad"):
+            args = args[1:]
+        if not args:
+            return 1, "Usage: input [<source>] <command> [<arg>...]\n"
+        action, params = args[0], args[1:]
+        if action == "tap" and len(params) >= 2:
+            self.screens.on_event({'tap': (float(params[0]), float(params[1]))})
+        elif action in ("swipe", "draganddrop") and len(params) >= 4:
+            x1, y1, x2, y2 = (float(p) for p in params[:4])
+            self.screens.on_event({'swipe': _swipe_direction(x1, y1, x2, y2)})
+        elif action == "keyevent" and params:
+            for key in params:
+                if key.startswith("--"):
+                    continue
+                name = _normalize_key(key)
+                if name == "HOME":
+                    self.foreground = LAUNCHER
+                self.screens.on_event({'key': name})
+        elif action == "text" and params:
+            self.screens.on_event({'text': " ".join(params).replace("%s", " ")})
+        else:
+            return 1, f"Error: Unknown command: {action}\n"
+        return 0, ""
+
+    def _cmd_wm(self, args, stdin):
+        if args[:1] == ["size"]:
+            if len(args) > 1 and args[1] != "reset":
+                self.width, self.height = (int(v) for v in args[1].split("x"))
+                return 0, ""
+            return 0, f"Physical size: {self.width}x{self.height}\n"
+        if args[:1] == ["density"]:
+            return 0, f"Physical density: {self.density}\n"
+        return 1, "Error: unknown wm command\n"
+
+    def _focus_component(self) -> str:
+        package, activity = self.foreground
+        return f"{package}/{activity}"
+
+    def _cmd_dumpsys(self, args, stdin):
+        service = args[0] if args else ""
+        if service == "window":
+            component = self._focus_component()
+            return 0, (
+                "WINDOW MANAGER WINDOWS (dumpsys window windows)\n"
+                f"  mCurrentFocus=Window{{1a2b3c u0 {component}}}\n"
+                f"  mFocusedApp=ActivityRecord{{4d5e6f u0 {component} t12}}\n"
+            )
+        if service == "input":
+            return 0, (
+                "INPUT MANAGER (dumpsys input)\n"
+                f"    SurfaceOrientation: {self.rotation}\n"
+                f"    SurfaceWidth: {self.width}px\n"
+                f"    SurfaceHeight: {self.height}px\n"
+            )
+        if service == "activity":
+            component = self._focus_component()
+            return 0, (
+                "ACTIVITY MANAGER ACTIVITIES (dumpsys activity activities)\n"
+                f"    mResumedActivity: ActivityRecord{{4d5e6f u0 {component} t12}}\n"
+                f"  ResumedActivity: ActivityRecord{{4d5e6f u0 {component} t12}}\n"
+            )
+        return 0, ""
+
+    def _cmd_getprop(self, args, stdin):
+        if args:
+            return 0, self.props.get(args[0], "") + "\n"
+        return 0, "".join(f"[{key}]: [{value}]\n" for key, value in sorted(self.props.items()))
+
+    def _cmd_setprop(self, args, stdin):
+        self.props[args[0]] = args[1] if len(args) > 1 else ""
+        return 0, ""
+
+    def _cmd_pidof(self, args, stdin):
+        pids = [str(self.running[name]) for name in args if name in self.running]
+        return (0, " ".join(pids) + "\n") if pids else (1, "")
+
+    def _launch(self, package: str, activity: Optional[str] = None):
+        if package not in self.running:
+            self.running[package] = self._next_pid
+            self._next_pid += 1
+        if activity is None:
+            activity = f"{package}.MainActivity"
+        elif activity.startswith("."):
+            activity = package + activity
+        self.foreground = (package, activity)
+        self.screens.on_event({'launch': package})
+
+    def _cmd_am(self, args, stdin):
+        action = args[0] if args else ""
+        if action in ("start", "start-activity"):
+            if "-n" not in args:
+                return 1, "Error: fake adb server only supports am start -n <component>\n"
+            component = args[args.index("-n") + 1]
+            package, _, activity = component.partition("/")
+            if package not in self.packages:
+                return 1, f"Error: Activity class {{{component}}} does not exist.\n"
+            self._launch(package, activity or None)
+            return 0, f"Starting: Intent {{ cmp={component} }}\n"
+        if action in ("force-stop", "kill") and len(args) > 1:
+            package = args[-1]
+            self.running.pop(package, None)
+            if self.foreground[0] == package:
+                self.foreground = LAUNCHER
+            return 0, ""
+        return 1, f"Error: unknown am command: {action}\n"
+
+    def _cmd_monkey(self, args, stdin):
+        if "-p" not in args:
+            return 1, "** No activities found to run, monkey aborted.\n"
+        package = args[args.index("-p") + 1]
+        if package not in self.packages:
+            return 1, "** No activities found to run, monkey aborted.\n"
+        self._launch(package)
+        return 0, "Events injected: 1\n"
+
+    def _cmd_settings(self, args, stdin):
+        if len(args) >= 4 and args[0] == "put":
+            self.settings[(args[1], args[2])] = args[3]
+            return 0, ""
+        if len(args) >= 3 and args[0] == "get":
+            return 0, self.settings.get((args[1], args[2]), "null") + "\n"
+        return 1, "usage: settings [--user <USER_ID>] get|put|delete|list NAMESPACE [KEY [VALUE]]\n"
+
+    def _cmd_pm(self, args, stdin):
+        if args[:1] == ["path"] and len(args) > 1:
+            if args[1] == "android":
+                return 0, "package:/system/framework/framework-res.apk\n"
+            if args[1] in self.packages:
+                return 0, f"package:/data/app/{args[1]}/base.apk\n"
+            return 1, ""
+        if args[:2] == ["list", "packages"]:
+            return 0, "".join(f"package:{name}\n" for name in sorted(self.packages))
+        return 1, "Error: unknown pm command\n"
+
+    def _cmd_screencap(self, args, stdin):
+        png = "-p" in args
+        paths = [arg for arg in args if not arg.startswith("-")]
+        if paths:
+            # 파일 확장자가 .png이면 -p 없이도 PNG로 저장됨
+            png = png or paths[0].endswith(".png")
+            self.files[paths[0]] = self.screens.png() if png else self.screens.raw()
+            return 0, ""
+        return 0, self.screens.png() if png else self.screens.raw()
+
+    async def _cmd_screenrecord(self, args, stdin):
+        # 영상 인코더가 없으므로 녹화 시간만 흉내 내고, fixture의 record.mp4(없으면 최소 mp4 헤더)를 결과로 남김
+        limit = 180.0
+        for arg in args:
+            if arg.startswith("--time-limit="):
+                limit = float(arg.split("=", 1)[1])
+        paths = [arg for arg in args if not arg.startswith("-") or arg == "-"]
+        try:
+            await asyncio.sleep(limit)
+        finally:
+            if paths and paths[-1] != "-":
+                self.files[paths[-1]] = self.screens.record
+        # "-"(stdout) 출력은 시간 제한까지 녹화했을 때 한 번에 보냄
+        return 0, self.screens.record if paths and paths[-1] == "-" else b""
+
+    def _cmd_rm(self, args, stdin):
+        paths = [arg for arg in args if not arg.startswith("-")]
+        missing = [path for path in paths if self.files.pop(path, None) is None]
+        if missing and "-f" not in args:
+            return 1, "".join(f"rm: {path}: No such file or directory\n" for path in missing)
+        return 0, ""
+
+    def _cmd_cat(self, args, stdin):
+        if not args:
+            return 0, stdin
+        if args[0] not in self.files:
+            return 1, f"cat: {args[0]}: No such file or directory\n"
+        return 0, self.files[args[0]]
+
+    def _cmd_ls(self, args, stdin):
+        paths = [arg for arg in args if not arg.startswith("-")] or ["/sdcard"]
+        names = [path for path in self.files if any(path == p or path.startswith(p.rstrip("/") + "/") for p in paths)]
+        return 0, "".join(name + "\n" for name in sorted(names))
+
+
+class FakeAdbServer:
+    """
+    FakeDevice들을 adb 서버 프로토콜(host:*, host:transport*, shell:, exec:, sync:)로 제공하는 asyncio 서버
+    """
+
+    def __init__(
+        self,
+        devices: Optional[List[FakeDevice]] = None,
+        host: str = "127.0.0.1",
+        port: int = 5038,
+        log_path: Optional[str] = None,
+        verbose: bool = True,
+    ):
+        self.host = host
+        self.port = port
+        self.log_path = log_path
+        self.verbose = verbose
+        self.command_log: List[Dict] = []
+        self.devices: List[FakeDevice] = devices or [FakeDevice()]
+        for device in self.devices:
+            device._logger = self._log
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._log_lock = threading.Lock()
+
+    # --- 로그 ---
+
+    def _log(self, entry: Dict):
+        with self._log_lock:
+            self.command_log.append(entry)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if self.verbose:
+            stamp = time.strftime("%H:%M:%S", time.localtime(entry['time'])) + f".{int(entry['time'] * 1000) % 1000:03d}"
+            screen = f" (screen={entry['screen']})" if entry.get('screen') else ""
+            print(f"[FAKE-ADB {stamp}] {entry.get('serial') or '-'} {entry['service']}: {entry['command']}{screen}")
+
+    # --- 프로토콜 ---
+
+    @staticmethod
+    def _okay(writer: asyncio.StreamWriter, payload: Optional[bytes] = None):
+        writer.write(b"OKAY")
+        if payload is not None:
+            writer.write(b"%04x" % len(payload) + payload)
+
+    @staticmethod
+    def _fail(writer: asyncio.StreamWriter, message: str):
+        data = message.encode("utf-8")
+        writer.write(b"FAIL" + b"%04x" % len(data) + data)
+
+    def _device_list(self, long: bool = False) -> bytes:
+        lines = []
+        for idx, device in enumerate(self.devices, start=1):
+            line = f"{device.serial}\tdevice"
+            if long:
+                line = f"{device.serial:<22} device product:fake model:{device.props['ro.product.model']} device:fake transport_id:{idx}"
+            lines.append(line + "\n")
+        return "".join(lines).encode("utf-8")
+
+    def _find_device(self, selector: str) -> Optional[FakeDevice]:
+        if selector in ("any", "usb", "local"):
+            return self.devices[0] if self.devices else None
+        if selector.startswith("id:"):
+            idx = int(selector[3:]) - 1
+            return self.devices[idx] if 0 <= idx < len(self.devices) else None
+        return next((d for d in self.devices if d.serial == selector), None)
+
+    def _split_host_prefix(self, request: str) -> Tuple[Optional[str], str]:
+        """host-serial:<serial>:cmd / host-transport-id:<id>:cmd / host:cmd → (선택자, cmd)"""
+        if request.startswith("host-serial:"):
+            rest = request[len("host-serial:"):]
+            # 시리얼에 ':'가 들어갈 수 있으므로(localhost:6520) 알려진 시리얼을 먼저 찾음
+            for device in self.devices:
+                if rest.startswith(device.serial + ":"):
+                    return device.serial, rest[len(device.serial) + 1:]
+            serial, _, command = rest.rpartition(":")
+            return serial, command
+        if request.startswith("host-transport-id:"):
+            transport_id, _, command = request[len("host-transport-id:"):].partition(":")
+            return f"id:{transport_id}", command
+        for prefix, selector in (("host-usb:", "usb"), ("host-local:", "local"), ("host:", None)):
+            if request.startswith(prefix):
+                return selector, request[len(prefix):]
+        return None, request
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[str]:
+        try:
+            length = int(await reader.readexactly(4), 16)
+            return (await reader.readexactly(length)).decode("utf-8", errors="replace")
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            return None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        device: Optional[FakeDevice] = None
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    return
+                if device is not None:
+                    await self._device_service(device, request, reader, writer)
+                    return
+                self._log({'time': time.time(), 'serial': None, 'service': "host", 'command': request})
+                selector, command = self._split_host_prefix(request)
+
+                if command.startswith("transport") or command.startswith("tport:"):
+                    if command.startswith("tport:"):
+                        target = command[len("tport:"):]
+                        target = target[len("serial:"):] if target.startswith("serial:") else target
+                    elif command.startswith("transport:"):
+                        target = command[len("transport:"):]
+                    elif command.startswith("transport-id:"):
+                        target = "id:" + command[len("transport-id:"):]
+                    else:
+                        target = command[len("transport-"):] if command.startswith("transport-") else "any"
+                    device = self._find_device(target)
+                    if device is None:
+                        self._fail(writer, f"device '{target}' not found")
+                        return
+                    writer.write(b"OKAY")
+                    if command.startswith("tport:"):
+                        writer.write(struct.pack("<Q", self.devices.index(device) + 1))
+                    await writer.drain()
+                    continue
+
+                target = self._find_device(selector) if selector else None
+                if selector and target is None:
+                    self._fail(writer, f"device '{selector}' not found")
+                elif command == "version":
+                    self._okay(writer, b"%04x" % ADB_SERVER_VERSION)
+                elif command in ("features", "host-features"):
+                    self._okay(writer, b"")
+                elif command in ("devices", "devices-l"):
+                    self._okay(writer, self._device_list(long=command == "devices-l"))
+                elif command in ("track-devices", "track-devices-l"):
+                    self._okay(writer, self._device_list(long=command == "track-devices-l"))
+                    await writer.drain()
+                    # 디바이스 목록은 바뀌지 않으므로 클라이언트가 닫을 때까지 유지
+                    await reader.read()
+                    return
+                elif command == "get-state":
+                    self._okay(writer, b"device")
+                elif command == "get-serialno":
+                    self._okay(writer, (target or self.devices[0]).serial.encode("utf-8"))
+                elif command.startswith("wait-for-"):
+                    writer.write(b"OKAY")
+                    self._okay(writer)
+                elif command.startswith("connect:"):
+                    address = command[len("connect:"):]
+                    known = self._find_device(address) is not None
+                    message = f"already connected to {address}" if known else f"failed to connect to '{address}': Connection refused"
+                    self._okay(writer, message.encode("utf-8"))
+                elif command.startswith("disconnect"):
+                    self._okay(writer, b"")
+                elif command == "kill":
+                    self._okay(writer)
+                    await writer.drain()
+                    self._server.close()
+                    return
+                else:
+                    self._fail(writer, f"unknown host service: {request}")
+                await writer.drain()
+                return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _until_closed(self, coro, reader: asyncio.StreamReader):
+        """클라이언트가 연결을 닫으면 실행 중인 명령을 취소 (예: adb 프로세스 종료 시 screenrecord 중단)"""
+        task = asyncio.ensure_future(coro)
+        eof = asyncio.ensure_future(reader.read())
+        done, _ = await asyncio.wait({task, eof}, return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            eof.cancel()
+            return task.result()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return None
+
+    async def _device_service(self, device: FakeDevice, service: str, reader, writer):
+        if service.startswith("shell:") or service.startswith("exec:"):
+            command = service.split(":", 1)[1]
+            writer.write(b"OKAY")
+            if service.startswith("shell:") and not command.strip():
+                await self._interactive_shell(device, reader, writer)
+                return
+            device.log("shell" if service.startswith("shell:") else "exec", command)
+            result = await self._until_closed(device.run_script(command), reader)
+            if result is not None:
+                writer.write(result[1])
+                await writer.drain()
+        elif service == "sync:":
+            writer.write(b"OKAY")
+            await writer.drain()
+            await self._sync(device, reader, writer)
+        else:
+            self._fail(writer, f"unsupported device service: {service}")
+            await writer.drain()
+
+    async def _interactive_shell(self, device: FakeDevice, reader, writer):
+        # pty 없는 셸처럼 프롬프트/에코 없이 줄 단위로 실행 (AdbShellSession이 이 방식으로 명령을 보냄)
+        await writer.drain()
+        buffer = b""
+        last_rc = 0
+        while True:
+            chunk = await reader.read(4096)
+            if not chunk:
+                return
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                command = line.decode("utf-8", errors="replace").strip()
+                if command == "exit":
+                    return
+                if not command:
+                    continue
+                device.log("shell", command)
+                last_rc, output = await device.run_script(command.replace("$?", str(last_rc)))
+                writer.write(output)
+                await writer.drain()
+
+    async def _sync(self, device: FakeDevice, reader, writer):
+        while True:
+            try:
+                header = await reader.readexactly(8)
+            except asyncio.IncompleteReadError:
+                return
+            kind, length = header[:4], struct.unpack("<I", header[4:])[0]
+            if kind == b"QUIT":
+                return
+            path = (await reader.readexactly(length)).decode("utf-8", errors="replace")
+            device.log("sync", f"{kind.decode()} {path}")
+            if kind == b"STAT":
+                data = device.files.get(path)
+                if data is None:
+                    writer.write(b"STAT" + struct.pack("<III", 0, 0, 0))
+                else:
+                    writer.write(b"STAT" + struct.pack("<III", 0o100644, len(data), int(time.time())))
+            elif kind == b"LIST":
+                writer.write(b"DONE" + struct.pack("<IIII", 0, 0, 0, 0))
+            elif kind == b"RECV":
+                data = device.files.get(path)
+                if data is None:
+                    message = f"remote object '{path}' does not exist".encode("utf-8")
+                    writer.write(b"FAIL" + struct.pack("<I", len(message)) + message)
+                else:
+                    for offset in range(0, len(data), SYNC_CHUNK_SIZE):
+                        chunk = data[offset:offset + SYNC_CHUNK_SIZE]
+                        writer.write(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                    writer.write(b"DONE" + struct.pack("<I", 0))
+            elif kind == b"SEND":
+                remote = path.rsplit(",", 1)[0]
+                chunks = []
+                while True:
+                    sub = await reader.readexactly(8)
+                    sub_kind, sub_length = sub[:4], struct.unpack("<I", sub[4:])[0]
+                    if sub_kind == b"DATA":
+                        chunks.append(await reader.readexactly(sub_length))
+                    else:
+                        break
+                device.files[remote] = b"".join(chunks)
+                writer.write(b"OKAY" + struct.pack("<I", 0))
+            else:
+                message = f"unsupported sync request: {kind!r}".encode("utf-8")
+                writer.write(b"FAIL" + struct.pack("<I", len(message)) + message)
+            await writer.drain()
+
+    # --- 실행 ---
+
+    async def start(self) -> "FakeAdbServer":
+        """현재 이벤트 루프에서 서버 시작"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"[INFO] 가짜 adb 서버 시작: {self.host}:{self.port} (디바이스: {[d.serial for d in self.devices]})")
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    def start_in_thread(self) -> "FakeAdbServer":
+        """
+        백그라운드 스레드의 이벤트 루프에서 서버 시작 (같은 프로세스에서 util 함수를 실행/프로파일링할 때)
+        port=0이면 빈 포트를 사용하고, 시작 후 self.port에 실제 포트가 들어간다.
+        """
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="fake-adb-server", daemon=True)
+        self._thread.start()
+        started.wait(timeout=10)
+        return self
+
+    def stop(self):
+        """start_in_thread로 띄운 서버 종료"""
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="테스트/벤치마크용 가짜 adb 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5038, help="서버 포트 (ANDROID_ADB_SERVER_PORT로 지정해서 사용)")
+    parser.add_argument("--fixtures", help="화면 PNG 또는 scenario.json이 있는 폴더")
+    parser.add_argument("--serial", action="append", help="디바이스 시리얼 (여러 번 지정 가능)")
+    parser.add_argument("--size", default="1080x2400", help="화면 해상도 WxH")
+    parser.add_argument("--density", type=int, default=420)
+    parser.add_argument("--package", action="append", default=[], help="설치된 것으로 취급할 앱 패키지")
+    parser.add_argument("--log", help="명령 로그(JSON lines) 파일 경로")
+    parser.add_argument("--quiet", action="store_true", help="명령 로그를 화면에 출력하지 않음")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    devices = [
+        FakeDevice(serial, args.fixtures, (width, height), args.density, args.package)
+        for serial in (args.serial or ["emulator-5554"])
+    ]
+    server = FakeAdbServer(devices, args.host, args.port, args.log, verbose=not args.quiet)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Union
+
+import cv2
+import numpy
+from PIL import Image
+
+
+@dataclass
+class Frame:
+    """
+    메모리에 디코딩된 화면 캡처 한 장
+    :image: RGB numpy 배열 (H, W, 3)
+    :timestamp: 캡처 시각 (time.time())
+    :serial: 캡처한 디바이스 시리얼
+    :source: 캡처 방식 (exec-out, pull 등)
+    :generation: 캡처 시작 시점의 입력 세대 번호 (get_input_generation)
+    """
+    image: numpy.ndarray
+    timestamp: float = field(default_factory=time.time)
+    serial: Optional[str] = None
+    source: str = ""
+    generation: int = 0
+
+    @property
+    def width(self) -> int:
+        return self.image.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.image.shape[0]
+
+    @property
+    def resolution(self):
+        return self.width, self.height
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def to_bgr(self) -> numpy.ndarray:
+        """OpenCV용 BGR 배열 반환"""
+        return cv2.cvtColor(self.image, cv2.COLOR_RGB2BGR)
+
+    def to_gray(self) -> numpy.ndarray:
+        """Grayscale 배열 반환"""
+        return cv2.cvtColor(self.image, cv2.COLOR_RGB2GRAY)
+
+    def save(self, path: str) -> str:
+        """
+        프레임을 이미지 파일로 저장 (한글 경로 지원)
+        :param path: 저장할 파일 경로
+        :return: 저장된 파일 경로
+        """
+        Image.fromarray(self.image).save(path)
+        return path
+
+
+def decode_png(data: bytes) -> numpy.ndarray:
+    """
+    PNG 바이트를 RGB numpy 배열로 디코딩
+    :param data: PNG 바이트
+    :return: RGB numpy 배열 (H, W, 3)
+    """
+    img = cv2.imdecode(numpy.frombuffer(data, dtype=numpy.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise Exception("스크린샷 데이터가 손상되었거나 디코딩할 수 없습니다.")
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+# screencap raw 출력의 픽셀 포맷 (android PixelFormat) → (bytes per pixel, RGB 변환 코드)
+RAW_PIXEL_FORMATS = {
+    1: (4, cv2.COLOR_RGBA2RGB),    # RGBA_8888
+    2: (4, cv2.COLOR_RGBA2RGB),    # RGBX_8888
+    4: (2, cv2.COLOR_BGR5652RGB),  # RGB_565
+    5: (4, cv2.COLOR_BGRA2RGB),    # BGRA_8888
+}
+
+
+def decode_raw_screencap(data: bytes) -> numpy.ndarray:
+    """
+    `screencap` (-p 없이) raw 출력을 RGB numpy 배열로 변환
+    헤더는 width, height, format (+ Android 9 이상은 colorspace) 의 little-endian uint32이고
+    뒤따르는 픽셀 버퍼는 복사 없이 numpy 배열로 감싼 뒤 채널 변환만 한다.
+    :param data: screencap raw 바이트
+    :return: RGB numpy 배열 (H, W, 3)
+    """
+    if len(data) < 12:
+        raise Exception("screencap raw 데이터가 너무 짧습니다.")
+    width, height, pixel_format = struct.unpack_from("<III", data, 0)
+    if pixel_format not in RAW_PIXEL_FORMATS:
+        raise Exception(f"지원하지 않는 screencap 픽셀 포맷입니다: {pixel_format}")
+    bpp, color_code = RAW_PIXEL_FORMATS[pixel_format]
+    pixel_bytes = width * height * bpp
+    for header_size in (16, 12):
+        if len(data) - header_size == pixel_bytes:
+            break
+    else:
+        raise Exception(
+            f"screencap raw 데이터 크기가 맞지 않습니다. ({len(data)} bytes, {width}x{height}, format={pixel_format})"
+        )
+    pixels = numpy.frombuffer(data, dtype=numpy.uint8, count=pixel_bytes, offset=header_size)
+    return cv2.cvtColor(pixels.reshape(height, width, bpp), color_code)
+
+
+def to_rgb_array(image: Union[str, Frame, numpy.ndarray]) -> numpy.ndarray:
+    """
+    이미지 경로, Frame, numpy 배열 중 무엇이 와도 RGB 배열로 변환
+    :param image: 이미지 파일 경로 / Frame / RGB numpy 배열
+    :return: RGB numpy 배열 (H, W, 3)
+    """
+    if isinstance(image, Frame):
+        return image.image
+    if isinstance(image, numpy.ndarray):
+        return image
+    with Image.open(image) as img:
+        return numpy.array(img.convert("RGB"))
+
+
+# 입력(탭/키/스와이프)이 디바이스에 보내질 때마다 증가하는 세대 번호
+_input_generation = 0
+_last_input_time = 0.0
+_generation_lock = threading.Lock()
+# 시리얼별 마지막 캡처 프레임
+_frame_cache: Dict[Optional[str], Frame] = {}
+
+
+def bump_input_generation() -> int:
+    """
+    화면을 바꿀 수 있는 입력을 보낸 뒤 호출하여 세대 번호를 올리고 캐시된 프레임을 무효화
+    :return: 새 세대 번호
+    """
+    global _input_generation, _last_input_time
+    with _generation_lock:
+        _input_generation += 1
+        _last_input_time = time.time()
+        return _input_generation
+
+
+def get_input_generation() -> int:
+    """현재 입력 세대 번호 반환"""
+    return _input_generation
+
+
+def get_last_input_time() -> float:
+    """마지막 입력 시각 반환 (time.time(), 입력이 없었으면 0.0)"""
+    return _last_input_time
+
+
+def cache_frame(frame: Frame):
+    """캡처한 프레임을 시리얼별 캐시에 저장"""
+    _frame_cache[frame.serial] = frame
+
+
+def get_cached_frame(serial: Optional[str], max_age: float) -> Optional[Frame]:
+    """
+    캡처 이후 입력이 없었고 max_age초보다 젊은 프레임이 있으면 반환
+    :param serial: 디바이스 시리얼
+    :param max_age: 허용할 최대 프레임 나이(초), 0 이하면 캐시 사용 안 함
+    :return: 캐시된 Frame 또는 None
+    """
+    if max_age is None or max_age <= 0:
+        return None
+    frame = _frame_cache.get(serial)
+    if frame is None:
+        return None
+    if frame.generation != _input_generation or frame.age > max_age:
+        return None
+    return frame
+
+
+def clear_frame_cache():
+    """프레임 캐시 비우기"""
+    _frame_cache.clear()
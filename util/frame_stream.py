@@ -0,0 +1,177 @@
+import collections
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+from util.dynamic_data import load_data
+from util.frame import Frame, decode_raw_screencap, get_input_generation
+
+# 시리얼별로 실행 중인 스트리머
+_streamers: Dict[Optional[str], "FrameStreamer"] = {}
+
+# screenrecord는 한 번에 최대 180초까지만 녹화하므로 그 전에 재시작
+SCREENRECORD_TIME_LIMIT = 170
+
+
+class FrameStreamer:
+    """
+    백그라운드 스레드에서 화면을 계속 받아 최근 프레임을 링 버퍼에 보관
+    - h264: `exec-out screenrecord --output-format=h264 -` 스트림을 PyAV로 디코딩
+    - screencap: `exec-out screencap` raw 캡처를 반복 (PyAV가 없을 때 대체 경로)
+    """
+
+    def __init__(
+        self,
+        serial: Optional[str] = None,
+        adb_path: str = "adb",
+        buffer_size: int = 8,
+        source: str = "h264",
+        bit_rate: int = 4000000,
+    ):
+        self.serial = serial
+        self.adb_path = adb_path
+        self.source = source
+        self.bit_rate = bit_rate
+        self._buffer: "collections.deque[Frame]" = collections.deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._proc: Optional[subprocess.Popen] = None
+
+    def _adb_base(self) -> List[str]:
+        cmd = [self.adb_path]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        return cmd
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """캡처 스레드 시작"""
+        if self.is_running:
+            return
+        if self.source == "h264":
+            try:
+                import av  # noqa: F401
+            except ImportError:
+                print("[WARN] PyAV(av)가 설치되어 있지 않아 h264 스트림을 디코딩할 수 없습니다 (pip install .[stream]). screencap 반복 캡처로 대체합니다.")
+                self.source = "screencap"
+        self._stop.clear()
+        target = self._h264_loop if self.source == "h264" else self._screencap_loop
+        self._thread = threading.Thread(target=target, name=f"frame-stream-{self.serial or 'default'}", daemon=True)
+        self._thread.start()
+        print(f"[INFO] 백그라운드 화면 스트림 시작 ({self.source})")
+
+    def stop(self):
+        """캡처 스레드 종료"""
+        self._stop.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+        print("[INFO] 백그라운드 화면 스트림 종료")
+
+    def _push(self, image):
+        frame = Frame(image, serial=self.serial, source=f"stream-{self.source}", generation=get_input_generation())
+        with self._cond:
+            self._buffer.append(frame)
+            self._cond.notify_all()
+
+    def _h264_loop(self):
+        import av
+        while not self._stop.is_set():
+            cmd = self._adb_base() + [
+                "exec-out", "screenrecord",
+                "--output-format=h264",
+                f"--bit-rate={self.bit_rate}",
+                f"--time-limit={SCREENRECORD_TIME_LIMIT}",
+                "-",
+            ]
+            self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            try:
+                with av.open(self._proc.stdout, format="h264", mode="r") as container:
+                    for video_frame in container.decode(video=0):
+                        if self._stop.is_set():
+                            break
+                        self._push(video_frame.to_ndarray(format="rgb24"))
+            except Exception as e:
+                if not self._stop.is_set():
+                    print(f"[WARN] h264 스트림 디코딩 오류: {e}")
+            finally:
+                if self._proc.poll() is None:
+                    self._proc.terminate()
+            # 시간 제한 또는 연결 끊김으로 종료되면 잠시 후 재시작
+            if not self._stop.is_set():
+                time.sleep(0.2)
+
+    def _screencap_loop(self):
+        while not self._stop.is_set():
+            proc = subprocess.run(self._adb_base() + ["exec-out", "screencap"], stdout=subprocess.PIPE)
+            try:
+                self._push(decode_raw_screencap(proc.stdout))
+            except Exception as e:
+                print(f"[WARN] 스트림 screencap 실패: {e}")
+                self._stop.wait(0.5)
+
+    def frames(self) -> List[Frame]:
+        """링 버퍼의 프레임 목록 (오래된 순)"""
+        with self._cond:
+            return list(self._buffer)
+
+    def latest(self, newer_than: float = 0.0, timeout: float = 0.0) -> Optional[Frame]:
+        """
+        가장 최근 프레임 반환
+        :param newer_than: 이 시각(time.time()) 이후에 받은 프레임을 기다림
+        :param timeout: 새 프레임을 기다릴 최대 시간(초)
+        :return: Frame 또는 None (시간 안에 newer_than 이후 프레임이 오지 않았을 때)
+                 screenrecord는 화면이 바뀔 때만 프레임을 보내므로, 입력 전 프레임은 입력 결과를 반영하는지
+                 알 수 없어 돌려주지 않는다. (None이면 capture_frame이 screencap으로 새로 캡처)
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                if self._buffer and self._buffer[-1].timestamp >= newer_than:
+                    return self._buffer[-1]
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.is_running:
+                    return None
+                self._cond.wait(remaining)
+
+
+def start_frame_stream(serial: Optional[str] = None, **kwargs) -> FrameStreamer:
+    """
+    디바이스 화면 스트림을 시작하고 capture_frame이 이 스트림의 최신 프레임을 쓰도록 등록
+    :param serial: 디바이스 시리얼 (None이면 dynamic_data의 device_info)
+    :param kwargs: FrameStreamer 추가 인자 (buffer_size, source, bit_rate, adb_path)
+    :return: FrameStreamer
+    """
+    if serial is None:
+        serial = load_data('device_info')
+    streamer = _streamers.get(serial)
+    if streamer is None or not streamer.is_running:
+        streamer = FrameStreamer(serial, **kwargs)
+        streamer.start()
+        _streamers[serial] = streamer
+    return streamer
+
+
+def stop_frame_stream(serial: Optional[str] = None):
+    """화면 스트림 종료"""
+    if serial is None:
+        serial = load_data('device_info')
+    streamer = _streamers.pop(serial, None)
+    if streamer is not None:
+        streamer.stop()
+
+
+def get_frame_stream(serial: Optional[str] = None) -> Optional[FrameStreamer]:
+    """실행 중인 화면 스트림 반환 (없으면 None)"""
+    streamer = _streamers.get(serial)
+    if streamer is not None and streamer.is_running:
+        return streamer
+    return None
@@ -0,0 +1,279 @@
+"""
+스크롤/부분 변경 화면의 증분 OCR
+
+이전 화면의 OCR 결과가 있으면 새 화면과 비교하여
+- 그대로인 줄(고정 헤더/푸터 등)의 단어는 그대로,
+- 스크롤로 밀려난 줄의 단어는 스크롤 양만큼 박스를 옮겨 재사용하고,
+- 새로 나타났거나 바뀐 가로 띠 영역만 다시 OCR한다.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy
+
+from util.ocr_engine import TSV_COLUMNS
+from util.ocr_search import preprocess_step
+from util.text_matcher import token_windows
+from util.text_regions import ocr_regions
+
+# h264 스트림/압축 노이즈로 보는 픽셀 차이
+PIXEL_NOISE = 12
+# 한 줄에서 이 비율 이상의 픽셀이 다르면 바뀐 줄
+ROW_CHANGED_RATIO = 0.01
+# 바뀐 줄이 화면의 이 비율을 넘으면 전체 OCR이 더 나음
+MAX_DIRTY_RATIO = 0.6
+# 바뀐 띠 영역 여백과, 글자가 잘리지 않도록 위아래로 늘릴 수 있는 최대 길이(px)
+BAND_PADDING = 8
+BAND_MAX_EXTEND = 64
+# 원본 해상도에서 다시 비교할 스크롤 후보 수
+SCROLL_CANDIDATES = 3
+
+Band = Tuple[int, int]
+
+
+def _changed_rows(a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+    """같은 크기 두 Grayscale 이미지의 줄별 변경 여부 (bool 배열)"""
+    diff = cv2.absdiff(a, b) > PIXEL_NOISE
+    return diff.mean(axis=1) > ROW_CHANGED_RATIO
+
+
+def _ink_rows(gray: numpy.ndarray) -> numpy.ndarray:
+    """글자/무늬가 있는 줄 (밝기 범위가 큰 줄)"""
+    return (gray.max(axis=1).astype(numpy.int16) - gray.min(axis=1)) > 40
+
+
+RowMask = Tuple[numpy.ndarray, numpy.ndarray]
+
+
+def _shift_error(prev: numpy.ndarray, cur: numpy.ndarray, prev_mask: RowMask, cur_mask: RowMask, dy: int, min_rows: int) -> float:
+    """
+    cur[y]와 prev[y + dy]의 평균 차이
+    :param prev_mask: prev의 (고정되지 않은 줄, 글자가 있는 줄)
+    :param cur_mask: cur의 (고정되지 않은 줄, 글자가 있는 줄)
+    """
+    h = prev.shape[0]
+    lo, hi = max(0, -dy), min(h, h - dy)
+    if hi - lo <= 0:
+        return float("inf")
+    prev_moving, prev_ink = prev_mask[0][lo + dy:hi + dy], prev_mask[1][lo + dy:hi + dy]
+    cur_moving, cur_ink = cur_mask[0][lo:hi], cur_mask[1][lo:hi]
+    # 고정된 줄(헤더 등)은 어느 쪽이든 제외하고, 양쪽 다 빈 줄은 어떤 dy에서도 같아 보이므로 제외
+    rows = prev_moving & cur_moving & (prev_ink | cur_ink)
+    if int(rows.sum()) < min_rows:
+        return float("inf")
+    return float(cv2.absdiff(cur[lo:hi][rows], prev[lo + dy:hi + dy][rows]).mean())
+
+
+def estimate_scroll(prev: numpy.ndarray, cur: numpy.ndarray, static: Optional[numpy.ndarray] = None) -> Optional[int]:
+    """
+    세로 스크롤 양 추정 (cur[y] == prev[y + dy]가 되는 dy, 위로 스와이프하면 양수)
+    같은 위치에서 그대로인 줄(고정 헤더 등)은 빼고 1/4 축소 이미지에서 모든 dy를 비교한 뒤,
+    오차가 작은 후보 몇 개만 원본 해상도에서 다시 비교한다.
+    이전 화면은 시작 줄을 0~3px 밀어 네 번 축소해 두므로 dy가 4의 배수가 아니어도 정확히 맞춰 비교되고,
+    목록처럼 비슷한 줄이 반복되는 화면에서도 반복 주기만큼 어긋난 위치를 고르지 않는다.
+    :param static: 줄별 고정 여부 (None이면 계산)
+    :return: dy (추정할 수 없으면 None)
+    """
+    h, w = prev.shape[:2]
+    if static is None:
+        static = ~_changed_rows(prev, cur)
+    scale = 4
+    sh, sw = (h - scale) // scale, max(w // scale, 1)
+    if sh < 8:
+        return None
+    min_rows = max(sh // 16, 4)
+
+    def small(gray: numpy.ndarray, phase: int) -> Tuple[numpy.ndarray, RowMask]:
+        # phase줄부터 scale줄씩 묶어 축소 (묶음 안에 바뀐 줄이 하나라도 있으면 고정되지 않은 줄)
+        image = cv2.resize(gray[phase:phase + sh * scale], (sw, sh), interpolation=cv2.INTER_AREA)
+        moving = ~static[phase:phase + sh * scale].reshape(sh, scale).all(axis=1)
+        return image, (moving, _ink_rows(image))
+
+    small_cur, small_cur_mask = small(cur, 0)
+    errors: Dict[int, float] = {}
+    for phase in range(scale):
+        small_prev, small_prev_mask = small(prev, phase)
+        for shift in range(-(sh - min_rows), sh - min_rows + 1):
+            dy = shift * scale + phase
+            if dy:
+                errors[dy] = _shift_error(small_prev, small_cur, small_prev_mask, small_cur_mask, shift, min_rows)
+
+    candidates: List[int] = []
+    for dy in sorted(errors, key=lambda dy: (errors[dy], abs(dy))):
+        if errors[dy] > PIXEL_NOISE or len(candidates) >= SCROLL_CANDIDATES:
+            break
+        if all(abs(dy - other) > scale for other in candidates):
+            candidates.append(dy)
+    if not candidates:
+        return None
+
+    prev_mask, cur_mask = (~static, _ink_rows(prev)), (~static, _ink_rows(cur))
+    fine = {}
+    for rough in candidates:
+        for dy in range(rough - 1, rough + 2):
+            if dy and dy not in fine:
+                fine[dy] = _shift_error(prev, cur, prev_mask, cur_mask, dy, min_rows * scale)
+    best = min(fine, key=lambda dy: (fine[dy], abs(dy)))
+    return best if fine[best] <= PIXEL_NOISE else None
+
+
+def _bands(dirty: numpy.ndarray, gap: int) -> List[Band]:
+    """바뀐 줄을 gap 이내로 이어지는 띠 영역 [y1, y2)로 묶음"""
+    bands: List[List[int]] = []
+    for y in numpy.flatnonzero(dirty):
+        y = int(y)
+        if bands and y - bands[-1][1] <= gap:
+            bands[-1][1] = y + 1
+        else:
+            bands.append([y, y + 1])
+    return [(y1, y2) for y1, y2 in bands]
+
+
+def _extend_bands(bands: List[Band], ink: numpy.ndarray, h: int) -> List[Band]:
+    """띠 경계가 글자 줄을 자르지 않도록 위아래로 빈 줄이 나올 때까지(최대 BAND_MAX_EXTEND) 늘린 뒤 여백을 더하고, 겹치면 합침"""
+    extended: List[Band] = []
+    for y1, y2 in bands:
+        limit = max(y1 - BAND_MAX_EXTEND, 0)
+        while y1 > limit and ink[y1 - 1]:
+            y1 -= 1
+        limit = min(y2 + BAND_MAX_EXTEND, h)
+        while y2 < limit and ink[y2]:
+            y2 += 1
+        y1, y2 = max(y1 - BAND_PADDING, 0), min(y2 + BAND_PADDING, h)
+        if extended and y1 <= extended[-1][1]:
+            extended[-1] = (extended[-1][0], max(extended[-1][1], y2))
+        else:
+            extended.append((y1, y2))
+    return extended
+
+
+def _words(data: Dict) -> List[Dict]:
+    """image_to_data 결과에서 글자가 있는 단어 행만 dict 목록으로"""
+    columns = [column for column in TSV_COLUMNS if column in data]
+    return [
+        {column: data[column][i] for column in columns}
+        for i, text in enumerate(data.get('text', []))
+        if str(text).strip()
+    ]
+
+
+def _to_data(words: List[Dict]) -> Dict[str, List]:
+    """단어 행 목록을 블록 위치 → 블록/문단/줄 → 왼쪽 순서로 정렬하여 image_to_data 형식으로"""
+    block_top: Dict = {}
+    for word in words:
+        block = word.get('block_num', 0)
+        block_top[block] = min(block_top.get(block, word['top']), word['top'])
+    words = sorted(words, key=lambda word: (
+        block_top[word.get('block_num', 0)], word.get('block_num', 0),
+        word.get('par_num', 0), word.get('line_num', 0), word['left'],
+    ))
+    columns = [column for column in TSV_COLUMNS if any(column in word for word in words)]
+    return {column: [word.get(column, 0) for word in words] for column in columns}
+
+
+def incremental_results(
+    prev_gray: numpy.ndarray,
+    prev_results: Dict[int, Dict],
+    cur_gray: numpy.ndarray,
+    steps: List[dict],
+    lang: str = "kor+eng",
+) -> Optional[Tuple[Dict[int, Dict], Dict]]:
+    """
+    이전 화면의 단계별 OCR 결과로 새 화면의 단계별 OCR 결과 만들기
+    :param prev_gray: 이전 화면 Grayscale
+    :param prev_results: 이전 화면의 {단계: ocr_step 결과}
+    :param cur_gray: 새 화면 Grayscale
+    :param steps: 전처리 단계 목록
+    :return: ({단계: ocr_step 형식 결과}, {'changed', 'scroll', 'bands', 'kept', 'elapsed'})
+             비교할 수 없거나 너무 많이 바뀌어 전체 OCR이 나으면 None
+    """
+    if not prev_results or prev_gray.shape != cur_gray.shape:
+        return None
+    start = time.perf_counter()
+    h, w = cur_gray.shape[:2]
+
+    static = ~_changed_rows(prev_gray, cur_gray)
+    if static.all():
+        results = {idx: dict(result, elapsed=0.0) for idx, result in prev_results.items()}
+        return results, {'changed': False, 'scroll': 0, 'bands': [], 'kept': None, 'elapsed': time.perf_counter() - start}
+
+    dy = estimate_scroll(prev_gray, cur_gray, static) or 0
+    shifted = numpy.zeros(h, dtype=bool)
+    if dy:
+        lo, hi = max(0, -dy), min(h, h - dy)
+        shifted[lo:hi] = ~_changed_rows(prev_gray[lo + dy:hi + dy], cur_gray[lo:hi])
+    dirty = ~(static | shifted)
+    if dirty.mean() > MAX_DIRTY_RATIO:
+        print(f"[DEBUG] 증분 OCR: 화면의 {dirty.mean():.0%}가 바뀌어 전체 OCR합니다.")
+        return None
+
+    ink = _ink_rows(cur_gray)
+
+    # 단계마다 유지할 단어 (base 좌표 기준으로 판단)
+    kept: Dict[int, List[Dict]] = {}
+    moved: Dict[int, List[Tuple[int, int]]] = {}
+    for idx, result in prev_results.items():
+        factor = result['shape'][1] / float(w)
+        kept[idx], moved[idx] = [], []
+        for word in _words(result['data']):
+            y1 = int(word['top'] / factor)
+            y2 = max(int((word['top'] + word['height']) / factor), y1 + 1)
+            if static[y1:y2].all():
+                kept[idx].append(dict(word))
+                moved[idx].append((y1, y2))
+            elif dy and 0 <= y1 - dy and y2 - dy <= h and shifted[y1 - dy:y2 - dy].all():
+                word = dict(word, top=word['top'] - int(round(dy * factor)))
+                kept[idx].append(word)
+                moved[idx].append((y1 - dy, y2 - dy))
+
+    # 다시 읽을 띠: 바뀐 줄 + 그 띠에 걸친 유지 단어(띠와 함께 다시 읽음)
+    bands = _extend_bands(_bands(dirty, BAND_PADDING), ink, h)
+    changed = True
+    while changed:
+        changed = False
+        for idx in kept:
+            remaining_words, remaining_rows = [], []
+            for word, (y1, y2) in zip(kept[idx], moved[idx]):
+                overlap = [band for band in bands if y1 < band[1] and band[0] < y2]
+                if overlap:
+                    bands = _extend_bands(sorted(bands + [(y1, y2)]), ink, h)
+                    changed = True
+                else:
+                    remaining_words.append(word)
+                    remaining_rows.append((y1, y2))
+            kept[idx], moved[idx] = remaining_words, remaining_rows
+
+    results: Dict[int, Dict] = {}
+    variants: dict = {}
+    for idx, result in prev_results.items():
+        step_start = time.perf_counter()
+        img = preprocess_step(cur_gray, steps[idx], variants)
+        factor = img.shape[1] / float(w)
+        words = list(kept[idx])
+        if bands:
+            boxes = [(0, int(y1 * factor), img.shape[1], min(int(y2 * factor), img.shape[0])) for y1, y2 in bands]
+            # 유지 단어와 블록 번호가 겹치지 않도록 새 블록 번호는 그 뒤부터
+            offset = (max((word.get('block_num', 0) for word in words), default=0) // 1000 + 1) * 1000
+            for word in _words(ocr_regions(img, boxes, lang=lang, params=steps[idx])):
+                word['block_num'] = word.get('block_num', 0) + offset
+                words.append(word)
+        data = _to_data(words)
+        results[idx] = {
+            'step': idx,
+            'shape': img.shape[:2],
+            'data': data,
+            'windows': token_windows(data.get('text', [])),
+            'elapsed': time.perf_counter() - step_start,
+        }
+
+    info = {
+        'changed': True,
+        'scroll': dy,
+        'bands': bands,
+        'kept': {idx: len(words) for idx, words in kept.items()},
+        'elapsed': time.perf_counter() - start,
+    }
+    area = sum(y2 - y1 for y1, y2 in bands) / float(h)
+    print(f"[DEBUG] 증분 OCR: scroll={dy}px, 다시 읽은 띠 {len(bands)}개 (화면의 {area:.0%}), {info['elapsed']:.2f}초")
+    return results, info
@@ -0,0 +1,144 @@
+from typing import List, Optional, Tuple
+
+from util.adb_session import build_shell_command, run_shell
+from util.frame import bump_input_generation
+
+KEYCODE_MAP = {
+    "Tab": 61,
+    "Enter": 66,
+    "Back": 4,
+    "Del": 67,
+    "Delete": 67,
+    "Home": 3,
+    "Menu": 82,
+    "Up": 19,
+    "Down": 20,
+    "Left": 21,
+    "Right": 22,
+    "Space": 62,
+    "Escape": 111,
+    "Search": 84,
+    "Camera": 27,
+    "VolumeUp": 24,
+    "VolumeDown": 25,
+    "Power": 26
+}
+
+
+def key_command(key_value: str) -> List:
+    """
+    send_keys 입력값을 input 명령 인자로 변환
+    KEYCODE_MAP에 있으면 keyevent, 없으면 일반 문자열로 간주하여 text
+    :param key_value: 키 이름 또는 입력할 문자열
+    :return: input 명령 인자 리스트
+    """
+    if key_value in KEYCODE_MAP:
+        return ["input", "keyevent", KEYCODE_MAP[key_value]]
+    return ["input", "text", key_value]
+
+
+def swipe_coordinates(
+    direction: str,
+    x: int = 540,
+    y_center: int = 1000,
+    distance: int = 600,
+) -> Tuple[int, int, int, int]:
+    """
+    스와이프 방향을 시작/끝 좌표로 변환
+    :param direction: up, down, left, right
+    :return: (x1, y1, x2, y2)
+    """
+    direction = direction.lower()
+    if direction == "up":
+        return x, y_center, x, y_center - distance
+    elif direction == "down":
+        return x, y_center, x, y_center + distance
+    elif direction == "left":
+        return x, y_center, x - distance, y_center
+    elif direction == "right":
+        return x, y_center, x + distance, y_center
+    raise ValueError("direction must be one of: up, down, left, right")
+
+
+class InputBatch:
+    """
+    탭/키/스와이프 입력을 모아 두었다가 디바이스 셸 한 번 호출로 순서대로 실행
+    예) InputBatch().key("Tab").key(EMAIL).key("Enter", delay=0.5).swipe("up").run()
+    """
+
+    def __init__(self, serial: Optional[str] = None):
+        self.serial = serial
+        self._commands: List[str] = []
+        self._descriptions: List[str] = []
+        self._total_delay = 0.0
+
+    def _add(self, command: List, description: str, delay: float):
+        self._commands.append(build_shell_command(command))
+        self._descriptions.append(description)
+        if delay > 0:
+            self.sleep(delay)
+        return self
+
+    def tap(self, x: int, y: int, delay: float = 0):
+        """좌표 탭 추가 (delay: 다음 입력 전 대기 초)"""
+        return self._add(["input", "tap", x, y], f"탭: ({x}, {y})", delay)
+
+    def key(self, key_value: str, delay: float = 0):
+        """send_keys와 같은 규칙으로 키/텍스트 입력 추가"""
+        command = key_command(key_value)
+        if command[1] == "keyevent":
+            description = f"입력 키: {key_value} (KEYCODE {command[2]})"
+        else:
+            description = f"입력 텍스트: {key_value}"
+        return self._add(command, description, delay)
+
+    def swipe(
+        self,
+        direction: str,
+        x: int = 540,
+        y_center: int = 1000,
+        distance: int = 600,
+        duration: int = 800,
+        delay: float = 0,
+    ):
+        """swipe_direction과 같은 규칙으로 스와이프 추가"""
+        x1, y1, x2, y2 = swipe_coordinates(direction, x, y_center, distance)
+        return self._add(["input", "swipe", x1, y1, x2, y2, duration], f"스와이프: {direction}", delay)
+
+    def sleep(self, seconds: float):
+        """입력 사이 대기 추가 (디바이스에서 sleep)"""
+        self._commands.append(f"sleep {seconds:g}")
+        self._total_delay += seconds
+        return self
+
+    def __len__(self):
+        return len(self._descriptions)
+
+    def to_script(self) -> str:
+        """디바이스에서 실행할 셸 스크립트 문자열"""
+        return " && ".join(self._commands)
+
+    def run(self, timeout: float = 30.0, must_succeed: bool = False) -> bool:
+        """
+        모은 입력을 한 번의 셸 호출로 실행
+        :param timeout: 입력 대기 시간 외에 추가로 허용할 응답 대기 시간(초)
+        :param must_succeed: 실패했을 때 Exception 발생 여부
+        :return: 모든 입력 성공 여부
+        """
+        if not self._commands:
+            return True
+        descriptions = list(self._descriptions)
+        for description in descriptions:
+            print(description)
+        returncode, output = run_shell(self.to_script(), serial=self.serial, timeout=timeout + self._total_delay)
+        bump_input_generation()
+        self._commands.clear()
+        self._descriptions.clear()
+        self._total_delay = 0.0
+        if returncode != 0:
+            print(f"[ERROR] 입력 배치 실행 실패 (returncode={returncode}): {output.strip()}")
+            if must_succeed:
+                raise Exception(f"입력 배치 실행에 실패했습니다: {' → '.join(descriptions)}")
+            return False
+        print("[✔] 입력 배치 실행 완료")
+        return True
@@ -0,0 +1,136 @@
+import collections
+import hashlib
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy
+
+from util.dynamic_data import load_data
+from util.ocr_engine import get_ocr_engine
+
+
+def image_digest(image: numpy.ndarray) -> bytes:
+    """
+    전처리된 OCR 입력 이미지의 정확한 digest (blake2b)
+    perceptual hash는 "Lv.12"와 "Lv.13"처럼 글자 하나만 다른 화면을 같은 값으로 만들 수 있어
+    검증 도구에서는 픽셀이 완전히 같을 때만 캐시를 사용한다.
+    :param image: numpy 배열
+    :return: digest 바이트
+    """
+    return hashlib.blake2b(numpy.ascontiguousarray(image).tobytes(), digest_size=16).digest()
+
+
+def _copy_data(data: Dict) -> Dict:
+    # image_to_data 결과는 {열 이름: 리스트}이므로 리스트만 복사하면 서로 영향을 주지 않음
+    return {column: list(values) for column, values in data.items()}
+
+
+class OcrCache:
+    """
+    image_to_data 결과 LRU 캐시
+    키: (이미지 digest, 이미지 크기, 언어, 전처리 파라미터)
+    저장/반환 모두 복사본을 사용하므로 호출한 쪽에서 결과를 수정해도 캐시는 바뀌지 않는다.
+    """
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self._entries: "collections.OrderedDict[Tuple, Dict]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_time = 0.0
+        self._ocr_time: Dict[Tuple, float] = {}
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_time += self._ocr_time.get(key, 0.0)
+        return _copy_data(data)
+
+    def put(self, key: Tuple, data: Dict, elapsed: float = 0.0):
+        data = _copy_data(data)
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            self._ocr_time[key] = elapsed
+            while len(self._entries) > self.max_size:
+                old_key, _ = self._entries.popitem(last=False)
+                self._ocr_time.pop(old_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ocr_time.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """캐시 적중/실패 횟수, 적중률, 크기, 적중으로 아낀 OCR 시간(초)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'saved_time': self.saved_time,
+            }
+
+
+_cache: Optional[OcrCache] = None
+
+
+def get_ocr_cache() -> OcrCache:
+    """기본 OCR 캐시 (크기는 dynamic_data의 ocr_cache_size)"""
+    global _cache
+    size = load_data('ocr_cache_size') or 0
+    if _cache is None:
+        _cache = OcrCache(size)
+    _cache.max_size = size
+    return _cache
+
+
+def ocr_image_to_data(
+    image: numpy.ndarray,
+    lang: str = "kor+eng",
+    params: Optional[Dict] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Dict:
+    """
+    OCR 엔진의 image_to_data(pytesseract.Output.DICT 형식) 결과를 캐시를 거쳐 반환
+    화면이 바뀌지 않았으면 tesseract를 다시 실행하지 않는다. (ocr_cache_size가 0이면 캐시 사용 안 함)
+    :param image: 전처리된 OCR 입력 이미지
+    :param lang: tesseract 언어
+    :param params: 전처리 파라미터 (캐시 키에 포함)
+    :param cancel: 설정되면 OCR을 중단하고 OcrCancelled 발생 (OcrEngine.image_to_data 참고)
+    :return: image_to_data DICT 결과
+    """
+    cache = get_ocr_cache()
+    key = None
+    if cache.max_size > 0:
+        key = (image_digest(image), image.shape, lang, tuple(sorted((params or {}).items())))
+        data = cache.get(key)
+        if data is not None:
+            print(f"[DEBUG] OCR 캐시 사용 (hits={cache.hits}, misses={cache.misses})")
+            return data
+    start = time.perf_counter()
+    data = get_ocr_engine(lang).image_to_data(image, cancel)
+    elapsed = time.perf_counter() - start
+    if key is not None:
+        cache.put(key, data, elapsed)
+    return data
+
+
+def get_ocr_cache_stats() -> Dict[str, float]:
+    """기본 OCR 캐시 통계"""
+    return get_ocr_cache().stats()
+
+
+def clear_ocr_cache():
+    """기본 OCR 캐시 비우기"""
+    get_ocr_cache().clear()
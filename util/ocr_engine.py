@@ -0,0 +1,204 @@
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy
+import pytesseract
+from PIL import Image
+
+from util.dynamic_data import load_data
+
+# image_to_data(DICT) 결과의 컬럼 (마지막 text만 문자열)
+TSV_COLUMNS = [
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text',
+]
+
+
+def parse_tsv(tsv: str) -> Dict[str, List]:
+    """
+    Tesseract TSV (헤더 없는 GetTSVText 결과 포함)를 pytesseract.Output.DICT와 같은 dict로 변환
+    숫자 컬럼은 int, text는 문자열
+    """
+    data: Dict[str, List] = {column: [] for column in TSV_COLUMNS}
+    for line in tsv.splitlines():
+        if not line or line.startswith("level\t"):
+            continue
+        cells = line.split("\t")
+        if len(cells) < len(TSV_COLUMNS) - 1:
+            continue
+        cells += [""] * (len(TSV_COLUMNS) - len(cells))
+        for column, cell in zip(TSV_COLUMNS[:-1], cells):
+            try:
+                data[column].append(int(float(cell)))
+            except ValueError:
+                data[column].append(cell)
+        data['text'].append(cells[len(TSV_COLUMNS) - 1])
+    return data
+
+
+# cancel 이벤트 확인 간격(초)
+CANCEL_POLL = 0.05
+
+
+class OcrCancelled(Exception):
+    """cancel 이벤트가 설정되어 OCR을 중단함 (결과는 캐시하지 않음)"""
+
+
+class OcrEngine:
+    """OCR 백엔드 공통 인터페이스"""
+
+    name = "base"
+    # 동시에 실행할 수 있는 OCR 수 (None이면 제한 없음)
+    max_concurrency: Optional[int] = None
+
+    def image_to_data(self, image: numpy.ndarray, cancel: Optional[threading.Event] = None) -> Dict[str, List]:
+        """
+        pytesseract.image_to_data(output_type=DICT)와 같은 형식의 결과 반환
+        :param cancel: 설정되면 OCR을 중단하고 OcrCancelled 발생
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    """
+    호출마다 tesseract 프로세스를 띄우는 pytesseract 백엔드 (fallback)
+    cancel을 넘기면 tesseract 프로세스를 직접 실행하고, cancel이 설정되면 프로세스를 종료한다.
+    """
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = "kor+eng"):
+        self.lang = lang
+
+    def image_to_data(self, image: numpy.ndarray, cancel: Optional[threading.Event] = None) -> Dict[str, List]:
+        if cancel is None:
+            return pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+        if cancel.is_set():
+            raise OcrCancelled()
+        fd, path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        try:
+            Image.fromarray(image).save(path)
+            command = [pytesseract.pytesseract.tesseract_cmd, path, "stdout", "-l", self.lang, "tsv"]
+            proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            while True:
+                try:
+                    out, err = proc.communicate(timeout=CANCEL_POLL)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel.is_set():
+                        proc.kill()
+                        proc.wait()
+                        proc.stdout.close()
+                        proc.stderr.close()
+                        raise OcrCancelled()
+        finally:
+            os.remove(path)
+        if proc.returncode != 0:
+            raise pytesseract.TesseractError(proc.returncode, err.decode("utf-8", errors="replace"))
+        return parse_tsv(out.decode("utf-8", errors="replace"))
+
+
+class TesserocrEngine(OcrEngine):
+    """
+    tesserocr PyTessBaseAPI 핸들을 미리 초기화해 두고 재사용하는 백엔드
+    traineddata 로딩은 시작 시 한 번만 하고, 핸들 풀(pool_size개)로 여러 스레드에서 동시에 OCR할 수 있다.
+    (tesserocr는 인식 중 GIL을 해제함)
+    인식 중인 핸들은 중단할 수 없으므로 cancel은 핸들을 기다리는 동안에만 확인한다.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "kor+eng", pool_size: int = 1, tessdata_path: Optional[str] = None):
+        import tesserocr
+
+        self.lang = lang
+        self.pool_size = max(1, pool_size)
+        self.max_concurrency = self.pool_size
+        self._apis: "queue.Queue" = queue.Queue()
+        self._all = []
+        start = time.perf_counter()
+        for _ in range(self.pool_size):
+            if tessdata_path:
+                api = tesserocr.PyTessBaseAPI(path=tessdata_path, lang=lang)
+            else:
+                api = tesserocr.PyTessBaseAPI(lang=lang)
+            self._all.append(api)
+            self._apis.put(api)
+        print(f"[INFO] tesserocr 엔진 초기화 완료: lang={lang}, 핸들 {self.pool_size}개 ({time.perf_counter() - start:.2f}초)")
+
+    def _acquire(self, cancel: Optional[threading.Event]):
+        if cancel is None:
+            return self._apis.get()
+        while True:
+            if cancel.is_set():
+                raise OcrCancelled()
+            try:
+                return self._apis.get(timeout=CANCEL_POLL)
+            except queue.Empty:
+                continue
+
+    def image_to_data(self, image: numpy.ndarray, cancel: Optional[threading.Event] = None) -> Dict[str, List]:
+        api = self._acquire(cancel)
+        try:
+            api.SetImage(Image.fromarray(image))
+            tsv = api.GetTSVText(0)
+        finally:
+            api.Clear()
+            self._apis.put(api)
+        return parse_tsv(tsv)
+
+    def close(self):
+        for api in self._all:
+            api.End()
+        self._all = []
+
+
+_engines: Dict[str, OcrEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def _create_engine(lang: str) -> OcrEngine:
+    backend = load_data('ocr_engine') or "auto"
+    if backend in ("auto", "tesserocr"):
+        pool_size = load_data('ocr_engine_pool_size') or 1
+        try:
+            return TesserocrEngine(lang, pool_size, os.environ.get("TESSDATA_PREFIX"))
+        except ImportError:
+            if backend == "tesserocr":
+                raise
+            print("[WARN] tesserocr가 설치되어 있지 않아 pytesseract(프로세스 실행 방식)로 OCR합니다.")
+        except RuntimeError as e:
+            if backend == "tesserocr":
+                raise
+            print(f"[WARN] tesserocr 초기화 실패 ({e}). pytesseract로 OCR합니다.")
+    return PytesseractEngine(lang)
+
+
+def get_ocr_engine(lang: str = "kor+eng") -> OcrEngine:
+    """
+    언어별로 한 번 만든 OCR 엔진 반환
+    dynamic_data의 ocr_engine: "auto"(tesserocr 우선, 없으면 pytesseract) / "tesserocr" / "pytesseract"
+    """
+    with _engines_lock:
+        engine = _engines.get(lang)
+        if engine is None:
+            engine = _create_engine(lang)
+            _engines[lang] = engine
+        return engine
+
+
+def close_ocr_engines():
+    """생성된 OCR 엔진 모두 종료 (ocr_engine 설정을 바꾼 뒤 다시 만들 때)"""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.close()
+        _engines.clear()
@@ -0,0 +1,315 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import cv2
+import numpy
+
+from util.device_pool import artifact_path
+from util.dynamic_data import load_data, save_data
+from util.frame import Frame, to_rgb_array
+from util.ocr_cache import ocr_image_to_data
+from util.ocr_engine import get_ocr_engine
+from util.text_matcher import TextMatcher, Window, normalize, token_windows
+from util.text_regions import Box, ocr_regions, scale_boxes
+
+DEFAULT_PREPROCESS_STEPS = [
+    {'invert': False, 'threshold': False, 'resize': 1.0},
+    {'invert': True,  'threshold': False, 'resize': 2.0},
+    {'invert': True,  'threshold': True,  'resize': 2.0}
+]
+
+# 전처리 단계별 실행/매칭 통계 {단계 라벨: {'runs', 'wins', 'total_time'}}
+_variant_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+# --- 전처리 ---
+
+def load_gray(image: Union[str, Frame, numpy.ndarray]) -> numpy.ndarray:
+    """
+    OCR 전처리의 공통 Grayscale 기준 이미지
+    :param image: 원본 이미지 경로 또는 Frame / RGB numpy 배열 (Grayscale 배열이면 그대로 사용)
+    :return: Grayscale numpy 배열
+    """
+    if isinstance(image, str):
+        if not os.path.exists(image):
+            raise FileNotFoundError(f"파일이 존재하지 않습니다: {image}")
+        img = cv2.imread(image)
+        if img is None:
+            raise FileNotFoundError(f"이미지 파일을 열 수 없습니다: {image}")
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    img = to_rgb_array(image)
+    if img.ndim == 2:
+        return img
+    return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+
+
+def _clamp_resize(resize_factor: float) -> float:
+    if resize_factor > 4.0:
+        print(f"[WARN] resize_factor가 너무 큽니다({resize_factor}). 3.0으로 자동 조정합니다.")
+        return 3.0
+    return resize_factor
+
+
+def preprocess_step(gray: numpy.ndarray, step: dict, variants: Optional[dict] = None) -> numpy.ndarray:
+    """
+    Grayscale 기준 이미지에 전처리 단계 하나 적용 (Invert → Optional Thresholding → Resize, 모두 메모리에서)
+    :param gray: load_gray 결과
+    :param step: {'invert': bool, 'threshold': bool, 'resize': float}
+    :param variants: 단계 간에 공유할 중간 결과 dict (같은 반전/이진화 결과를 다시 계산하지 않음)
+    :return: 전처리된 Grayscale numpy 배열
+    """
+    if variants is None:
+        variants = {}
+    img = _base_variant(gray, step, variants)
+    resize_factor = _clamp_resize(step.get('resize', 1.0))
+
+    # Resize 확대 (옵션)
+    key = (step.get('invert', True), step.get('threshold', False), resize_factor)
+    if key not in variants:
+        variants[key] = cv2.resize(
+            img, None,
+            fx=resize_factor, fy=resize_factor,
+            interpolation=cv2.INTER_CUBIC
+        ) if resize_factor != 1.0 else img
+    return variants[key]
+
+
+def _base_variant(gray: numpy.ndarray, step: dict, variants: dict) -> numpy.ndarray:
+    """확대 전 단계까지(반전 → 이진화)의 중간 결과 (variants에 저장해 공유)"""
+    invert = step.get('invert', True)
+    apply_threshold = step.get('threshold', False)
+
+    key = (invert,)
+    if key not in variants:
+        # 색 반전 (흰글씨+검정배경 → 검정글씨+흰배경)
+        variants[key] = cv2.bitwise_not(gray) if invert else gray
+    img = variants[key]
+
+    key = (invert, apply_threshold)
+    if key not in variants:
+        # Adaptive Thresholding (선택)
+        variants[key] = cv2.adaptiveThreshold(
+            img, 255,
+            cv2.ADAPTIVE_THRESH_MEAN_C,
+            cv2.THRESH_BINARY,
+            15, 10
+        ) if apply_threshold else img
+    return variants[key]
+
+
+# --- 매칭 ---
+
+def _get_box(i, j, d):
+    x1 = min(d['left'][i+k] for k in range(j+1))
+    y1 = min(d['top'][i+k] for k in range(j+1))
+    x2 = max(d['left'][i+k] + d['width'][i+k] for k in range(j+1))
+    y2 = max(d['top'][i+k] + d['height'][i+k] for k in range(j+1))
+    return (x1, y1, x2, y2)
+
+
+def match_ocr_data(
+    d: Dict,
+    target_text: str,
+    similarity_threshold: float = 0.8,
+    windows: Optional[List[Window]] = None,
+) -> Optional[Tuple[Box, float, str]]:
+    """
+    image_to_data 결과에서 target_text와 가장 잘 맞는 연속 단어(최대 6개) 찾기
+    :param windows: 같은 d로 여러 대상을 찾을 때 재사용할 token_windows(d['text']) 결과
+    :return: (이미지 좌표 박스, 유사도, "exact" / "pattern" / "similarity") 또는 None
+    """
+    if windows is None:
+        windows = token_windows(d.get('text', []))
+    matcher = TextMatcher(target_text, similarity_threshold)
+    best = matcher.best(windows)
+    if best is None:
+        return None
+    i, j, score, kind = best
+    if kind == "similarity":
+        print(f"[INFO] 유사도 매칭: '{normalize(''.join(d['text'][i:i+j+1]))}' ≈ '{matcher.norm}' (유사도: {score:.3f})")
+    return _get_box(i, j, d), score, kind
+
+
+# --- 단계 실행 ---
+
+def step_label(step: dict) -> str:
+    """통계/로그용 전처리 단계 이름"""
+    return f"invert={step.get('invert', True)},threshold={step.get('threshold', False)},resize={step.get('resize', 1.0)}"
+
+
+def _record_variant(step: dict, elapsed: float, won: bool):
+    label = step_label(step)
+    with _stats_lock:
+        stats = _variant_stats.setdefault(label, {'runs': 0, 'wins': 0, 'total_time': 0.0})
+        stats['runs'] += 1
+        stats['total_time'] += elapsed
+        if won:
+            stats['wins'] += 1
+
+
+def ocr_step(
+    base_gray: numpy.ndarray,
+    idx: int,
+    step: dict,
+    regions: Optional[List[Box]] = None,
+    lang: str = "kor+eng",
+    variants: Optional[dict] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Dict:
+    """
+    전처리 단계 하나: 전처리 → OCR(전체 또는 후보 영역)
+    :param regions: 원본 Grayscale 좌표의 텍스트 후보 영역 (None이면 전체 화면 OCR)
+    :param cancel: 다른 단계가 먼저 찾았을 때 이 단계의 OCR을 중단하기 위한 이벤트 (중단되면 OcrCancelled)
+    :return: {'step': idx, 'shape': (h, w), 'data': image_to_data 결과, 'windows': token_windows 결과, 'elapsed': 초}
+    """
+    start = time.perf_counter()
+    img = preprocess_step(base_gray, step, variants)
+    if load_data('ocr_debug'):
+        debug_path = artifact_path("ocr_debug", f"screen_pre_{idx}.png")
+        cv2.imwrite(debug_path, img)
+        print(f"[DEBUG] (step {idx}) 전처리 이미지 저장: {debug_path}")
+    h, w = img.shape[:2]
+    print(f"[DEBUG] (step {idx}) OCR 입력 이미지 해상도: {w}x{h} (가로x세로)")
+
+    if regions is None:
+        d = ocr_image_to_data(img, lang=lang, params=step, cancel=cancel)
+    else:
+        boxes = scale_boxes(regions, w / float(base_gray.shape[1]), img.shape)
+        d = ocr_regions(img, boxes, lang=lang, params=step, cancel=cancel)
+    windows = token_windows(d.get('text', []))
+    return {'step': idx, 'shape': (h, w), 'data': d, 'windows': windows, 'elapsed': time.perf_counter() - start}
+
+
+def iter_ocr_steps(
+    base_gray: numpy.ndarray,
+    steps: List[dict],
+    regions: Optional[List[Box]] = None,
+    lang: str = "kor+eng",
+    parallel: bool = False,
+    results: Optional[Dict[int, Dict]] = None,
+    order: Optional[List[int]] = None,
+) -> Iterator[Dict]:
+    """
+    전처리 단계별 OCR 결과를 차례로 내보냄
+    parallel이면 여러 단계를 동시에 실행하고 끝난 순서대로(동시에 끝나면 앞 단계 먼저) 내보낸다.
+    (OCR은 tesserocr가 GIL을 해제하거나 pytesseract가 별도 프로세스로 실행하므로 스레드로도 병렬 실행됨)
+    호출 측이 반복을 멈추면(close) 시작 전인 단계는 취소하고, 실행 중인 단계는 cancel 이벤트로 중단한다.
+    pytesseract는 실행 중인 tesseract 프로세스를 종료하지만 tesserocr는 인식 중인 핸들을 중단할 수 없으므로,
+    동시에 실행하는 단계 수를 핸들 수보다 하나 적게 두어 중단되지 못한 단계가 남아도 다음 OCR이 핸들을 기다리지 않게 한다.
+    :param results: 같은 화면의 단계별 결과 저장소 {단계: 결과}. 이미 있는 단계는 OCR 없이 먼저 내보내고('cached': True),
+                    새로 끝난 단계는 여기에 추가한다.
+    :param order: 실행할 단계 번호 순서 (None이면 steps 순서대로 모두, 목록에 없는 단계는 실행하지 않음)
+    """
+    if results is None:
+        results = {}
+    if order is None:
+        order = list(range(len(steps)))
+    for idx in sorted(results):
+        yield dict(results[idx], cached=True)
+    todo = [(idx, steps[idx]) for idx in order if idx not in results]
+
+    variants = {}
+    if not parallel or len(todo) < 2:
+        for idx, step in todo:
+            results[idx] = ocr_step(base_gray, idx, step, regions, lang, variants)
+            yield results[idx]
+        return
+
+    # 공유하는 반전/이진화 결과는 미리 만들어 두고, 각 스레드에는 복사한 dict를 넘겨 동시에 쓰지 않도록 함
+    for _, step in todo:
+        _base_variant(base_gray, step, variants)
+    capacity = get_ocr_engine(lang).max_concurrency
+    workers = len(todo) if capacity is None else max(1, min(len(todo), capacity - 1))
+    cancel = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-variant")
+    futures = {
+        executor.submit(ocr_step, base_gray, idx, step, regions, lang, dict(variants), cancel): idx
+        for idx, step in todo
+    }
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: futures[f]):
+                results[futures[future]] = future.result()
+                yield results[futures[future]]
+    finally:
+        cancel.set()
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def search_text(
+    base_gray: numpy.ndarray,
+    target_text: str,
+    steps: Optional[List[dict]] = None,
+    similarity_threshold: float = 0.8,
+    regions: Optional[List[Box]] = None,
+    lang: str = "kor+eng",
+    parallel: Optional[bool] = None,
+) -> Optional[Dict]:
+    """
+    전처리 단계들을 돌며 target_text를 찾음 (parallel이면 먼저 찾은 단계의 결과를 사용)
+    :param parallel: None이면 dynamic_data의 ocr_parallel
+    :return: {'step', 'shape', 'match': (박스, 유사도, 종류), 'elapsed'} (찾지 못하면 None), 찾은 단계는 ocr_last_variant에 기록
+    """
+    hits = search_texts(base_gray, [target_text], steps, similarity_threshold, regions, lang, parallel)
+    return hits[target_text]
+
+
+def search_texts(
+    base_gray: numpy.ndarray,
+    targets: List[str],
+    steps: Optional[List[dict]] = None,
+    similarity_threshold: float = 0.8,
+    regions: Optional[List[Box]] = None,
+    lang: str = "kor+eng",
+    parallel: Optional[bool] = None,
+    results: Optional[Dict[int, Dict]] = None,
+    order: Optional[List[int]] = None,
+) -> Dict[str, Optional[Dict]]:
+    """
+    여러 텍스트를 같은 OCR 결과로 한 번에 찾음
+    단계마다 OCR은 한 번만 하고, 아직 못 찾은 대상만 다음 단계에서 다시 매칭한다. 모두 찾으면 남은 단계는 실행하지 않음.
+    :param results: 같은 화면의 단계별 OCR 결과 저장소 (iter_ocr_steps 참고)
+    :param order: 실행할 단계 번호 순서 (iter_ocr_steps 참고)
+    :return: {대상: search_text 결과 또는 None}
+    """
+    steps = steps or DEFAULT_PREPROCESS_STEPS
+    if parallel is None:
+        parallel = load_data('ocr_parallel')
+    hits: Dict[str, Optional[Dict]] = {target: None for target in targets}
+    remaining = list(dict.fromkeys(targets))
+
+    with closing(iter_ocr_steps(base_gray, steps, regions, lang, parallel, results, order)) as step_results:
+        for result in step_results:
+            idx = result['step']
+            found_any = False
+            for target in list(remaining):
+                match = match_ocr_data(result['data'], target, similarity_threshold, result['windows'])
+                if match:
+                    print(f"[INFO] (step {idx}) '{target}' 최고 매칭 선택: 유사도 {match[1]:.3f} ({match[2]} 매칭)")
+                    hits[target] = {'step': idx, 'shape': result['shape'], 'match': match, 'elapsed': result['elapsed']}
+                    remaining.remove(target)
+                    found_any = True
+                else:
+                    print(f"[INFO] (step {idx}) '{target}'를 찾지 못함.")
+            if not result.get('cached'):
+                _record_variant(steps[idx], result['elapsed'], found_any)
+            if found_any:
+                save_data('ocr_last_variant', step_label(steps[idx]))
+            if not remaining:
+                break
+    return hits
+
+
+def get_variant_stats() -> Dict[str, Dict[str, float]]:
+    """전처리 단계별 실행 횟수, 매칭 성공 횟수, 총 시간(초)"""
+    with _stats_lock:
+        return {label: dict(stats) for label, stats in _variant_stats.items()}
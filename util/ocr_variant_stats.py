@@ -0,0 +1,294 @@
+"""
+전처리 단계 순서 학습 (텍스트 + 화면 특징별로 어떤 전처리 단계에서 찾았는지 기록)
+
+기록은 JSON 파일(dynamic_data의 ocr_stats_path, 기본은 산출물 폴더의 ocr_stats/)에 남아 다음 실행에서도 사용한다.
+파일은 ocr_stats_save_every건마다, 그리고 프로세스 종료 시 저장하며, 저장할 때 디스크의 내용과 합쳐서
+같은 파일을 쓰는 다른 프로세스(디바이스 풀)의 기록을 덮어쓰지 않는다.
+다음 찾기에서는 찾을 확률이 높고 빠른 단계부터 실행하고,
+여러 번 실행했는데 한 번도 찾지 못한 단계는 다른 단계에서 못 찾았을 때만 실행한다.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy
+
+from util.device_pool import artifact_path
+from util.dynamic_data import load_data
+from util.ocr_search import step_label
+from util.text_matcher import normalize
+
+# 이 평균 밝기보다 어두우면 다크 테마 화면
+DARK_THRESHOLD = 100
+# 이 횟수 이상 실행해서 한 번도 찾지 못한 단계는 뒤로 미룸 (dynamic_data의 ocr_prune_after로 변경)
+PRUNE_AFTER = 5
+# 기록이 이 건수만큼 쌓이면 파일에 저장 (dynamic_data의 ocr_stats_save_every로 변경)
+SAVE_EVERY = 20
+# 텍스트마다 남길 화면 특징 키 개수, 오래 안 쓴 것부터 삭제 (dynamic_data의 ocr_stats_max_screens로 변경)
+MAX_SCREENS = 20
+# ocr_stats_path가 없을 때 산출물 폴더에 만드는 파일
+STATS_FILE = "ocr_variant_stats.json"
+# 저장 중 잠금 파일 대기 시간, 이보다 오래된 잠금 파일은 비정상 종료로 남은 것으로 보고 삭제
+LOCK_TIMEOUT = 5.0
+LOCK_STALE = 30.0
+
+
+def screen_fingerprint(gray: numpy.ndarray) -> str:
+    """
+    화면 특징 문자열 "테마:average hash(8x8)"
+    같은 화면 구성이면 글자가 조금 달라도 같은 값이 되고, 테마(dark/light)는 앞부분으로 따로 비교할 수 있다.
+    """
+    theme = "dark" if float(gray.mean()) < DARK_THRESHOLD else "light"
+    small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    bits = numpy.packbits(small > small.mean()).tobytes()
+    return f"{theme}:{bits.hex()}"
+
+
+def _merge_entries(base: Dict[str, Dict[str, Dict[str, float]]], delta: Dict[str, Dict[str, Dict[str, float]]]):
+    # delta의 runs/wins/time을 base에 더함
+    for key, labels in delta.items():
+        entry = base.setdefault(key, {})
+        for label, stats in labels.items():
+            total = entry.setdefault(label, {'runs': 0, 'wins': 0, 'time': 0.0})
+            for name in total:
+                total[name] += stats.get(name, 0)
+
+
+def _read_stats(path: str) -> Tuple[Dict, Dict[str, float]]:
+    # (entries, 키별 마지막 기록 시각), 파일이 없으면 빈 값
+    if not os.path.exists(path):
+        return {}, {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get('entries', {}), data.get('used', {})
+
+
+@contextmanager
+def _file_lock(path: str):
+    """
+    여러 프로세스가 같은 통계 파일을 읽고 합쳐서 쓰는 동안 잠금 (잠금 파일을 O_EXCL로 생성)
+    LOCK_TIMEOUT 안에 잠금을 얻지 못하면 경고 후 잠금 없이 진행한다.
+    """
+    lock_path = f"{path}.lock"
+    start = time.time()
+    fd = None
+    while fd is None:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > LOCK_STALE:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.time() - start > LOCK_TIMEOUT:
+                print(f"[WARN] 전처리 통계 파일 잠금을 얻지 못했습니다. 잠금 없이 저장합니다: {lock_path}")
+                break
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        if fd is not None:
+            os.close(fd)
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+
+class VariantStatsStore:
+    """
+    {키: {단계 라벨: {'runs', 'wins', 'time'}}} 통계 저장소
+    키는 구체적인 것부터 "텍스트|화면 특징", "텍스트|테마", "*|테마" 세 가지로 함께 기록하고,
+    순서를 정할 때는 기록이 있는 가장 구체적인 키를 사용한다.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Dict[str, float]]] = {}
+        # 마지막 저장 이후의 기록 (저장할 때 디스크 내용에 더함)
+        self._pending: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._pending_count = 0
+        # 키별 마지막 기록 시각 (오래 안 쓴 화면 특징 키 삭제용)
+        self._used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if path:
+            try:
+                self._entries, self._used = _read_stats(path)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] 전처리 통계 파일을 읽지 못했습니다 ({path}): {e}")
+
+    @staticmethod
+    def _keys(target: str, fingerprint: str) -> List[str]:
+        norm = normalize(target) or target
+        theme = fingerprint.split(":", 1)[0]
+        return [f"{norm}|{fingerprint}", f"{norm}|{theme}", f"*|{theme}"]
+
+    def _lookup(self, target: str, fingerprint: str) -> Dict[str, Dict[str, float]]:
+        for key in self._keys(target, fingerprint):
+            entry = self._entries.get(key)
+            if entry:
+                return entry
+        return {}
+
+    def record(self, target: str, fingerprint: str, label: str, elapsed: float, won: bool):
+        """단계 하나의 결과 기록 (저장은 save 또는 maybe_save)"""
+        delta = {'runs': 1, 'wins': 1 if won else 0, 'time': elapsed}
+        now = time.time()
+        with self._lock:
+            for key in self._keys(target, fingerprint):
+                _merge_entries(self._entries, {key: {label: delta}})
+                _merge_entries(self._pending, {key: {label: delta}})
+                self._used[key] = now
+            self._pending_count += 1
+
+    def learned(self, targets: List[str], fingerprint: str) -> bool:
+        """대상 중 하나라도 어떤 단계에서 찾은 기록이 있는지 (plan의 순서를 믿을 수 있는지)"""
+        with self._lock:
+            return any(
+                stats['wins']
+                for target in targets
+                for stats in self._lookup(target, fingerprint).values()
+            )
+
+    def plan(self, targets: List[str], fingerprint: str, steps: List[dict]) -> Tuple[List[int], List[int]]:
+        """
+        실행할 단계 순서 정하기
+        :return: (먼저 실행할 단계 번호 순서, 못 찾았을 때만 실행할 단계 번호)
+        """
+        prune_after = load_data('ocr_prune_after') or PRUNE_AFTER
+        with self._lock:
+            merged: Dict[str, Dict[str, float]] = {}
+            for target in targets:
+                for label, stats in self._lookup(target, fingerprint).items():
+                    total = merged.setdefault(label, {'runs': 0, 'wins': 0, 'time': 0.0})
+                    for name in total:
+                        total[name] += stats[name]
+
+        def score(idx: int):
+            stats = merged.get(step_label(steps[idx]))
+            if not stats or not stats['runs']:
+                # 기록이 없는 단계는 중간 확률, 원래 순서 유지
+                return -0.5, 0.0, idx
+            win_rate = (stats['wins'] + 1) / (stats['runs'] + 2)
+            return -win_rate, stats['time'] / stats['runs'], idx
+
+        order = sorted(range(len(steps)), key=score)
+        any_wins = any(stats['wins'] for stats in merged.values())
+        fallback = [
+            idx for idx in order
+            if any_wins and merged.get(step_label(steps[idx]), {}).get('runs', 0) >= prune_after
+            and not merged[step_label(steps[idx])]['wins']
+        ]
+        return [idx for idx in order if idx not in fallback], fallback
+
+    def maybe_save(self):
+        """저장하지 않은 기록이 ocr_stats_save_every건 이상이면 저장"""
+        save_every = load_data('ocr_stats_save_every') or SAVE_EVERY
+        if self._pending_count >= save_every:
+            self.save()
+
+    def save(self):
+        """
+        저장하지 않은 기록을 파일에 저장
+        잠금을 잡고 디스크의 내용을 다시 읽어 이번 기록을 더한 뒤 교체하므로 다른 프로세스의 기록이 유지되고,
+        저장 후에는 다른 프로세스가 쌓은 기록도 순서 결정에 사용한다.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._pending:
+                return
+            pending, count = self._pending, self._pending_count
+            self._pending, self._pending_count = {}, 0
+            used = dict(self._used)
+        try:
+            with _file_lock(self.path):
+                try:
+                    entries, disk_used = _read_stats(self.path)
+                except ValueError as e:
+                    print(f"[WARN] 전처리 통계 파일이 손상되어 새로 만듭니다 ({self.path}): {e}")
+                    entries, disk_used = {}, {}
+                _merge_entries(entries, pending)
+                for key, used_at in used.items():
+                    disk_used[key] = max(disk_used.get(key, 0.0), used_at)
+                self._prune(entries, disk_used)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({'entries': entries, 'used': disk_used}, f, ensure_ascii=False, indent=1)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[WARN] 전처리 통계 파일을 저장하지 못했습니다 ({self.path}): {e}")
+            with self._lock:
+                # 다음 저장 때 다시 시도
+                _merge_entries(self._pending, pending)
+                self._pending_count += count
+            return
+        with self._lock:
+            # 디스크 내용 + 저장하는 동안 새로 쌓인 기록
+            _merge_entries(entries, self._pending)
+            for key, used_at in self._used.items():
+                disk_used[key] = max(disk_used.get(key, 0.0), used_at)
+            self._entries, self._used = entries, disk_used
+
+    @staticmethod
+    def _prune(entries: Dict[str, Dict], used: Dict[str, float]):
+        # 텍스트마다 화면 특징 키("텍스트|테마:hash")는 최근에 기록한 MAX_SCREENS개만 남김
+        max_screens = load_data('ocr_stats_max_screens') or MAX_SCREENS
+        screens: Dict[str, List[str]] = {}
+        for key in entries:
+            norm, _, rest = key.rpartition("|")
+            if ":" in rest:
+                screens.setdefault(norm, []).append(key)
+        for keys in screens.values():
+            keys.sort(key=lambda k: used.get(k, 0.0), reverse=True)
+            for key in keys[max_screens:]:
+                del entries[key]
+                used.pop(key, None)
+
+    def stats(self, target: str, fingerprint: str) -> Dict[str, Dict[str, float]]:
+        """텍스트 + 화면 특징에 사용되는 단계별 통계"""
+        with self._lock:
+            return {label: dict(stats) for label, stats in self._lookup(target, fingerprint).items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._pending_count = 0
+            self._used.clear()
+
+
+_store: Optional[VariantStatsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_variant_store() -> VariantStatsStore:
+    """
+    기본 통계 저장소 (파일은 dynamic_data의 ocr_stats_path, 없으면 산출물 폴더의 ocr_stats/, 경로가 바뀌면 다시 읽음)
+    """
+    global _store
+    path = load_data('ocr_stats_path') or artifact_path("ocr_stats", STATS_FILE)
+    with _store_lock:
+        if _store is None or _store.path != path:
+            if _store is not None:
+                _store.save()
+            _store = VariantStatsStore(path)
+        return _store
+
+
+def flush_variant_stats():
+    """저장하지 않은 기록 저장 (프로세스 종료 시 atexit로 자동 호출)"""
+    with _store_lock:
+        store = _store
+    if store is not None:
+        store.save()
+
+
+atexit.register(flush_variant_stats)
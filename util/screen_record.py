@@ -0,0 +1,174 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+# screenrecord 한 번의 최대 녹화 시간은 180초이므로 그 전에 다음 세그먼트로 넘어감
+SEGMENT_TIME_LIMIT = 170
+
+
+class StreamingScreenRecorder:
+    """
+    `exec-out screenrecord --output-format=h264 -` 출력을 테스트 중에 바로 PC 파일로 저장
+    SEGMENT_TIME_LIMIT마다 새 세그먼트로 이어서 녹화하고, 종료 시 세그먼트를 합치고 인덱스(JSON)를 남긴다.
+    ffmpeg가 있으면 세그먼트를 mp4로 저장(벽시계 타임스탬프)하고, 없으면 raw h264로 저장한다.
+    """
+
+    def __init__(
+        self,
+        base_name: str,
+        local_dir: str = ".",
+        device_serial: Optional[str] = None,
+        bit_rate: int = 8000000,
+        size: Optional[str] = None,
+        adb_path: str = "adb",
+    ):
+        self.base_name = base_name
+        self.local_dir = local_dir
+        self.device_serial = device_serial
+        self.bit_rate = bit_rate
+        self.size = size
+        self.adb_path = adb_path
+        self.ffmpeg = shutil.which("ffmpeg")
+        self.extension = "mp4" if self.ffmpeg else "h264"
+        self.segments: List[Dict] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._procs: List[subprocess.Popen] = []
+        # stop()과 세그먼트 전환이 겹쳐도 새로 띄운 screenrecord를 놓치지 않도록 프로세스 시작/종료를 함께 보호
+        self._lock = threading.Lock()
+
+    def _record_command(self) -> List[str]:
+        cmd = [self.adb_path]
+        if self.device_serial:
+            cmd += ["-s", self.device_serial]
+        cmd += [
+            "exec-out", "screenrecord",
+            "--output-format=h264",
+            f"--bit-rate={self.bit_rate}",
+            f"--time-limit={SEGMENT_TIME_LIMIT}",
+        ]
+        if self.size:
+            cmd += [f"--size={self.size}"]
+        cmd += ["-"]
+        return cmd
+
+    def _start_record(self, stdout) -> Optional[subprocess.Popen]:
+        """종료 요청이 없을 때만 screenrecord 시작 (이번 세그먼트 프로세스 목록을 새로 시작)"""
+        with self._lock:
+            if self._stop.is_set():
+                return None
+            record = subprocess.Popen(self._record_command(), stdout=stdout, stderr=subprocess.DEVNULL)
+            self._procs = [record]
+            return record
+
+    def _record_segment(self, path: str):
+        if self.ffmpeg:
+            record = self._start_record(subprocess.PIPE)
+            if record is None:
+                return
+            # screenrecord의 raw h264에는 타임스탬프가 없으므로 수신 시각을 그대로 사용
+            mux = subprocess.Popen(
+                [self.ffmpeg, "-loglevel", "error", "-y",
+                 "-use_wallclock_as_timestamps", "1", "-f", "h264", "-i", "-",
+                 "-c", "copy", path],
+                stdin=record.stdout,
+            )
+            record.stdout.close()
+            with self._lock:
+                self._procs.append(mux)
+            record.wait()
+            mux.wait()
+        else:
+            with open(path, "wb") as f:
+                record = self._start_record(f)
+                if record is not None:
+                    record.wait()
+
+    def _run(self):
+        index = 0
+        while not self._stop.is_set():
+            path = os.path.join(self.local_dir, f"{self.base_name}_{index:03d}.{self.extension}")
+            started = time.time()
+            print(f"[INFO] 화면 녹화 세그먼트 시작: {path}")
+            self._record_segment(path)
+            ended = time.time()
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                self.segments.append({
+                    'path': path,
+                    'start': started,
+                    'end': ended,
+                    'duration': round(ended - started, 3),
+                })
+            elif not self._stop.is_set():
+                print("[WARN] 화면 녹화 세그먼트가 비어 있습니다. 잠시 후 다시 시도합니다.")
+                self._stop.wait(1)
+            index += 1
+
+    def start(self) -> "StreamingScreenRecorder":
+        """녹화 스레드 시작"""
+        os.makedirs(self.local_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="screen-record-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Optional[str]:
+        """
+        녹화를 종료하고 세그먼트를 합친 뒤 인덱스 파일 저장
+        :return: 합쳐진 영상 파일 경로 (세그먼트가 없으면 None)
+        """
+        with self._lock:
+            self._stop.set()
+            procs = list(self._procs)
+        # adb만 종료하면 ffmpeg는 입력 EOF를 받고 mp4를 마무리한다
+        if procs and procs[0].poll() is None:
+            procs[0].terminate()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        # 시간 안에 끝나지 않은 프로세스가 남아 있으면 모두 종료
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            if proc.poll() is None:
+                print(f"[WARN] 종료되지 않은 녹화 프로세스를 종료합니다 (PID: {proc.pid})")
+                proc.terminate()
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        joined = self._join_segments()
+        index_path = os.path.join(self.local_dir, f"{self.base_name}.json")
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump({'video': joined, 'segments': self.segments}, f, ensure_ascii=False, indent=2)
+        print(f"[INFO] 화면 녹화 종료: {joined} (세그먼트 {len(self.segments)}개, 인덱스 {index_path})")
+        return joined
+
+    def _join_segments(self) -> Optional[str]:
+        if not self.segments:
+            return None
+        if len(self.segments) == 1:
+            return self.segments[0]['path']
+        joined = os.path.join(self.local_dir, f"{self.base_name}.{self.extension}")
+        if self.ffmpeg:
+            list_path = os.path.join(self.local_dir, f"{self.base_name}_segments.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for segment in self.segments:
+                    f.write(f"file '{os.path.abspath(segment['path'])}'\n")
+            result = subprocess.run(
+                [self.ffmpeg, "-loglevel", "error", "-y", "-f", "concat", "-safe", "0",
+                 "-i", list_path, "-c", "copy", joined],
+            )
+            os.remove(list_path)
+            if result.returncode != 0:
+                print("[WARN] 세그먼트 합치기 실패. 인덱스 파일의 세그먼트 목록을 사용하세요.")
+                return self.segments[0]['path']
+        else:
+            # Annex-B h264 스트림은 이어 붙여도 그대로 재생 가능
+            with open(joined, "wb") as out:
+                for segment in self.segments:
+                    with open(segment['path'], "rb") as f:
+                        shutil.copyfileobj(f, out)
+        return joined
@@ -0,0 +1,127 @@
+import time
+from typing import Optional, Union
+
+import cv2
+import numpy
+
+from util.adb_util import capture_frame
+from util.frame import Frame
+
+# delay 대신 넘기면 고정 대기 대신 화면이 안정될 때까지 대기
+STABLE = "stable"
+
+# 비교용 축소 이미지 크기 (가로, 세로)
+SIGNATURE_SIZE = (64, 64)
+
+
+def frame_signature(frame: Union[Frame, numpy.ndarray]) -> numpy.ndarray:
+    """
+    프레임 비교용 축소 Grayscale 이미지
+    :param frame: Frame 또는 RGB numpy 배열
+    :return: float32 numpy 배열 (SIGNATURE_SIZE)
+    """
+    image = frame.image if isinstance(frame, Frame) else frame
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+    return small.astype(numpy.float32)
+
+
+def frame_difference(a: numpy.ndarray, b: numpy.ndarray) -> float:
+    """두 시그니처의 평균 절대 차이 (0.0 ~ 1.0)"""
+    if a.shape != b.shape:
+        # 회전 등으로 크기가 바뀌었으면 완전히 다른 화면으로 간주
+        return 1.0
+    return float(numpy.mean(numpy.abs(a - b)) / 255.0)
+
+
+def wait_until_stable(
+    timeout: float = 10.0,
+    stable_for: float = 0.6,
+    interval: float = 0.2,
+    threshold: float = 0.005,
+) -> bool:
+    """
+    화면이 stable_for초 동안 거의 바뀌지 않을 때까지 대기 (축소 프레임 차분 비교)
+    :param timeout: 최대 대기 시간(초)
+    :param stable_for: 변화 없이 유지되어야 하는 시간(초)
+    :param interval: 캡처 간격(초)
+    :param threshold: 변화 없음으로 볼 평균 차이 (0~1)
+    :return: 시간 안에 안정되면 True, timeout이면 False
+    """
+    start = time.time()
+    previous = None
+    stable_since = None
+    while True:
+        signature = frame_signature(capture_frame(max_age=0))
+        now = time.time()
+        if previous is not None and frame_difference(previous, signature) < threshold:
+            if stable_since is None:
+                stable_since = now
+            if now - stable_since >= stable_for:
+                print(f"[DEBUG] 화면 안정 확인 ({now - start:.2f}초)")
+                return True
+        else:
+            stable_since = None
+        previous = signature
+        if now - start >= timeout:
+            print(f"[WARN] {timeout}초 동안 화면이 안정되지 않았습니다.")
+            return False
+        time.sleep(interval)
+
+
+def wait_for_change(
+    reference: Optional[Union[Frame, numpy.ndarray]] = None,
+    timeout: float = 10.0,
+    interval: float = 0.2,
+    threshold: float = 0.01,
+) -> bool:
+    """
+    화면이 기준 프레임과 달라질 때까지 대기
+    :param reference: 기준 Frame (None이면 지금 화면을 캡처해 기준으로 사용)
+    :param timeout: 최대 대기 시간(초)
+    :param interval: 캡처 간격(초)
+    :param threshold: 변화로 볼 평균 차이 (0~1)
+    :return: 시간 안에 바뀌면 True, timeout이면 False
+    """
+    start = time.time()
+    if reference is None:
+        reference = capture_frame(max_age=0)
+    base = frame_signature(reference)
+    while time.time() - start < timeout:
+        time.sleep(interval)
+        if frame_difference(base, frame_signature(capture_frame(max_age=0))) >= threshold:
+            print(f"[DEBUG] 화면 변화 감지 ({time.time() - start:.2f}초)")
+            return True
+    print(f"[WARN] {timeout}초 동안 화면 변화가 없습니다.")
+    return False
+
+
+def wait_for_transition(
+    reference: Union[Frame, numpy.ndarray],
+    timeout: float = 10.0,
+    stable_for: float = 0.6,
+) -> bool:
+    """
+    입력으로 화면이 바뀐 뒤 안정될 때까지 대기
+    입력 직후에는 아직 이전 화면이 그대로인 경우(로그인 요청 처리 중 등)가 많아 안정 여부만 보면 너무 일찍 끝나므로,
+    입력 전에 캡처한 reference와 달라지는 것을 먼저 기다린 뒤 안정될 때까지 기다린다.
+    :param reference: 입력 전에 캡처한 Frame
+    :param timeout: 화면 변화, 안정 각각의 최대 대기 시간(초)
+    :param stable_for: 변화 없이 유지되어야 하는 시간(초)
+    :return: 시간 안에 바뀌고 안정되면 True
+    """
+    changed = wait_for_change(reference, timeout=timeout)
+    stable = wait_until_stable(timeout=timeout, stable_for=stable_for)
+    return changed and stable
+
+
+def settle(delay: Union[int, float, str], timeout: float = 10.0):
+    """
+    입력 후 대기: 숫자면 그만큼 sleep, STABLE("stable")이면 화면이 안정될 때까지 대기
+    :param delay: 대기 시간(초) 또는 STABLE
+    :param timeout: STABLE일 때 최대 대기 시간(초)
+    """
+    if delay == STABLE:
+        wait_until_stable(timeout=timeout)
+    elif delay:
+        time.sleep(delay)
@@ -0,0 +1,398 @@
+import collections
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy
+
+from util.device_geometry import get_image_transform
+from util.device_pool import artifact_path
+from util.dynamic_data import load_data
+from util.frame import Frame
+from util.incremental_ocr import incremental_results
+from util.ocr_search import DEFAULT_PREPROCESS_STEPS, load_gray, match_ocr_data, ocr_step, search_texts, step_label
+from util.ocr_variant_stats import get_variant_store, screen_fingerprint
+from util.text_matcher import normalize
+from util.text_regions import Box, detect_text_regions, use_full_frame
+
+# 역색인 n-gram 길이
+NGRAM = 2
+
+
+@dataclass
+class OcrToken:
+    """
+    OCR 단어 하나
+    :text: 인식된 문자열
+    :norm: 정규화된 문자열 (영문/숫자/한글, 소문자)
+    :box: 디바이스 좌표 박스 (x1, y1, x2, y2)
+    :image_box: OCR 입력 이미지 좌표 박스
+    :conf: tesseract 신뢰도
+    :block: 블록 번호
+    :line: 줄 번호 (lines의 인덱스)
+    """
+    text: str
+    norm: str
+    box: Box
+    image_box: Box
+    conf: float
+    block: int
+    line: int
+
+
+@dataclass
+class OcrLine:
+    """같은 줄로 인식된 단어 묶음 (tokens는 TextIndex.tokens의 인덱스)"""
+    text: str
+    box: Box
+    block: int
+    tokens: List[int]
+
+
+def _union(boxes: List[Box]) -> Box:
+    return (
+        min(box[0] for box in boxes), min(box[1] for box in boxes),
+        max(box[2] for box in boxes), max(box[3] for box in boxes),
+    )
+
+
+def _ngrams(text: str, n: int = NGRAM) -> Set[str]:
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class TextIndex:
+    """
+    전처리 단계 하나의 OCR 결과로 만든 화면 텍스트 색인
+    단어/줄/블록 묶음, 디바이스 좌표 박스, 정규화 문자열 역색인(n-gram)을 한 번 만들어 두고
+    같은 화면에 대한 찾기/출력/리포트 저장은 OCR 없이 이 색인으로 처리한다.
+    """
+
+    def __init__(self, result: Dict, resize: float = 1.0, serial: Optional[str] = None):
+        """
+        :param result: ocr_step 결과 {'step', 'shape', 'data', 'windows', 'elapsed'}
+        :param resize: 해당 단계의 확대 배율 (이미지 → 디바이스 좌표 변환용)
+        :param serial: 디바이스 시리얼
+        """
+        self.step = result['step']
+        self.shape = result['shape']
+        self.data = result['data']
+        self.windows = result['windows']
+        h, w = self.shape
+        self.transform = get_image_transform(w, h, resize, serial)
+
+        self.tokens: List[OcrToken] = []
+        self.lines: List[OcrLine] = []
+        self.blocks: Dict[int, List[int]] = {}
+        self._by_norm: Dict[str, List[int]] = {}
+        self._ngrams: Dict[str, Set[int]] = {}
+        self._build()
+
+    def _build(self):
+        d = self.data
+        line_ids: Dict[Tuple[int, int, int], int] = {}
+        for i, text in enumerate(d.get('text', [])):
+            if not text.strip():
+                continue
+            image_box = (d['left'][i], d['top'][i], d['left'][i] + d['width'][i], d['top'][i] + d['height'][i])
+            block = d['block_num'][i] if 'block_num' in d else 0
+            key = (block, d['par_num'][i] if 'par_num' in d else 0, d['line_num'][i] if 'line_num' in d else 0)
+            if key not in line_ids:
+                line_ids[key] = len(self.lines)
+                self.lines.append(OcrLine("", image_box, block, []))
+            token_id = len(self.tokens)
+            norm = normalize(text)
+            self.tokens.append(OcrToken(
+                text=text,
+                norm=norm,
+                box=self.transform.box_to_device(image_box),
+                image_box=image_box,
+                conf=float(d['conf'][i]) if 'conf' in d else -1.0,
+                block=block,
+                line=line_ids[key],
+            ))
+            self.lines[line_ids[key]].tokens.append(token_id)
+            self.blocks.setdefault(block, []).append(token_id)
+            if norm:
+                self._by_norm.setdefault(norm, []).append(token_id)
+                for gram in _ngrams(norm):
+                    self._ngrams.setdefault(gram, set()).add(token_id)
+
+        for line in self.lines:
+            words = [self.tokens[t] for t in line.tokens]
+            line.text = " ".join(word.text for word in words)
+            line.box = _union([word.box for word in words])
+
+    @property
+    def text(self) -> str:
+        """인식된 전체 단어 (공백으로 연결)"""
+        return " ".join(token.text for token in self.tokens)
+
+    def to_hit(self, match: Tuple[Box, float, str]) -> Dict:
+        """
+        match_ocr_data 결과를 디바이스 좌표 결과로 변환 (회전 보정 + 스케일 + 클램핑)
+        :return: {'x', 'y', 'box'(디바이스 좌표), 'score', 'kind', 'step', 'image_center'}
+        """
+        box, score, kind = match
+        image_center = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+        x, y = self.transform.to_device(*image_center)
+        return {
+            'x': x,
+            'y': y,
+            'box': self.transform.box_to_device(box),
+            'score': score,
+            'kind': kind,
+            'step': self.step,
+            'image_center': image_center,
+        }
+
+    def find(self, target: str, similarity_threshold: float = 0.8) -> Optional[Dict]:
+        """
+        이 색인에서 텍스트 찾기 (텍스트_찾기와 같은 정확/와일드카드/유사도 매칭)
+        :return: to_hit 결과 또는 None
+        """
+        match = match_ocr_data(self.data, target, similarity_threshold, self.windows)
+        return self.to_hit(match) if match else None
+
+    def lookup(self, text: str) -> List[OcrToken]:
+        """정규화 문자열이 text와 같은 단어들"""
+        return [self.tokens[t] for t in self._by_norm.get(normalize(text), [])]
+
+    def containing(self, text: str) -> List[OcrToken]:
+        """정규화 문자열에 text가 포함된 단어들 (n-gram 역색인으로 후보를 줄인 뒤 확인)"""
+        norm = normalize(text)
+        if not norm:
+            return []
+        if len(norm) < NGRAM:
+            candidates = {t for gram, ids in self._ngrams.items() if norm in gram for t in ids}
+        else:
+            grams = sorted(_ngrams(norm), key=lambda gram: len(self._ngrams.get(gram, ())))
+            candidates = set(self._ngrams.get(grams[0], ()))
+            for gram in grams[1:]:
+                candidates &= self._ngrams.get(gram, set())
+                if not candidates:
+                    break
+        return [self.tokens[t] for t in sorted(candidates) if norm in self.tokens[t].norm]
+
+    def to_dict(self) -> Dict:
+        """리포트용 dict (JSON 직렬화 가능)"""
+        return {
+            'step': self.step,
+            'shape': list(self.shape),
+            'text': self.text,
+            'tokens': [asdict(token) for token in self.tokens],
+            'lines': [asdict(line) for line in self.lines],
+            'blocks': {str(block): ids for block, ids in self.blocks.items()},
+        }
+
+
+def prepare_ocr_input(image: Union[str, Frame, numpy.ndarray]) -> Tuple[numpy.ndarray, Optional[List[Box]]]:
+    """
+    OCR 공통 입력 준비
+    :return: (Grayscale 기준 이미지, 텍스트 후보 영역 또는 None(전체 화면 OCR))
+    """
+    # Grayscale 기준 이미지는 한 번만 만들고, 단계별 중간 결과(반전/이진화)도 메모리에서 재사용
+    base_gray = load_gray(image)
+    # 텍스트 후보 영역만 OCR (영역 검출은 원본 Grayscale에서 한 번)
+    regions = detect_text_regions(base_gray) if load_data('ocr_roi') else []
+    if use_full_frame(regions, base_gray.shape):
+        return base_gray, None
+    print(f"[DEBUG] 텍스트 후보 영역 {len(regions)}개만 OCR합니다.")
+    return base_gray, regions
+
+
+class FrameText:
+    """
+    화면(프레임) 한 장의 OCR 상태
+    전처리 단계별 OCR 결과와 TextIndex를 보관하여, 같은 화면을 다시 찾거나 출력할 때 OCR을 다시 하지 않는다.
+    previous(직전 화면)를 주면 바뀐 부분만 OCR하여 단계별 결과를 만든다. (incremental_ocr 참고)
+    :changed: previous와 비교해 화면이 바뀌었는지 (previous가 없으면 True)
+    :scroll: previous 대비 세로 스크롤 양(px)
+    """
+
+    def __init__(
+        self,
+        image: Union[str, Frame, numpy.ndarray],
+        steps: Optional[List[dict]] = None,
+        lang: str = "kor+eng",
+        previous: Optional["FrameText"] = None,
+    ):
+        self.steps = steps or DEFAULT_PREPROCESS_STEPS
+        self.lang = lang
+        self.serial = image.serial if isinstance(image, Frame) else None
+        self.created_at = time.time()
+        self.base_gray, self.regions = prepare_ocr_input(image)
+        self.results: Dict[int, Dict] = {}
+        self.changed = True
+        self.scroll = 0
+        if previous is not None and previous.steps == self.steps and previous.lang == lang:
+            update = incremental_results(previous.base_gray, dict(previous.results), self.base_gray, self.steps, lang)
+            if update is not None:
+                self.results, info = update
+                self.changed, self.scroll = info['changed'], info['scroll']
+        self._indexes: Dict[int, TextIndex] = {}
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.RLock()
+
+    def index(self, step: Optional[int] = None) -> TextIndex:
+        """
+        전처리 단계의 TextIndex (그 단계를 아직 OCR하지 않았으면 OCR)
+        :param step: 단계 번호 (None이면 이미 OCR한 단계 중 가장 앞 단계, 없으면 0)
+        """
+        with self._lock:
+            if step is None:
+                step = min(self.results) if self.results else 0
+            if step not in self.results:
+                self.results[step] = ocr_step(self.base_gray, step, self.steps[step], self.regions, self.lang)
+            if step not in self._indexes:
+                self._indexes[step] = TextIndex(self.results[step], self.steps[step].get('resize', 1.0), self.serial)
+            return self._indexes[step]
+
+    @property
+    def fingerprint(self) -> str:
+        """전처리 단계 통계용 화면 특징"""
+        if self._fingerprint is None:
+            self._fingerprint = screen_fingerprint(self.base_gray)
+        return self._fingerprint
+
+    def find_texts(self, targets: List[str], similarity_threshold: float = 0.8) -> Dict[str, Optional[Dict]]:
+        """
+        여러 텍스트 찾기 (이미 OCR한 단계부터 확인하고, 못 찾은 텍스트가 있을 때만 남은 단계를 OCR)
+        ocr_adaptive면 과거에 찾았던 기록으로 단계 순서를 정하고, 찾은 적이 없는 단계는 다른 단계에서 못 찾았을 때만 실행한다.
+        :return: {텍스트: TextIndex.to_hit 결과 또는 None}
+        """
+        adaptive = load_data('ocr_adaptive')
+        with self._lock:
+            order, fallback, learned = None, [], False
+            if adaptive:
+                store = get_variant_store()
+                order, fallback = store.plan(targets, self.fingerprint, self.steps)
+                learned = store.learned(targets, self.fingerprint)
+                if order != list(range(len(self.steps))):
+                    print(f"[DEBUG] 학습된 전처리 단계 순서: {order} (보류: {fallback})")
+            if learned and load_data('ocr_parallel') and len(order) > 1:
+                # 병렬 실행은 순서와 관계없이 모든 단계를 한꺼번에 시작하므로,
+                # 찾은 기록이 있으면 가장 유력한 단계를 먼저 단독으로 실행하고 못 찾았을 때만 나머지를 실행
+                passes = [order[:1], order[1:]]
+            else:
+                passes = [order]
+            if fallback:
+                passes.append(fallback)
+            before = set(self.results)
+            found: Dict[str, Optional[Dict]] = {target: None for target in targets}
+            for step_order in passes:
+                missing = [target for target in targets if not found[target]]
+                if not missing:
+                    break
+                if step_order is fallback:
+                    print(f"[INFO] 보류했던 전처리 단계 {fallback}로 다시 찾습니다: {missing}")
+                found.update(search_texts(self.base_gray, missing, self.steps, similarity_threshold, self.regions,
+                                          self.lang, results=self.results, order=step_order))
+            if adaptive:
+                self._record_steps(targets, found, before)
+        return {
+            target: self.index(found[target]['step']).to_hit(found[target]['match']) if found[target] else None
+            for target in targets
+        }
+
+    def _record_steps(self, targets: List[str], found: Dict[str, Optional[Dict]], before: set):
+        # 이번에 새로 OCR한 단계 (results는 끝난 순서대로 추가됨)
+        new_steps = [idx for idx in self.results if idx not in before]
+        if not new_steps:
+            return
+        store = get_variant_store()
+        for target in dict.fromkeys(targets):
+            won = found[target]['step'] if found[target] else None
+            if won is not None and won not in new_steps:
+                # 이미 OCR해 둔 단계에서 찾음
+                continue
+            for idx in new_steps:
+                store.record(target, self.fingerprint, step_label(self.steps[idx]), self.results[idx]['elapsed'], idx == won)
+                if idx == won:
+                    break
+        store.maybe_save()
+
+    def to_dict(self) -> Dict:
+        """OCR한 모든 단계의 색인 (리포트용)"""
+        return {
+            'serial': self.serial,
+            'created_at': self.created_at,
+            'regions': [list(box) for box in self.regions] if self.regions else None,
+            'steps': {
+                step_label(self.steps[step]): self.index(step).to_dict()
+                for step in sorted(self.results)
+            },
+        }
+
+    def save_json(self, path: Optional[str] = None) -> str:
+        """
+        색인을 JSON 파일로 저장
+        :param path: 저장 경로 (None이면 산출물 폴더의 ocr_index/)
+        :return: 저장된 경로
+        """
+        if not self.results:
+            self.index()
+        if path is None:
+            path = artifact_path("ocr_index", f"ocr_index_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"[INFO] OCR 색인 저장: {path}")
+        return path
+
+
+# 최근 화면의 FrameText {(화면 키, 전처리 단계): FrameText}
+_frame_texts: "collections.OrderedDict[Tuple, FrameText]" = collections.OrderedDict()
+_frame_texts_lock = threading.Lock()
+
+
+def _frame_key(image: Union[str, Frame, numpy.ndarray]) -> Optional[Tuple]:
+    if isinstance(image, Frame):
+        return ('frame', image.serial, image.timestamp, image.generation, id(image.image))
+    if isinstance(image, str) and os.path.exists(image):
+        stat = os.stat(image)
+        return ('file', os.path.abspath(image), stat.st_mtime, stat.st_size)
+    # numpy 배열은 내용이 바뀌어도 알 수 없으므로 캐시하지 않음
+    return None
+
+
+def get_frame_text(
+    image: Union[str, Frame, numpy.ndarray],
+    steps: Optional[List[dict]] = None,
+    lang: str = "kor+eng",
+    previous: Optional[FrameText] = None,
+) -> FrameText:
+    """
+    화면의 FrameText 반환 (최근 ocr_index_frames개 화면은 재사용)
+    :param image: 이미지 경로 또는 Frame / RGB numpy 배열
+    :param steps: 전처리 단계 목록 (None이면 기본 단계)
+    :param previous: 직전 화면의 FrameText (ocr_incremental이면 바뀐 부분만 OCR)
+    """
+    steps = steps or DEFAULT_PREPROCESS_STEPS
+    if not load_data('ocr_incremental'):
+        previous = None
+    key = _frame_key(image)
+    size = load_data('ocr_index_frames') or 0
+    if key is None or size <= 0:
+        return FrameText(image, steps, lang, previous)
+    key = key + (tuple(step_label(step) for step in steps), lang)
+    with _frame_texts_lock:
+        frame_text = _frame_texts.get(key)
+        if frame_text is not None:
+            _frame_texts.move_to_end(key)
+            return frame_text
+    frame_text = FrameText(image, steps, lang, previous)
+    with _frame_texts_lock:
+        _frame_texts[key] = frame_text
+        while len(_frame_texts) > size:
+            _frame_texts.popitem(last=False)
+    return frame_text
+
+
+def clear_frame_texts():
+    """보관 중인 화면 색인 비우기"""
+    with _frame_texts_lock:
+        _frame_texts.clear()
@@ -0,0 +1,239 @@
+"""
+OCR 토큰과 찾는 텍스트 비교 (정확 / 와일드카드 / 유사도 매칭)
+
+대상 텍스트는 한 번만 정규화하고 와일드카드 정규식도 미리 컴파일한다.
+유사도 매칭은 길이 차이만으로 임계값을 넘을 수 없는 후보를 먼저 버리고,
+남은 후보만 bit-parallel(Myers) 편집 거리로 계산한다.
+
+    python -m util.text_matcher   # 기존 구현과 결과 비교 + 속도 측정
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+_NON_TEXT = re.compile(r"[^a-zA-Z0-9가-힣]+")
+
+# 연속으로 이어 붙여 비교할 최대 단어 수
+MAX_WINDOW = 6
+
+# (시작 인덱스, 추가 단어 수 j, 정규화된 연결 문자열)
+Window = Tuple[int, int, str]
+# (시작 인덱스, 추가 단어 수 j, 유사도, "exact" / "pattern" / "similarity")
+Candidate = Tuple[int, int, float, str]
+
+
+def normalize(text: str) -> str:
+    """영문/숫자/한글만 남기고 소문자로"""
+    return _NON_TEXT.sub("", text).lower()
+
+
+def is_pattern(text: str) -> bool:
+    return "*" in text or "." in text
+
+
+def edit_distance(a: str, b: str) -> int:
+    """
+    Levenshtein 거리 (Myers/Hyyrö bit-parallel, O(len(a)/word * len(b)))
+    파이썬 정수를 비트 벡터로 쓰므로 길이 제한이 없다.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+    peq = {}
+    for i, c in enumerate(b):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    for c in a:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # 전역 거리: 0행은 열마다 +1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return score
+
+
+def token_windows(texts: Sequence[str], max_window: int = MAX_WINDOW) -> List[Window]:
+    """
+    OCR 단어 목록에서 비교할 연속 단어 구간(1~max_window개)을 만들고 정규화
+    정규화는 글자 단위 제거이므로 단어별 정규화 결과를 이어 붙이면 연결 후 정규화한 것과 같다.
+    """
+    normalized = [normalize(text) for text in texts]
+    n = len(texts)
+    windows = []
+    for i in range(n):
+        if not texts[i].strip():
+            continue
+        cleaned = ""
+        for j in range(max_window):
+            if i + j >= n:
+                break
+            cleaned += normalized[i + j]
+            windows.append((i, j, cleaned))
+    return windows
+
+
+class TextMatcher:
+    """찾는 텍스트 하나에 대한 매처 (정규화/정규식/길이 조건을 미리 계산)"""
+
+    def __init__(self, target: str, similarity_threshold: float = 0.8):
+        self.target = target
+        self.similarity_threshold = similarity_threshold
+        self.norm = normalize(target)
+        self.pattern = None
+        if is_pattern(target):
+            self.pattern = re.compile(re.escape(self.norm).replace(r"\*", ".*"), re.IGNORECASE)
+
+    def match(self, cleaned: str) -> Optional[Tuple[float, str]]:
+        """
+        정규화된 후보 문자열 비교
+        :return: (유사도, 매칭 종류) 또는 None
+        """
+        if self.pattern is not None:
+            return (1.0, "pattern") if self.pattern.search(cleaned) else None
+        if cleaned == self.norm:
+            return 1.0, "exact"
+        la, lb = len(cleaned), len(self.norm)
+        max_len = max(la, lb)
+        if max_len == 0:
+            return None
+        # 편집 거리는 길이 차이 이상이므로, 길이 차이만으로도 임계값 미만이면 계산하지 않음
+        if 1 - (abs(la - lb) / max_len) < self.similarity_threshold:
+            return None
+        similarity = 1 - (edit_distance(cleaned, self.norm) / max_len)
+        if similarity >= self.similarity_threshold:
+            return similarity, "similarity"
+        return None
+
+    def candidates(self, windows: Sequence[Window]) -> List[Candidate]:
+        """매칭되는 모든 구간 (windows 순서 유지)"""
+        found = []
+        for i, j, cleaned in windows:
+            result = self.match(cleaned)
+            if result:
+                found.append((i, j, result[0], result[1]))
+        return found
+
+    def best(self, windows: Sequence[Window]) -> Optional[Candidate]:
+        """유사도가 가장 높은 구간 (같으면 앞쪽)"""
+        found = self.candidates(windows)
+        if not found:
+            return None
+        return max(found, key=lambda candidate: candidate[2])
+
+
+# --- 기존 구현과 비교 (벤치마크) ---
+
+def _legacy_candidates(texts: Sequence[str], target_text: str, similarity_threshold: float) -> List[Candidate]:
+    # 이전 find_text_coordinates의 매칭 루프 (비교용, DEBUG 출력 포함)
+    def legacy_normalize(text):
+        return re.sub(r"[^a-zA-Z0-9가-힣]+", "", text).lower()
+
+    def levenshtein_distance(str1, str2):
+        if len(str1) < len(str2):
+            return levenshtein_distance(str2, str1)
+        if len(str2) == 0:
+            return len(str1)
+        previous_row = list(range(len(str2) + 1))
+        for i, c1 in enumerate(str1):
+            current_row = [i + 1]
+            for j, c2 in enumerate(str2):
+                insertions = previous_row[j + 1] + 1
+                deletions = current_row[j] + 1
+                substitutions = previous_row[j] + (c1 != c2)
+                current_row.append(min(insertions, deletions, substitutions))
+            previous_row = current_row
+        return previous_row[-1]
+
+    def similarity_ratio(str1, str2):
+        if not str1 and not str2:
+            return 1.0
+        distance = levenshtein_distance(str1, str2)
+        max_len = max(len(str1), len(str2))
+        return 1 - (distance / max_len) if max_len > 0 else 1.0
+
+    n = len(texts)
+    found = []
+    for i in range(n):
+        if not texts[i].strip():
+            continue
+        for j in range(0, 6):
+            if i + j >= n:
+                break
+            segment = texts[i:i+j+1]
+            if all(not word.strip() for word in segment):
+                continue
+            cleaned = legacy_normalize(''.join(segment))
+            norm_target = legacy_normalize(target_text)
+            if "*" in target_text or "." in target_text:
+                pattern = re.escape(norm_target).replace(r"\*", ".*")
+                if re.search(pattern, cleaned, re.IGNORECASE):
+                    found.append((i, j, 1.0, "pattern"))
+            elif cleaned == norm_target:
+                found.append((i, j, 1.0, "exact"))
+            else:
+                similarity = similarity_ratio(cleaned, norm_target)
+                print(f"[DEBUG] 유사도 비교: '{cleaned}' vs '{norm_target}' → 유사도: {similarity:.3f}")
+                if similarity >= similarity_threshold:
+                    found.append((i, j, similarity, "similarity"))
+    return found
+
+
+def _benchmark(rounds: int = 20, seed: int = 7):
+    import contextlib
+    import io
+    import random
+    import time
+
+    rng = random.Random(seed)
+    words = [
+        "로그인", "로그인했던", "다른", "계정으로", "계정", "선택", "Krafton", "ID", "GENERAL_SUCCESS",
+        "모두", "동의하고", "시작", "닫기", "Lv.12", "Facebook", "Google", "연결", "확인", "취소", "설정",
+        "|", "—", "", " ", "a1", "0", "ㅡ", "Apple", "Discord", "으로", "계속",
+    ]
+    targets = ["로그인했던", "다른 계정으로", "*계정*선택*", "GENERAL_SUCCESS", "Lv.*", "모두 동의하고 시작", "Krafton ID", "닫기"]
+
+    def noisy(word):
+        # OCR 오인식 흉내: 글자 하나 바꾸기/빼기
+        if len(word) > 2 and rng.random() < 0.2:
+            k = rng.randrange(len(word))
+            return word[:k] + rng.choice(["", "l", "0", "ㅇ"]) + word[k + 1:]
+        return word
+
+    screens = [[noisy(rng.choice(words)) for _ in range(rng.randint(80, 250))] for _ in range(rounds)]
+
+    legacy_time = new_time = 0.0
+    comparisons = 0
+    for texts in screens:
+        for target in targets:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                expected = _legacy_candidates(texts, target, 0.8)
+            legacy_time += time.perf_counter() - start
+            comparisons += out.getvalue().count("\n")
+
+            start = time.perf_counter()
+            actual = TextMatcher(target, 0.8).candidates(token_windows(texts))
+            new_time += time.perf_counter() - start
+
+            if actual != expected:
+                raise AssertionError(f"결과가 다릅니다: target={target!r}\n기존: {expected}\n신규: {actual}")
+
+    print(f"화면 {rounds}개 x 대상 {len(targets)}개: 결과 동일")
+    print(f"기존 구현: {legacy_time * 1000:.1f}ms (유사도 비교/DEBUG 출력 {comparisons}회)")
+    print(f"TextMatcher: {new_time * 1000:.1f}ms ({legacy_time / new_time:.1f}배)")
+
+
+if __name__ == "__main__":
+    _benchmark()
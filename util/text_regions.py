@@ -0,0 +1,147 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy
+
+from util.dynamic_data import load_data
+from util.ocr_cache import ocr_image_to_data
+
+Box = Tuple[int, int, int, int]
+
+# 후보 영역이 이보다 많거나 화면의 이 비율 이상을 덮으면 전체 화면 OCR이 더 빠름
+MAX_REGIONS = 60
+MAX_COVERAGE = 0.6
+
+
+def _merge_boxes(boxes: List[Box], gap: int) -> List[Box]:
+    """gap 이내로 겹치거나 붙어 있는 박스를 하나로 합침"""
+    merged = [list(box) for box in boxes]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        while merged:
+            x1, y1, x2, y2 = merged.pop()
+            i = 0
+            while i < len(merged):
+                a1, b1, a2, b2 = merged[i]
+                if a1 <= x2 + gap and x1 <= a2 + gap and b1 <= y2 + gap and y1 <= b2 + gap:
+                    x1, y1, x2, y2 = min(x1, a1), min(y1, b1), max(x2, a2), max(y2, b2)
+                    merged.pop(i)
+                    changed = True
+                else:
+                    i += 1
+            result.append([x1, y1, x2, y2])
+        merged = result
+    return [tuple(box) for box in merged]
+
+
+def detect_text_regions(gray: numpy.ndarray, method: Optional[str] = None, padding: int = 6) -> List[Box]:
+    """
+    OCR할 텍스트 후보 영역 검출
+    - "gradient": morphological gradient → Otsu 이진화 → 가로 방향 closing으로 글자를 줄 단위로 묶음 (기본)
+    - "mser": MSER 영역을 줄 단위로 묶음
+    글자 색/배경 극성에 상관없이 동작하므로 반전 여부와 무관하게 원본 Grayscale에서 한 번만 검출하면 된다.
+    :param gray: Grayscale 이미지
+    :param method: "gradient" / "mser" (None이면 dynamic_data의 ocr_region_method)
+    :param padding: 박스 여백(px)
+    :return: 읽는 순서(위→아래, 왼쪽→오른쪽)로 정렬된 (x1, y1, x2, y2) 목록
+    """
+    method = method or load_data('ocr_region_method') or "gradient"
+    h, w = gray.shape[:2]
+    # 해상도에 비례하는 커널 (1080 폭 기준 가로 25px)
+    join = max(9, int(w / 43))
+    candidates: List[Box] = []
+
+    if method == "mser":
+        mser = cv2.MSER_create()
+        mser.setMinArea(20)
+        mser.setMaxArea(int(w * h * 0.02))
+        _, rects = mser.detectRegions(gray)
+        mask = numpy.zeros_like(gray)
+        for x, y, rw, rh in rects:
+            mask[y:y + rh, x:x + rw] = 255
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (join, 1)))
+    else:
+        gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+        _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (join, 1)))
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        x, y, rw, rh = cv2.boundingRect(contour)
+        # 너무 작거나(노이즈) 글자 줄이라고 보기 어려운 큰 덩어리(이미지/배경)는 제외
+        if rh < 8 or rw < 8 or rh > h * 0.15:
+            continue
+        filled = cv2.countNonZero(mask[y:y + rh, x:x + rw]) / float(rw * rh)
+        if filled < 0.3:
+            continue
+        candidates.append((max(x - padding, 0), max(y - padding, 0), min(x + rw + padding, w), min(y + rh + padding, h)))
+
+    boxes = _merge_boxes(candidates, gap=padding)
+    boxes.sort(key=lambda box: (box[1] // max(padding * 2, 1), box[0]))
+    return boxes
+
+
+def use_full_frame(boxes: List[Box], shape: Tuple[int, ...]) -> bool:
+    """후보 영역이 없거나 너무 많아서 전체 화면 OCR이 나은 경우"""
+    if not boxes or len(boxes) > MAX_REGIONS:
+        return True
+    area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in boxes)
+    return area >= shape[0] * shape[1] * MAX_COVERAGE
+
+
+def scale_boxes(boxes: List[Box], factor: float, shape: Tuple[int, ...]) -> List[Box]:
+    """검출 좌표를 resize된 OCR 입력 이미지 좌표로 변환"""
+    if factor == 1.0:
+        return boxes
+    h, w = shape[:2]
+    return [
+        (int(x1 * factor), int(y1 * factor), min(int(x2 * factor), w), min(int(y2 * factor), h))
+        for x1, y1, x2, y2 in boxes
+    ]
+
+
+def ocr_regions(
+    image: numpy.ndarray,
+    boxes: List[Box],
+    lang: str = "kor+eng",
+    params: Optional[Dict] = None,
+    workers: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Dict[str, List]:
+    """
+    후보 영역만 잘라서 병렬로 OCR하고, 결과를 전체 이미지 기준 image_to_data(DICT) 하나로 합침
+    left/top은 전체 이미지 좌표로 옮기고, block_num은 영역마다 겹치지 않게 다시 매긴다.
+    :param image: 전처리된 OCR 입력 이미지
+    :param boxes: image 좌표의 영역 목록 (읽는 순서)
+    :param lang: tesseract 언어
+    :param params: 전처리 파라미터 (캐시 키에 포함)
+    :param workers: 동시 OCR 수 (None이면 dynamic_data의 ocr_region_workers)
+    :param cancel: 설정되면 아직 OCR하지 않은 영역은 건너뛰고, OCR 중인 영역은 중단함 (OcrCancelled)
+    """
+    workers = workers or load_data('ocr_region_workers') or 1
+
+    def run(box: Box) -> Dict[str, List]:
+        if cancel is not None and cancel.is_set():
+            return {}
+        x1, y1, x2, y2 = box
+        return ocr_image_to_data(numpy.ascontiguousarray(image[y1:y2, x1:x2]), lang=lang, params=params, cancel=cancel)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(boxes))) as executor:
+        results = list(executor.map(run, boxes))
+
+    merged: Dict[str, List] = {}
+    for region_idx, (box, data) in enumerate(zip(boxes, results)):
+        for key, values in data.items():
+            merged.setdefault(key, [])
+            if key == 'left':
+                values = [v + box[0] for v in values]
+            elif key == 'top':
+                values = [v + box[1] for v in values]
+            elif key == 'block_num':
+                values = [region_idx * 1000 + v for v in values]
+            merged[key].extend(values)
+    return merged